@@ -1,4 +1,38 @@
-from hugo_unifier.get_changes import get_changes
-from hugo_unifier.apply_changes import apply_changes
+import importlib
+import sys
+import types
 
-__all__ = ["get_changes", "apply_changes"]
+# Public attributes are imported lazily so that importing the package (e.g. for
+# the CLI) does not pull in anndata, pandas or networkx until they are needed.
+_lazy_attributes = {
+    "get_changes": "hugo_unifier.get_changes",
+    "apply_changes": "hugo_unifier.apply_changes",
+    "Unifier": "hugo_unifier.unifier",
+}
+
+__all__ = ["get_changes", "apply_changes", "Unifier"]
+
+
+def __getattr__(name):
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_lazy_attributes[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+class _LazyModule(types.ModuleType):
+    def __setattr__(self, name, value):
+        # Loading a submodule binds it as an attribute of the package. Some
+        # submodules share their name with the function they export, so do not
+        # let the submodule shadow the lazily resolved function.
+        if name in _lazy_attributes and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _LazyModule
@@ -1,54 +1,89 @@
+from copy import deepcopy
+
 import anndata as ad
 import pandas as pd
 
+from hugo_unifier.instrumentation import span
+from hugo_unifier.var_mapping import VarMapping, compile_var_mapping
+
+
+def _map_var(df: pd.DataFrame, mapping: VarMapping) -> pd.DataFrame:
+    # Each new var keeps the annotations of its first old var
+    var = df.iloc[mapping.first_sources].copy()
+    var.index = mapping.var_names
+    return var
+
+
+def _map_varm(varm, mapping: VarMapping) -> dict:
+    return {
+        key: value.iloc[mapping.first_sources]
+        if isinstance(value, pd.DataFrame)
+        else value[mapping.first_sources]
+        for key, value in varm.items()
+    }
+
 
-def apply_changes(adata: ad.AnnData, df_changes: pd.DataFrame):
+def apply_changes(adata: ad.AnnData, df_changes: pd.DataFrame, merge: str = "sum"):
     """
     Apply changes to the AnnData object based on the changes DataFrame.
 
+    The whole change set is compiled into one sparse mapping from the old to
+    the new var columns (see `hugo_unifier.var_mapping.compile_var_mapping`),
+    which is applied once to X, every layer and raw. Sparse matrices stay
+    sparse.
+
     Parameters
     ----------
     adata : anndata.AnnData
         The AnnData object to apply changes to.
     df_changes : pandas.DataFrame
         DataFrame containing the changes to apply. It should have columns 'action', 'symbol', and 'new'.
+    merge : str
+        How the columns of a 'merge' change are combined, 'sum' or 'max'.
 
     Returns
     -------
-    None
+    anndata.AnnData
+        A new AnnData object with the changes applied.
     """
-    adata = adata.copy()
-    for _, row in df_changes.iterrows():
-        action = row["action"]
-        symbol = row["symbol"]
-        new_symbol = row["new"]
-
-        if action == "conflict":
-            print(f"Conflict for {symbol} -> {new_symbol}")
-            continue
-
-        assert (
-            symbol in adata.var.index
-        ), f"Symbol {symbol} not found in AnnData object."
-        assert (
-            new_symbol not in adata.var.index
-        ), f"New symbol {new_symbol} already exists in AnnData object."
-
-        assert action in [
-            "rename",
-            "copy",
-        ], f"Action {action} not recognized. Expected 'rename' or 'copy'."
-
-        if action == "rename":
-            # Update the index value in a single row
-            adata.var.rename(index={symbol: new_symbol}, inplace=True)
-        elif action == "copy":
-            # Add a new row to the AnnData object
-            adata_row = adata[:, adata.var.index == symbol].copy()
-            adata_row.var.index = [new_symbol]
-            del adata.raw, adata_row.raw
-            adata = ad.concat(
-                [adata, adata_row], axis="var", merge="unique", uns_merge="unique"
+    with span("compile_var_mapping"):
+        mapping = compile_var_mapping(adata.var_names, df_changes)
+
+    with span("map_matrices"):
+        X = None if adata.X is None else mapping.apply(adata.X, merge)
+        # Newer versions of anndata expose X as the layer None
+        layers = {
+            key: mapping.apply(layer, merge)
+            for key, layer in adata.layers.items()
+            if key is not None
+        }
+
+    first = mapping.first_sources
+    updated = ad.AnnData(
+        X=X,
+        obs=adata.obs.copy(),
+        var=_map_var(adata.var, mapping),
+        uns=deepcopy(adata.uns),
+        obsm={key: value.copy() for key, value in adata.obsm.items()},
+        varm=_map_varm(adata.varm, mapping),
+        obsp={key: value.copy() for key, value in adata.obsp.items()},
+        varp={key: value[first][:, first] for key, value in adata.varp.items()},
+        layers=layers,
+    )
+
+    if adata.raw is not None:
+        raw_mapping = mapping
+        if not adata.raw.var_names.equals(adata.var_names):
+            # Raw may hold more vars, changes that do not apply to it are skipped
+            raw_mapping = compile_var_mapping(
+                adata.raw.var_names, df_changes, strict=False
+            )
+        with span("map_raw"):
+            updated.raw = ad.AnnData(
+                X=raw_mapping.apply(adata.raw.X, merge),
+                obs=adata.obs[[]],
+                var=_map_var(adata.raw.var, raw_mapping),
+                varm=_map_varm(adata.raw.varm, raw_mapping),
             )
 
-    return adata
+    return updated
@@ -0,0 +1,269 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from hugo_unifier.instrumentation import count
+from hugo_unifier.panels import PanelSet
+
+COLUMNS = ["action", "symbol", "new", "reason"]
+
+
+class Reason(NamedTuple):
+    """
+    Reason of a change, as a `str.format` template and its arguments.
+
+    Besides its arguments, the template can use the fields ``action``,
+    ``symbol``, ``new`` and ``sample`` of the change it belongs to. Arguments
+    can be reasons (or lists of reasons) themselves, which are rendered with
+    the same fields. Symbol codes in the arguments are decoded when the reason
+    is rendered.
+    """
+
+    template: str
+    args: Tuple[Tuple[str, object], ...] = ()
+
+
+def reason(template: str, **args) -> Reason:
+    """Create a `Reason` from a template and its arguments."""
+    return Reason(template, tuple(args.items()))
+
+
+def _uses_sample(value) -> bool:
+    # Whether a reason, or one of its nested reasons, names the sample
+    if isinstance(value, Reason):
+        return "{sample}" in value.template or any(
+            _uses_sample(arg) for _, arg in value.args
+        )
+    if isinstance(value, list):
+        return any(_uses_sample(v) for v in value)
+    return False
+
+
+class ChangeLog:
+    """
+    Changes recorded by the graph manipulations.
+
+    A change applies to a set of datasets at once and refers to symbols by
+    their code in the vocabulary of a `hugo_unifier.symbol_table.SymbolTable`.
+    Its reason is kept as a template with arguments and only rendered when the
+    changes are turned into DataFrames, once per distinct text.
+
+    Parameters
+    ----------
+    symbols : np.ndarray, optional
+        Vocabulary that the symbol codes index into. If not given, symbols are
+        recorded as strings.
+    """
+
+    def __init__(self, symbols: Optional[np.ndarray] = None):
+        self.symbols = symbols
+        self.samples: List[Optional[Iterable[str]]] = []
+        self.actions: List[str] = []
+        self.symbol: List[object] = []
+        self.new: List[object] = []
+        self.reasons: List[Reason] = []
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def append(
+        self,
+        samples: Optional[Iterable[str]],
+        action: str,
+        symbol,
+        new,
+        reason: Reason,
+    ) -> None:
+        """
+        Record a change.
+
+        Parameters
+        ----------
+        samples : Set[str], optional
+            Datasets the change applies to, e.g. a
+            `hugo_unifier.panels.PanelSet`. Changes without datasets (None)
+            are kept for inspection, but are not part of any dataset's changes.
+        action : str
+            The action, e.g. 'rename'.
+        symbol
+            Code (or name) of the symbol to change.
+        new
+            Code (or name) of the new symbol, or None.
+        reason : Reason
+            Why the change is made.
+        """
+        if samples is not None and not samples:
+            return
+        self.samples.append(samples)
+        self.actions.append(action)
+        self.symbol.append(symbol)
+        self.new.append(new)
+        self.reasons.append(reason)
+
+    def decode(self, value):
+        """Decode symbol codes (also within tuples, lists and sets) to symbols."""
+        if self.symbols is None or value is None or isinstance(value, str):
+            return value
+        if isinstance(value, (int, np.integer)):
+            return self.symbols[value]
+        if isinstance(value, (tuple, list, set, frozenset)):
+            return type(value)(self.decode(v) for v in value)
+        return value
+
+    def render(self, change: int, sample: Optional[str] = None) -> str:
+        """Render the reason of a change, for one of its datasets."""
+        fields = {
+            "action": self.actions[change],
+            "symbol": self.decode(self.symbol[change]),
+            "new": self.decode(self.new[change]),
+            "sample": sample,
+        }
+        return self._render_arg(self.reasons[change], fields)
+
+    def _render_arg(self, value, fields: Dict[str, object]):
+        if isinstance(value, Reason):
+            template, args = value
+            args = {name: self._render_arg(v, fields) for name, v in args}
+            return template.format(**{**fields, **args})
+        if isinstance(value, list) and value and isinstance(value[0], Reason):
+            # e.g. one reason per successor of a symbol
+            return ", ".join(self._render_arg(v, fields) for v in value)
+        return self.decode(value)
+
+    def rows(self) -> Iterator[Tuple[Optional[str], str, object, object, str]]:
+        """
+        Iterate over the changes of each dataset.
+
+        Yields
+        ------
+        Tuple
+            ``(sample, action, symbol, new, reason)`` with the symbols decoded
+            and the reason rendered. Changes without datasets have the sample
+            None.
+        """
+        for change, samples in enumerate(self.samples):
+            for sample in [None] if samples is None else samples:
+                yield (
+                    sample,
+                    self.actions[change],
+                    self.decode(self.symbol[change]),
+                    self.decode(self.new[change]),
+                    self.render(change, sample),
+                )
+
+    def _dataset_changes(self, datasets: List[str]) -> Dict[str, np.ndarray]:
+        # Changes of PanelSets are collected per panel and shared by its datasets
+        by_panel: Dict[int, array] = {}
+        by_dataset: Dict[str, array] = {}
+        panels = None
+        for change, samples in enumerate(self.samples):
+            if samples is None:
+                continue
+            if isinstance(samples, PanelSet):
+                panels = samples.panels
+                for panel in samples.panel_indices():
+                    by_panel.setdefault(panel, array("q")).append(change)
+            else:
+                for sample in samples:
+                    by_dataset.setdefault(sample, array("q")).append(change)
+
+        changes = {}
+        for dataset in datasets:
+            rows = by_dataset.get(dataset)
+            if rows is None and panels is not None and dataset in panels.index:
+                rows = by_panel.get(panels.index[dataset])
+            changes[dataset] = np.frombuffer(rows or array("q"), dtype=np.int64)
+        return changes
+
+    def _categorical(
+        self, values: List[object], symbols: bool
+    ) -> Tuple[np.ndarray, pd.Index]:
+        # Codes of the values and their sorted categories. Symbol codes are
+        # replaced by their symbols.
+        if self.symbols is None or not symbols:
+            categorical = pd.Categorical(values)
+            return np.asarray(categorical.codes), categorical.categories
+        codes = np.array([-1 if v is None else v for v in values], dtype=np.int64)
+        used = np.unique(codes[codes >= 0])
+        names = self.symbols[used]
+        order = np.argsort(names, kind="stable")
+        # Position of each vocabulary code among the sorted categories
+        position = np.full(len(self.symbols), -1, dtype=np.int64)
+        position[used[order]] = np.arange(len(used))
+        return np.where(codes >= 0, position[codes], -1), pd.Index(names[order])
+
+    def to_frames(self, datasets: Iterable[str]) -> Dict[str, pd.DataFrame]:
+        """
+        Create a DataFrame with the changes of each dataset.
+
+        The columns ``action``, ``symbol``, ``new`` and ``reason`` are
+        categoricals whose categories are shared by the DataFrames of all
+        datasets. Reasons are rendered here, once per distinct text.
+
+        Parameters
+        ----------
+        datasets : Iterable[str]
+            Names of the datasets, in the order of the result.
+
+        Returns
+        -------
+        Dict[str, pd.DataFrame]
+            The changes of each dataset, with the columns ``action``,
+            ``symbol``, ``new`` and ``reason``.
+        """
+        datasets = list(datasets)
+        dataset_changes = self._dataset_changes(datasets)
+
+        columns = {}
+        for column, values, symbols in [
+            ("action", self.actions, False),
+            ("symbol", self.symbol, True),
+            ("new", self.new, True),
+        ]:
+            codes, categories = self._categorical(values, symbols)
+            columns[column] = (codes, pd.CategoricalDtype(categories))
+
+        # Reasons that do not depend on the dataset are rendered once per change
+        texts: Dict[str, int] = {}
+        per_sample = np.array(
+            [_uses_sample(value) for value in self.reasons], dtype=bool
+        )
+        shared = np.full(len(self), -1, dtype=np.int64)
+        for change in np.flatnonzero(~per_sample):
+            shared[change] = texts.setdefault(self.render(change), len(texts))
+
+        reason_codes = {}
+        for dataset, changes in dataset_changes.items():
+            codes = shared[changes]
+            for row in np.flatnonzero(per_sample[changes]):
+                text = self.render(changes[row], dataset)
+                codes[row] = texts.setdefault(text, len(texts))
+            reason_codes[dataset] = codes
+
+        # Sort the reasons like pandas sorts the categories of strings
+        names = np.array(list(texts), dtype=object)
+        order = np.argsort(names, kind="stable")
+        position = np.empty(len(names), dtype=np.int64)
+        position[order] = np.arange(len(names))
+        reason_dtype = pd.CategoricalDtype(pd.Index(names[order]))
+
+        action_codes, action_dtype = columns["action"]
+        n_actions = np.zeros(len(action_dtype.categories), dtype=np.int64)
+        sample_changes = {}
+        for dataset, changes in dataset_changes.items():
+            frame = {
+                column: pd.Categorical.from_codes(codes[changes], dtype=dtype)
+                for column, (codes, dtype) in columns.items()
+            }
+            frame["reason"] = pd.Categorical.from_codes(
+                position[reason_codes[dataset]], dtype=reason_dtype
+            )
+            sample_changes[dataset] = pd.DataFrame(frame, columns=COLUMNS)
+            n_actions += np.bincount(action_codes[changes], minlength=len(n_actions))
+
+        for action, n in zip(action_dtype.categories, n_actions):
+            count(f"changes_{action}", int(n))
+
+        return sample_changes
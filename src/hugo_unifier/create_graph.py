@@ -1,32 +1,85 @@
 import pandas as pd
 import networkx as nx
-from typing import Dict, List
+import numpy as np
+from typing import Dict, List, Optional, Union
 
+from hugo_unifier.panels import Panels, PanelSet
+from hugo_unifier.symbol_table import SymbolTable
 
-def create_graph(df: pd.DataFrame, sample_symbols: Dict[str, List[str]]) -> nx.DiGraph:
+
+def create_graph(
+    df: pd.DataFrame,
+    sample_symbols: Union[Dict[str, List[str]], Panels],
+    table: Optional[SymbolTable] = None,
+) -> nx.DiGraph:
+    """
+    Create the symbol graph from the results of `orchestrated_fetch`.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Results of `orchestrated_fetch`.
+    sample_symbols : Dict[str, List[str]] or Panels
+        Symbols of each sample. The samples of each node are a set of the
+        samples that contain the symbol.
+    table : SymbolTable, optional
+        Required with `Panels`: the symbols in df are then codes into the
+        vocabulary of the table (see ``orchestrated_fetch(table=...)``), the
+        nodes are these codes, and the samples of each node are a `PanelSet`.
+        The vocabulary is stored in ``G.graph["symbols"]``, see `decode_graph`.
+    """
     G = nx.DiGraph()
 
-    for _, row in df.iterrows():
-        G.add_node(row["input"], type="input", samples=set())
-        G.add_node(row["approvedSymbol"], type="approvedSymbol", samples=set())
-        G.add_node(row["original"], type="original", samples=set())
+    # Iterate over the columns rather than rows, which avoids building a Series
+    # per row
+    for input, approved_symbol, original in zip(
+        df["input"], df["approvedSymbol"], df["original"]
+    ):
+        G.add_node(input, type="input")
+        G.add_node(approved_symbol, type="approvedSymbol")
+        G.add_node(original, type="original")
 
-    # For each node, if it does not have the samples attribute, set it to empty
-    for sample, symbols in sample_symbols.items():
-        for symbol in symbols:
-            if symbol not in G.nodes:
-                continue
-            G.nodes[symbol]["samples"].add(sample)
+    if isinstance(sample_symbols, Panels):
+        assert table is not None, "A SymbolTable is required with Panels."
+        nodes = np.fromiter(G.nodes, dtype=np.int64, count=G.number_of_nodes())
+        masks = sample_symbols.symbol_masks(table, nodes)
+        for node, mask in zip(G.nodes, masks):
+            G.nodes[node]["samples"] = PanelSet(mask, sample_symbols)
+        G.graph["symbols"] = table.vocabulary
+    else:
+        for node in G.nodes:
+            G.nodes[node]["samples"] = set()
+        for sample, symbols in sample_symbols.items():
+            for symbol in symbols:
+                if symbol not in G.nodes:
+                    continue
+                G.nodes[symbol]["samples"].add(sample)
 
     for approved_symbol in df["approvedSymbol"].unique():
         # Set type to "approvedSymbol" for all nodes with this symbol
         G.nodes[approved_symbol]["type"] = "approvedSymbol"
 
-    for _, row in df[df["resolution"] != "identity"].iterrows():
-        G.add_edge(row["original"], row["input"], type=row["resolution"])
+    manipulated = df[df["resolution"] != "identity"]
+    for original, input, resolution in zip(
+        manipulated["original"], manipulated["input"], manipulated["resolution"]
+    ):
+        G.add_edge(original, input, type=resolution)
 
     for match_type in df["matchType"].unique():
-        for _, row in df[df["matchType"] == match_type].iterrows():
-            G.add_edge(row["input"], row["approvedSymbol"], type=match_type)
+        matched = df[df["matchType"] == match_type]
+        for input, approved_symbol in zip(matched["input"], matched["approvedSymbol"]):
+            G.add_edge(input, approved_symbol, type=match_type)
 
     return G
+
+
+def decode_graph(G: nx.DiGraph) -> nx.DiGraph:
+    """
+    Replace the symbol codes of a graph built from a `SymbolTable` by the symbols.
+
+    Graphs whose nodes are symbols are returned unchanged.
+    """
+    symbols = G.graph.pop("symbols", None)
+    if symbols is None:
+        return G
+    return nx.relabel_nodes(G, symbols.__getitem__)
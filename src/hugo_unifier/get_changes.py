@@ -1,10 +1,20 @@
-from typing import Dict, List, Tuple, Union, Callable
+from typing import Dict, List, Optional, Tuple, Union, Callable
 import pandas as pd
 import networkx as nx
 
-from hugo_unifier.symbol_manipulations import manipulation_mapping
+from hugo_unifier.hugo_fetch import fetch_symbol_check_results
+from hugo_unifier.id_resolution import default_id_types
+from hugo_unifier.instrumentation import count, span
+from hugo_unifier.result_cache import ResultCache, hash_frame, result_key
+from hugo_unifier.symbol_table import SymbolInput, intern_symbols
+from hugo_unifier.symbol_manipulations import (
+    default_manipulations,
+    manipulation_mapping,
+)
 from hugo_unifier.orchestrated_fetch import orchestrated_fetch
-from hugo_unifier.create_graph import create_graph
+from hugo_unifier.panels import Panels
+from hugo_unifier.change_log import ChangeLog
+from hugo_unifier.create_graph import create_graph, decode_graph
 from hugo_unifier.graph_manipulations import (
     remove_self_edges,
     remove_loose_ends,
@@ -13,18 +23,47 @@ from hugo_unifier.graph_manipulations import (
 
 
 def get_changes(
-    symbols: Dict[str, List[str]],
-    manipulations: List[str] = ["identity", "dot_to_dash", "discard_after_dot"],
+    symbols: SymbolInput,
+    manipulations: List[str] = default_manipulations,
+    resolver: Optional[Callable[[List[str]], pd.DataFrame]] = None,
+    id_table: Optional[pd.DataFrame] = None,
+    id_types: List[str] = default_id_types,
+    cache: Optional[ResultCache] = None,
+    merge: bool = False,
 ) -> Union[List[str], Tuple[List[str], Dict[str, int]]]:
     """
     Unify gene symbols in a list of symbols.
 
     Parameters
     ----------
-    symbols : List[str]
-        List of gene symbols to unify.
+    symbols : Mapping or Iterable[Tuple[str, array-like]]
+        Symbols of each dataset, either as a dictionary from dataset names to
+        symbols or as an iterable (e.g. a generator) of ``(name, symbols)``
+        pairs. Symbols can be lists, NumPy or Arrow string arrays or pandas
+        Indexes. They are interned into a shared vocabulary as they are
+        consumed, see `hugo_unifier.symbol_table.intern_symbols`.
     manipulations : List[str]
-        List of manipulation names to apply.
+        List of manipulation names to apply, in order. See
+        `hugo_unifier.symbol_manipulations.register_manipulation` for adding
+        custom manipulations.
+    resolver : Callable[[List[str]], pd.DataFrame], optional
+        Function that looks up a list of symbols and returns a DataFrame shaped
+        like the result of `fetch_symbol_check_results`, e.g. a
+        `hugo_unifier.hgnc_index.HGNCIndex`. Defaults to the genenames.org API.
+    id_table : pd.DataFrame, optional
+        HGNC cross-references (see `hugo_unifier.id_resolution.load_xref_table`)
+        used to resolve gene IDs like Ensembl gene IDs to approved symbols.
+        Defaults to the cross-references of the resolver, if it provides them.
+    id_types : List[str]
+        Types of gene IDs to recognize, out of 'ensembl', 'hgnc' and 'entrez'.
+    cache : ResultCache, optional
+        Store of previous results. If it contains a result for the same symbols,
+        manipulations, resolver and options, that result is returned without
+        recomputing it.
+    merge : bool
+        Whether datasets that contain both an unapproved symbol and its approved
+        successor get a 'merge' change, which combines the two columns (see
+        `hugo_unifier.apply_changes`), instead of a 'conflict'.
 
     Returns
     -------
@@ -40,35 +79,82 @@ def get_changes(
     selected_manipulations = [
         (name, manipulation_mapping[name]) for name in manipulations
     ]
+    if resolver is None:
+        resolver = fetch_symbol_check_results
+
+    with span("intern_symbols"):
+        symbols = intern_symbols(symbols)
+
+    if cache is not None:
+        with span("result_cache"):
+            key = result_key(
+                symbols,
+                manipulations,
+                resolver,
+                {
+                    "id_table": hash_frame(id_table),
+                    "id_types": list(id_types),
+                    "merge": merge,
+                },
+            )
+            result = cache.get(key)
+        if result is not None:
+            return result
+
+    if id_table is None and hasattr(resolver, "xref_table"):
+        id_table = resolver.xref_table()
 
-    symbol_union = set()
-    for sample_symbols in symbols.values():
-        symbol_union.update(sample_symbols)
-    symbol_union = list(symbol_union)
+    # Datasets with the same features are processed once, as a single panel
+    panels = Panels(symbols)
 
-    # Process the symbols
-    df_hugo = orchestrated_fetch(symbol_union, selected_manipulations)
+    # All interned symbols belong to at least one panel
+    symbol_union = symbols.vocabulary.tolist()
+    count("datasets", len(symbols))
+    count("panels", len(panels))
+    count("unique_symbols", len(symbol_union))
 
-    G = create_graph(df_hugo, symbols)
-    remove_self_edges(G)
-    remove_loose_ends(G)
+    # Process the symbols. Symbols are kept as codes into the vocabulary of the
+    # symbol table until the graph and the changes are returned.
+    with span("fetch", profile=True):
+        df_hugo = orchestrated_fetch(
+            symbol_union,
+            selected_manipulations,
+            resolver,
+            id_table,
+            id_types,
+            table=symbols,
+        )
+    del symbol_union
 
-    graph_manipulations: List[Callable[[nx.DiGraph, pd.DataFrame]]] = [
+    with span("create_graph", profile=True):
+        G = create_graph(df_hugo, panels, symbols)
+        G.graph["merge"] = merge
+    del df_hugo
+    with span("clean_graph"):
+        remove_self_edges(G)
+        remove_loose_ends(G)
+    count("graph_nodes", G.number_of_nodes())
+    count("graph_edges", G.number_of_edges())
+
+    graph_manipulations: List[Callable[[nx.DiGraph, ChangeLog], None]] = [
         resolve_unapproved,
         # aggregate_approved,
     ]
 
-    df_changes = pd.DataFrame(columns=["sample", "action", "symbol", "new", "reason"])
+    changes = ChangeLog(G.graph["symbols"])
 
     for manipulation in graph_manipulations:
         # Apply the manipulation to the graph
-        manipulation(G, df_changes)
-
-    sample_changes = {
-        sample: df_changes[df_changes["sample"] == sample]
-        .copy()
-        .drop(["sample"], axis=1)
-        for sample in symbols.keys()
-    }
+        with span(manipulation.__name__, profile=True):
+            manipulation(G, changes)
+
+    with span("decode_graph"):
+        G = decode_graph(G)
+
+    with span("split_changes"):
+        sample_changes = changes.to_frames(symbols.keys())
+
+    if cache is not None:
+        cache.put(key, (G, sample_changes))
 
     return G, sample_changes
@@ -1,6 +1,61 @@
+import functools
+import warnings
+from typing import Union
+
 import networkx as nx
 import pandas as pd
 
+from hugo_unifier.change_log import ChangeLog, reason
+
+# Graph manipulations record their changes in a ChangeLog. Nodes are symbols,
+# or their codes in G.graph["symbols"], and the samples of a node are a set of
+# dataset names (a PanelSet in graphs built by get_changes).
+
+MULTIPLE_SUCCESSORS = "The unapproved symbol {symbol} is present in {samples} and has multiple connections to approved symbols, and multiple of them are present in samples: {successors}. We cannot decide which one to use."
+SUCCESSOR_SAMPLES = "{successor} ({samples}"
+# Reason of resolve_unapproved for the samples that do not contain both
+# symbols, with one of the causes below
+RESOLVED = "{edge_type}, {action} because {cause}"
+NO_SHARED_SAMPLES = "no sample contains both {symbol} and {new}"
+SHARED_SAMPLES = (
+    "the following samples contain both {symbol} and {new}{merged}: {shared}"
+)
+# Reason of resolve_unapproved for each sample that contains both symbols,
+# with one of the outcomes below
+SAMPLE_RESOLVED = "The sample {sample} contains both {symbol} and {new}, {outcome} {new} has been identified as the most appropriate successor for {symbol} by the resolve_unapproved function."
+SAMPLE_CONFLICT = "while"
+SAMPLE_MERGE = "merging {symbol} into {new} because"
+AGGREGATION_CONFLICT = "The approved symbol {symbol} could increase the overlap by pulling in other symbols ({predecessors}), however at least one of the other symbols ({marked}) would also perform this operation. Two-level aggregation is not currently not supported."
+AGGREGATION = "{symbol} is an approved symbol, but it is also a {edge_type} of {new}. Copying the contents of {symbol} to {new} because this leads to a substantial increase in overlap (> 50%)."
+
+
+def records_changes(manipulation):
+    """
+    Let a graph manipulation also append its changes to a DataFrame.
+
+    Graph manipulations used to append rows to a DataFrame with the columns
+    sample, action, symbol, new and reason. This is deprecated, pass a
+    `hugo_unifier.change_log.ChangeLog` instead.
+    """
+
+    @functools.wraps(manipulation)
+    def wrapper(G: nx.DiGraph, changes: Union[ChangeLog, pd.DataFrame]) -> None:
+        if isinstance(changes, ChangeLog):
+            return manipulation(G, changes)
+
+        warnings.warn(
+            f"Passing a DataFrame to {manipulation.__name__} is deprecated, "
+            "pass a hugo_unifier.change_log.ChangeLog instead.",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        log = ChangeLog(G.graph.get("symbols"))
+        manipulation(G, log)
+        for row in log.rows():
+            changes.loc[len(changes)] = list(row)
+
+    return wrapper
+
 
 def remove_self_edges(G: nx.DiGraph) -> None:
     # Remove all self edges
@@ -14,7 +69,7 @@ def remove_loose_ends(G: nx.DiGraph) -> None:
     for node in G.nodes():
         if G.nodes[node]["type"] != "approvedSymbol":
             continue
-        if len(G.nodes[node]["samples"]) > 0:
+        if G.nodes[node]["samples"]:
             continue
         in_edges = list(G.in_edges(node))
         if len(in_edges) > 1:
@@ -25,7 +80,7 @@ def remove_loose_ends(G: nx.DiGraph) -> None:
         G.remove_edge(source_node, node)
 
 
-def __decide_successor__(G: nx.DiGraph, node: str, df: pd.DataFrame) -> str:
+def __decide_successor__(G: nx.DiGraph, node, changes: ChangeLog):
     successors = list(G.successors(node))
 
     if len(successors) == 1:
@@ -39,66 +94,84 @@ def __decide_successor__(G: nx.DiGraph, node: str, df: pd.DataFrame) -> str:
     nonempty_successors = {
         successor: samples
         for successor, samples in successor_samples.items()
-        if len(samples) > 0
+        if samples
     }
 
     if len(nonempty_successors) == 1:
         return list(nonempty_successors)[0]
     if len(nonempty_successors) > 1:
-        df.loc[len(df)] = [
+        changes.append(
             None,
             "conflict",
             node,
             None,
-            f"The unapproved symbol {node} is present in {node_samples} and has multiple connections to approved symbols, and multiple of them are present in samples: {', '.join([f'{successor} ({samples}' for successor, samples in nonempty_successors.items()])}. We cannot decide which one to use.",
-        ]
+            reason(
+                MULTIPLE_SUCCESSORS,
+                samples=node_samples,
+                successors=[
+                    reason(SUCCESSOR_SAMPLES, successor=successor, samples=samples)
+                    for successor, samples in nonempty_successors.items()
+                ],
+            ),
+        )
     return None
 
 
-def resolve_unapproved(G: nx.DiGraph, df: pd.DataFrame) -> pd.DataFrame:
+@records_changes
+def resolve_unapproved(G: nx.DiGraph, changes: ChangeLog) -> None:
+    # With G.graph["merge"], samples that contain both an unapproved symbol and
+    # its successor merge them instead of reporting a conflict
+    merge = G.graph.get("merge", False)
     for node in list(G.nodes()):
         if G.nodes[node]["type"] == "approvedSymbol":
             continue
 
-        successor = __decide_successor__(G, node, df)
+        successor = __decide_successor__(G, node, changes)
 
         if successor is None:
             continue
 
         node_samples = G.nodes[node]["samples"]
         successor_samples = G.nodes[successor]["samples"]
-        intersection = node_samples.intersection(successor_samples)
+        intersection = node_samples & successor_samples
         node_only = node_samples - intersection
-        has_intersection = len(intersection) > 0
+        has_intersection = bool(intersection)
 
-        edge_type = G[node][successor]["type"]
+        edge_type = G[node][successor]["type"].capitalize().replace("_", " ")
 
-        action = "copy" if has_intersection else "rename"
+        # When the samples with both symbols merge them, no sample keeps node
+        action = "copy" if has_intersection and not merge else "rename"
 
-        for sample in node_only:
-            df.loc[len(df)] = [
-                sample,
-                action,
-                node,
-                successor,
-                f"{edge_type.capitalize().replace('_', ' ')}, {action} because {f'no sample contains both {node} and {successor}' if not has_intersection else f'the following samples contain both {node} and {successor}: {intersection}'}",
-            ]
-
-        for sample in intersection:
-            df.loc[len(df)] = [
-                sample,
-                "conflict",
-                node,
-                successor,
-                f"The sample {sample} contains both {node} and {successor}, while {successor} has been identified as the most appropriate successor for {node} by the resolve_unapproved function.",
-            ]
+        if has_intersection:
+            merged = " and merge them" if merge else ""
+            cause = reason(SHARED_SAMPLES, merged=merged, shared=intersection)
+        else:
+            cause = reason(NO_SHARED_SAMPLES)
+        changes.append(
+            node_only,
+            action,
+            node,
+            successor,
+            reason(RESOLVED, edge_type=edge_type, cause=cause),
+        )
+
+        # The reason of each sample names the sample, so it is rendered per sample
+        outcome = reason(SAMPLE_MERGE if merge else SAMPLE_CONFLICT)
+        changes.append(
+            intersection,
+            "merge" if merge else "conflict",
+            node,
+            successor,
+            reason(SAMPLE_RESOLVED, outcome=outcome),
+        )
 
-        G.nodes[successor]["samples"].update(node_only)
-        if not has_intersection:
+        G.nodes[successor]["samples"] = successor_samples | node_only
+        if not has_intersection or merge:
             G.remove_node(node)
 
 
-def aggregate_approved(G: nx.DiGraph, df: pd.DataFrame) -> pd.DataFrame:
+@records_changes
+def aggregate_approved(G: nx.DiGraph, changes: ChangeLog) -> None:
     marks = []
 
     for node in list(G.nodes()):
@@ -113,10 +186,10 @@ def aggregate_approved(G: nx.DiGraph, df: pd.DataFrame) -> pd.DataFrame:
             predecessor: G.nodes[predecessor]["samples"] for predecessor in predecessors
         }
 
-        union = G.nodes[node]["samples"].copy()
+        union = G.nodes[node]["samples"]
         largest_subset = G.nodes[node]["samples"]
         for samples in predecessor_samples.values():
-            union.update(samples)
+            union = union | samples
             if len(samples) > len(largest_subset):
                 largest_subset = samples
 
@@ -133,23 +206,28 @@ def aggregate_approved(G: nx.DiGraph, df: pd.DataFrame) -> pd.DataFrame:
         predecessors = list(G.predecessors(mark))
         intersection = set(predecessors).intersection(marks)
         if len(intersection) > 0:
-            df.loc[len(df)] = [
+            changes.append(
                 None,
                 "conflict",
                 mark,
                 None,
-                f"The approved symbol {mark} could increase the overlap by pulling in other symbols ({predecessors}), however at least one of the other symbols ({intersection}) would also perform this operation. Two-level aggregation is not currently not supported.",
-            ]
+                reason(
+                    AGGREGATION_CONFLICT,
+                    predecessors=predecessors,
+                    marked=intersection,
+                ),
+            )
 
         for predecessor in predecessors:
-            G.nodes[node]["samples"].update(G.nodes[predecessor]["samples"])
+            G.nodes[node]["samples"] = (
+                G.nodes[node]["samples"] | G.nodes[predecessor]["samples"]
+            )
             edge_type = G[predecessor][mark]["type"]
 
-            for sample in G.nodes[predecessor]["samples"]:
-                df.loc[len(df)] = [
-                    sample,
-                    "copy",
-                    predecessor,
-                    mark,
-                    f"{predecessor} is an approved symbol, but it is also a {edge_type} of {mark}. Copying the contents of {predecessor} to {mark} because this leads to a substantial increase in overlap (> 50%).",
-                ]
+            changes.append(
+                G.nodes[predecessor]["samples"],
+                "copy",
+                predecessor,
+                mark,
+                reason(AGGREGATION, edge_type=edge_type),
+            )
@@ -0,0 +1,336 @@
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from hugo_unifier.instrumentation import count
+
+MAGIC = b"HUGOIDX\0"
+FORMAT_VERSION = 2
+ALIGNMENT = 8
+
+# Match types in order of priority. Like the symbol checker, a query only
+# returns the matches of the best match type found for it.
+MATCH_TYPES = ["Approved symbol", "Previous symbol", "Alias symbol"]
+
+
+def _split_multivalue(value) -> List[str]:
+    if not isinstance(value, str) or not value:
+        return []
+    return [v.strip() for v in value.strip('"').split("|") if v.strip()]
+
+
+def _prefixes(encoded: List[bytes]) -> np.ndarray:
+    # The first 8 bytes of each string as a big-endian integer. These are
+    # ordered like the strings themselves, so a batch of queries can be
+    # narrowed down with a single vectorized searchsorted.
+    padded = b"".join(b[:8].ljust(8, b"\0") for b in encoded)
+    return np.frombuffer(padded, dtype=">u8").astype("<u8")
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def compile_hgnc_index(
+    source: str, output: str, release: Optional[str] = None
+) -> Dict[str, object]:
+    """
+    Compile an HGNC release into a compact binary index.
+
+    Parameters
+    ----------
+    source : str
+        Path to an HGNC complete set TSV (e.g. ``hgnc_complete_set.txt``), with at
+        least the columns 'hgnc_id', 'symbol', 'location', 'alias_symbol' and
+        'prev_symbol'. Multiple values are separated by '|'. The cross-reference
+        columns 'ensembl_gene_id' and 'entrez_id' are stored if present.
+    output : str
+        Path to write the index to.
+    release : str, optional
+        Name of the HGNC release, stored in the index metadata. Defaults to the
+        modification date of the source file.
+
+    Returns
+    -------
+    Dict[str, object]
+        The metadata stored in the index.
+    """
+    df = pd.read_csv(source, sep="\t", dtype=str, keep_default_na=False)
+    if "status" in df.columns:
+        df = df[df["status"].isin(["Approved", ""])]
+    df = df.reset_index(drop=True)
+
+    # Collect the best match type per (query key, gene)
+    best: Dict[str, Dict[int, int]] = {}
+    columns = [("symbol", 0), ("prev_symbol", 1), ("alias_symbol", 2)]
+    for column, match_type in columns:
+        if column not in df.columns:
+            continue
+        for gene, value in enumerate(df[column]):
+            for symbol in _split_multivalue(value):
+                genes = best.setdefault(symbol.upper(), {})
+                genes[gene] = min(genes.get(gene, match_type), match_type)
+
+    records = []
+    for key, genes in best.items():
+        best_type = min(genes.values())
+        records.extend(
+            (key, best_type, gene) for gene, t in genes.items() if t == best_type
+        )
+
+    def column(name):
+        return df[name].tolist() if name in df.columns else [""] * len(df)
+
+    gene_symbols = column("symbol")
+    gene_locations = column("location")
+    gene_hgnc_ids = column("hgnc_id")
+    gene_ensembl_ids = column("ensembl_gene_id")
+    gene_entrez_ids = column("entrez_id")
+
+    strings = sorted(
+        set(best)
+        | set(gene_symbols)
+        | set(gene_locations)
+        | set(gene_hgnc_ids)
+        | set(gene_ensembl_ids)
+        | set(gene_entrez_ids)
+    )
+    string_ids = {s: i for i, s in enumerate(strings)}
+    encoded = [s.encode("utf-8") for s in strings]
+    string_offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    np.cumsum([len(b) for b in encoded], out=string_offsets[1:])
+
+    records.sort(key=lambda r: (string_ids[r[0]], r[1], gene_symbols[r[2]]))
+
+    sections = {
+        "string_offsets": string_offsets,
+        "string_data": np.frombuffer(b"".join(encoded), dtype="u1"),
+        "string_prefix": _prefixes(encoded),
+        "record_key": np.array([string_ids[r[0]] for r in records], dtype="<u4"),
+        "record_type": np.array([r[1] for r in records], dtype="u1"),
+        "record_gene": np.array([r[2] for r in records], dtype="<u4"),
+        "gene_symbol": np.array([string_ids[s] for s in gene_symbols], dtype="<u4"),
+        "gene_location": np.array([string_ids[s] for s in gene_locations], dtype="<u4"),
+        "gene_hgnc_id": np.array([string_ids[s] for s in gene_hgnc_ids], dtype="<u4"),
+        "gene_ensembl_id": np.array(
+            [string_ids[s] for s in gene_ensembl_ids], dtype="<u4"
+        ),
+        "gene_entrez_id": np.array(
+            [string_ids[s] for s in gene_entrez_ids], dtype="<u4"
+        ),
+    }
+
+    metadata = {
+        "release": release
+        or datetime.fromtimestamp(os.path.getmtime(source), timezone.utc)
+        .date()
+        .isoformat(),
+        "source": os.path.basename(source),
+        "source_sha256": _sha256(source),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "genes": len(df),
+        "records": len(records),
+        "strings": len(strings),
+    }
+
+    header = {"format_version": FORMAT_VERSION, "metadata": metadata, "sections": {}}
+    offset = 0
+    for name, array in sections.items():
+        header["sections"][name] = {
+            "offset": offset,
+            "dtype": array.dtype.str,
+            "length": len(array),
+        }
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    with open(output, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (-f.tell() % ALIGNMENT))
+        for array in sections.values():
+            f.write(array.tobytes())
+            f.write(b"\0" * (-array.nbytes % ALIGNMENT))
+
+    return metadata
+
+
+class HGNCIndex:
+    """
+    Read-only, memory-mapped view of an index created by `compile_hgnc_index`.
+
+    Lookups read directly from the mapped file, so all processes on a node that
+    open the same index share its pages. Instances can be pickled (e.g. to send
+    them to worker processes), in which case the file is mapped again on load.
+
+    Calling the index with a list of symbols returns a DataFrame shaped like the
+    result of `hugo_unifier.hugo_fetch.fetch_symbol_check_results`, so it can be
+    used as the ``resolver`` of `hugo_unifier.get_changes`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._open()
+
+    def _open(self):
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        assert (
+            self._mmap[: len(MAGIC)] == MAGIC
+        ), f"{self.path} is not a hugo-unifier HGNC index."
+        (header_length,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        header = json.loads(self._mmap[header_start : header_start + header_length])
+        assert (
+            header["format_version"] == FORMAT_VERSION
+        ), f"Unsupported index format version {header['format_version']}."
+
+        data_start = header_start + header_length
+        data_start += -data_start % ALIGNMENT
+
+        self.metadata = header["metadata"]
+        self._arrays = {
+            name: np.frombuffer(
+                self._mmap,
+                dtype=section["dtype"],
+                count=section["length"],
+                offset=data_start + section["offset"],
+            )
+            for name, section in header["sections"].items()
+        }
+        self._offsets = self._arrays["string_offsets"]
+        self._data_start = data_start + header["sections"]["string_data"]["offset"]
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self._open()
+
+    def close(self):
+        """Unmap the index file."""
+        self._arrays = {}
+        self._offsets = None
+        self._mmap.close()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        start = self._data_start + int(self._offsets[i])
+        end = self._data_start + int(self._offsets[i + 1])
+        return self._mmap[start:end]
+
+    def string(self, i: int) -> str:
+        """Return the string with id ``i`` from the string table."""
+        return self[i].decode("utf-8")
+
+    def find(self, strings: List[str]) -> np.ndarray:
+        """
+        Return the ids of ``strings`` in the string table, or -1 if not present.
+        """
+        encoded = [string.encode("utf-8") for string in strings]
+        prefixes = _prefixes(encoded)
+        string_prefix = self._arrays["string_prefix"]
+        lows = np.searchsorted(string_prefix, prefixes, side="left").tolist()
+        highs = np.searchsorted(string_prefix, prefixes, side="right").tolist()
+
+        ids = np.full(len(encoded), -1, dtype=np.int64)
+        for n, (key, low, high) in enumerate(zip(encoded, lows, highs)):
+            i = bisect.bisect_left(self, key, low, high)
+            if i < high and self[i] == key:
+                ids[n] = i
+        return ids
+
+    def lookup(self, symbols: List[str]) -> pd.DataFrame:
+        """
+        Look up symbols case-insensitively.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame with the columns 'input', 'matchType', 'approvedSymbol',
+            'location' and 'hgncId'. Symbols without a match get a single row with
+            the match type 'Unmatched'.
+        """
+        record_key = self._arrays["record_key"]
+        unique_symbols = list(dict.fromkeys(symbols))
+
+        keys = self.find([symbol.upper() for symbol in unique_symbols])
+        starts = np.searchsorted(record_key, keys, side="left")
+        ends = np.searchsorted(record_key, keys, side="right")
+        ends[keys < 0] = starts[keys < 0]
+
+        records = np.concatenate(
+            [np.arange(start, end) for start, end in zip(starts, ends)] or [[]]
+        ).astype(np.int64)
+        genes = self._arrays["record_gene"][records]
+        decoded = {}
+
+        def column(name):
+            ids = self._arrays[name][genes].tolist()
+            for i in ids:
+                if i not in decoded:
+                    decoded[i] = self.string(i)
+            return [decoded[i] for i in ids]
+
+        matched = pd.DataFrame(
+            {
+                "input": np.repeat(
+                    np.array(unique_symbols, dtype=object), ends - starts
+                ),
+                "matchType": np.array(MATCH_TYPES, dtype=object)[
+                    self._arrays["record_type"][records]
+                ],
+                "approvedSymbol": column("gene_symbol"),
+                "location": column("gene_location"),
+                "hgncId": column("gene_hgnc_id"),
+            }
+        )
+        unmatched = pd.DataFrame(
+            {
+                "input": [s for s, k in zip(unique_symbols, keys) if k < 0],
+                "matchType": "Unmatched",
+            },
+            columns=matched.columns,
+        )
+
+        count("index_lookups", len(unique_symbols))
+        return pd.concat([matched, unmatched], ignore_index=True)
+
+    def xref_table(self) -> pd.DataFrame:
+        """
+        Return the cross-references of all genes, see
+        `hugo_unifier.id_resolution.load_xref_table`.
+        """
+        columns = {
+            "approvedSymbol": "gene_symbol",
+            "location": "gene_location",
+            "hgncId": "gene_hgnc_id",
+            "ensemblGeneId": "gene_ensembl_id",
+            "entrezId": "gene_entrez_id",
+        }
+        return pd.DataFrame(
+            {
+                column: [self.string(i) for i in self._arrays[array].tolist()]
+                for column, array in columns.items()
+            }
+        )
+
+    def __call__(self, symbols: List[str]) -> pd.DataFrame:
+        return self.lookup(symbols)
@@ -1,15 +1,21 @@
 import requests
 import pandas as pd
-from typing import List
+from typing import List, Optional
+
+from hugo_unifier.instrumentation import count
 
 
 # Assume fetch_symbol_check_results remains the same as provided
-def fetch_symbol_check_results(symbols: List[str]) -> pd.DataFrame:
+def fetch_symbol_check_results(
+    symbols: List[str], session: Optional[requests.Session] = None
+) -> pd.DataFrame:
     """
     Fetch symbol check results from the genenames.org API.
 
     Args:
         symbols (List[str]): List of gene symbols to check.
+        session (requests.Session, optional): Session to send the request with,
+                    so that connections are reused across calls.
 
     Returns:
         pd.DataFrame: DataFrame containing the API response. Includes columns
@@ -27,6 +33,8 @@ def fetch_symbol_check_results(symbols: List[str]) -> pd.DataFrame:
 
     assert all(isinstance(symbol, str) and symbol for symbol in symbols)
 
+    unique_symbols = set(symbols)
+
     url = "https://www.genenames.org/cgi-bin/tools/symbol-check"
     # Ensure data payload is correctly structured for the POST request
     data = [
@@ -37,15 +45,17 @@ def fetch_symbol_check_results(symbols: List[str]) -> pd.DataFrame:
             "json",
         ),  # Changed output to json for easier parsing with pd.DataFrame
         *[
-            ("queries[]", symbol) for symbol in set(symbols)
+            ("queries[]", symbol) for symbol in unique_symbols
         ],  # Use set to avoid duplicates
         ("synonyms", "true"),
         ("unmatched", "true"),  # Include symbols that didn't match anything
         ("withdrawn", "true"),
         ("previous", "true"),
     ]
+    count("http_requests")
+    count("symbols_queried", len(unique_symbols))
     try:
-        response = requests.post(url, data=data)
+        response = (session or requests).post(url, data=data)
         response.raise_for_status()  # Raises HTTPError for bad responses (4XX or 5XX)
         # It seems the API returns JSON directly, suitable for pd.DataFrame
         # Handle potential empty response or non-JSON response
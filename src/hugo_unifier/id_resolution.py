@@ -0,0 +1,141 @@
+from typing import Dict, List
+
+import pandas as pd
+
+from hugo_unifier.instrumentation import count
+
+# Recognized gene ID types: the pattern of an ID in the input data (optionally
+# versioned), the xref column it is joined on and the resulting match type.
+id_patterns: Dict[str, str] = {
+    "ensembl": r"^(ENSG\d{11})(?:\.\d+)?$",
+    "hgnc": r"^(HGNC:\d+)$",
+    "entrez": r"^(\d+)$",
+}
+
+id_columns: Dict[str, str] = {
+    "ensembl": "ensemblGeneId",
+    "hgnc": "hgncId",
+    "entrez": "entrezId",
+}
+
+id_match_types: Dict[str, str] = {
+    "ensembl": "Ensembl gene ID",
+    "hgnc": "HGNC ID",
+    "entrez": "Entrez ID",
+}
+
+# Plain numbers are only treated as Entrez IDs on request, as many datasets use
+# integer positions as their var index.
+default_id_types: List[str] = ["ensembl", "hgnc"]
+
+
+def load_xref_table(source: str) -> pd.DataFrame:
+    """
+    Load the HGNC cross-references used to resolve gene IDs.
+
+    Parameters
+    ----------
+    source : str
+        Path to an HGNC complete set TSV (hgnc_complete_set.txt).
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with the columns 'approvedSymbol', 'location', 'hgncId',
+        'ensemblGeneId' and 'entrezId', one row per approved gene.
+    """
+    df = pd.read_csv(source, sep="\t", dtype=str, keep_default_na=False)
+    if "status" in df.columns:
+        df = df[df["status"].isin(["Approved", ""])]
+
+    columns = {
+        "symbol": "approvedSymbol",
+        "location": "location",
+        "hgnc_id": "hgncId",
+        "ensembl_gene_id": "ensemblGeneId",
+        "entrez_id": "entrezId",
+    }
+    return (
+        df.reindex(columns=list(columns), fill_value="")
+        .rename(columns=columns)
+        .reset_index(drop=True)
+    )
+
+
+def detect_ids(symbols: pd.Series, id_types: List[str]) -> pd.DataFrame:
+    """
+    Find the symbols that are gene IDs of one of the given types.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with the columns 'original', 'id' (the ID without version)
+        and 'idType', for all symbols that are IDs.
+    """
+    for id_type in id_types:
+        assert (
+            id_type in id_patterns
+        ), f"ID type {id_type} is not valid. Choose from {list(id_patterns)}."
+
+    symbols = pd.Series(pd.unique(symbols), dtype=object)
+    detected = [pd.DataFrame(columns=["original", "id", "idType"])]
+    for id_type in id_types:
+        extracted = symbols.str.extract(id_patterns[id_type], expand=False)
+        matched = extracted.notna()
+        detected.append(
+            pd.DataFrame(
+                {
+                    "original": symbols[matched].to_numpy(),
+                    "id": extracted[matched].to_numpy(),
+                    "idType": id_type,
+                }
+            )
+        )
+        symbols = symbols[~matched]
+
+    return pd.concat(detected, ignore_index=True)
+
+
+def resolve_ids(df_ids: pd.DataFrame, xref: pd.DataFrame) -> pd.DataFrame:
+    """
+    Resolve detected IDs to approved symbols with a join on the xref table.
+
+    Parameters
+    ----------
+    df_ids : pd.DataFrame
+        Result of `detect_ids`.
+    xref : pd.DataFrame
+        Result of `load_xref_table` or `HGNCIndex.xref_table`.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame in the format of `orchestrated_fetch`, with the resolution set
+        to '<idType>_id' and the match type to e.g. 'Ensembl gene ID'. The input
+        is the ID as given, so that it is directly connected to the approved
+        symbol in the graph.
+    """
+    xref_long = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "idType": id_type,
+                    "id": xref[column],
+                    "approvedSymbol": xref["approvedSymbol"],
+                    "location": xref["location"],
+                }
+            )
+            for id_type, column in id_columns.items()
+        ],
+        ignore_index=True,
+    )
+    xref_long = xref_long[xref_long["id"] != ""]
+
+    df = df_ids.merge(xref_long, how="inner", on=["idType", "id"])
+    df["input"] = df["original"]
+    df["matchType"] = df["idType"].map(id_match_types)
+    df["resolution"] = df["idType"] + "_id"
+
+    count("ids_detected", len(df_ids))
+    count("ids_resolved", df["original"].nunique())
+    return df.drop(columns=["idType", "id"])
@@ -0,0 +1,154 @@
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+_active_report: ContextVar[Optional["RunReport"]] = ContextVar(
+    "hugo_unifier_active_report", default=None
+)
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Return the peak resident set size of the current process in bytes.
+
+    Returns None on platforms without the resource module.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RunReport:
+    """
+    Collects timed spans and counters for a single hugo-unifier run.
+
+    Parameters
+    ----------
+    profile_dir : str, optional
+        If given, spans marked as hot are additionally run under cProfile and
+        their statistics are dumped to ``<profile_dir>/<span path>.prof``.
+    """
+
+    def __init__(self, profile_dir: Optional[str] = None):
+        self.profile_dir = profile_dir
+        self.spans: List[Dict] = []
+        self.counters: Dict[str, float] = {}
+        self.metadata: Dict[str, object] = {}
+        self._stack: List[str] = []
+        self._profiling = False
+        self._start = time.perf_counter()
+
+    def count(self, name: str, value: float = 1) -> None:
+        """Increase the counter ``name`` by ``value``."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def span(self, name: str, profile: bool = False):
+        """
+        Time the enclosed block and record it as a (possibly nested) span.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage. Nested spans are recorded as ``parent/child``.
+        profile : bool
+            Whether this is a hot stage that should be run under cProfile
+            when the report has a ``profile_dir``.
+        """
+        self._stack.append(name)
+        path = "/".join(self._stack)
+
+        profiler = None
+        if profile and self.profile_dir is not None and not self._profiling:
+            profiler = cProfile.Profile()
+            self._profiling = True
+            profiler.enable()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profiler.dump_stats(
+                    os.path.join(self.profile_dir, f"{path.replace('/', '.')}.prof")
+                )
+            self._stack.pop()
+            self.spans.append(
+                {
+                    "name": path,
+                    "start": round(start - self._start, 6),
+                    "seconds": round(seconds, 6),
+                    "peak_rss_bytes": peak_rss_bytes(),
+                }
+            )
+
+    def to_dict(self) -> Dict:
+        """Return the report as a JSON-serializable dictionary."""
+        return {
+            **self.metadata,
+            "total_seconds": round(time.perf_counter() - self._start, 6),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "spans": sorted(self.spans, key=lambda span: span["start"]),
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def write(self, path: str) -> None:
+        """Write the report as JSON to ``path``."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+@contextmanager
+def activate(report: Optional[RunReport]):
+    """
+    Make ``report`` the target of all `span` and `count` calls in this context.
+    """
+    token = _active_report.set(report)
+    try:
+        yield report
+    finally:
+        _active_report.reset(token)
+
+
+def active_report() -> Optional[RunReport]:
+    """Return the currently active report, if any."""
+    return _active_report.get()
+
+
+@contextmanager
+def span(name: str, profile: bool = False):
+    """
+    Record a timed span on the active report. A no-op if no report is active.
+    """
+    report = _active_report.get()
+    if report is None:
+        yield
+        return
+    with report.span(name, profile=profile):
+        yield
+
+
+def count(name: str, value: float = 1) -> None:
+    """
+    Increase a counter on the active report. A no-op if no report is active.
+    """
+    report = _active_report.get()
+    if report is not None:
+        report.count(name, value)
@@ -1,11 +1,141 @@
 import rich_click as click
 from importlib.metadata import version
-import anndata as ad
 import os
-import pandas as pd
 from pathlib import Path
 
-from hugo_unifier import get_changes, apply_changes
+# Heavy dependencies (anndata, pandas, networkx) are imported inside the
+# commands that need them, to keep startup fast for --help and --version.
+from hugo_unifier.instrumentation import (
+    RunReport,
+    activate,
+    active_report,
+    count,
+    span,
+)
+
+
+def profile_options(f):
+    """Add the shared --profile and --cprofile-dir options to a command."""
+    f = click.option(
+        "--cprofile-dir",
+        type=click.Path(file_okay=False, writable=True),
+        default=None,
+        help="Directory to dump cProfile statistics of the hot stages into.",
+    )(f)
+    f = click.option(
+        "--profile",
+        type=click.Path(dir_okay=False, writable=True),
+        default=None,
+        help="Path to write a JSON run report with per-stage timings and counters.",
+    )(f)
+    return f
+
+
+def unifier_options(f):
+    """Add the options configuring symbol resolution shared by get and serve."""
+    f = click.option(
+        "--merge",
+        is_flag=True,
+        default=False,
+        help="Merge an unapproved symbol into its approved successor in datasets that contain both, instead of reporting a conflict. See apply --merge-method.",
+    )(f)
+    f = click.option(
+        "--cache-max-size",
+        type=int,
+        default=1024,
+        show_default=True,
+        help="Maximum size of the cache directory in MB. Least recently used results are evicted first.",
+    )(f)
+    f = click.option(
+        "--cache-dir",
+        type=click.Path(file_okay=False, writable=True),
+        default=None,
+        help="Directory to memoize results in. Reruns on unchanged inputs and options are served from it.",
+    )(f)
+    f = click.option(
+        "--id-type",
+        type=click.Choice(["ensembl", "hgnc", "entrez"]),
+        multiple=True,
+        help="Types of gene IDs to resolve. Can be given multiple times. Defaults to ensembl and hgnc.",
+    )(f)
+    f = click.option(
+        "--id-table",
+        type=click.Path(exists=True, dir_okay=False),
+        default=None,
+        help="HGNC complete set TSV used to resolve gene IDs (e.g. Ensembl) to symbols. Not needed with --hgnc-index.",
+    )(f)
+    f = click.option(
+        "--hgnc-index",
+        type=click.Path(exists=True, dir_okay=False),
+        default=None,
+        help="Resolve symbols against a local HGNC index (see compile-index) instead of the genenames.org API.",
+    )(f)
+    f = click.option(
+        "--manipulation-config",
+        type=click.Path(exists=True, dir_okay=False),
+        default=None,
+        help="JSON file defining additional regular expression manipulations. Unless --manipulation is given, they are tried after the default ones.",
+    )(f)
+    f = click.option(
+        "--manipulation",
+        "-m",
+        type=str,
+        multiple=True,
+        help="Name of a symbol manipulation to try, in order. Can be given multiple times. Defaults to identity, dot_to_dash and discard_after_dot.",
+    )(f)
+    return f
+
+
+def output_options(f):
+    """Add the options configuring how .h5ad and zarr outputs are written."""
+    f = click.option(
+        "--threads",
+        type=int,
+        default=None,
+        help="Number of threads compressing and writing chunks. Defaults to the number of processors.",
+    )(f)
+    f = click.option(
+        "--chunks",
+        type=str,
+        default=None,
+        callback=parse_chunks,
+        help="Chunk shape of X and the layers as 'rows,columns', e.g. '1024,2000'. Defaults to whole-row chunks of about 1 MiB.",
+    )(f)
+    f = click.option(
+        "--compression-level",
+        type=int,
+        default=None,
+        help="Compression level of gzip (0-9) or blosc (0-9).",
+    )(f)
+    f = click.option(
+        "--compression",
+        type=click.Choice(["gzip", "lzf", "blosc"]),
+        default=None,
+        help="Compression of the output. lzf is only available for h5ad, blosc for h5ad requires hdf5plugin.",
+    )(f)
+    return f
+
+
+def parse_chunks(ctx, param, value):
+    """Parse the --chunks option into a tuple of integers."""
+    if value is None:
+        return None
+    try:
+        return tuple(int(c) for c in value.split(","))
+    except ValueError:
+        raise click.BadParameter(
+            "Chunks must be comma-separated integers, e.g. '1024,2000'."
+        )
+
+
+def make_report(command, profile, cprofile_dir):
+    """Create a run report if profiling was requested on the command line."""
+    if profile is None and cprofile_dir is None:
+        return None
+    report = RunReport(profile_dir=cprofile_dir)
+    report.metadata["command"] = command
+    report.metadata["version"] = version("hugo-unifier")
+    return report
 
 
 @click.group()
@@ -31,14 +161,95 @@ def cli():
     required=True,
     help="Path to the output directory for change DataFrames.",
 )
-def get(input, outdir):
+@unifier_options
+@click.option(
+    "--server",
+    type=str,
+    default=None,
+    help="Address of a running `hugo-unifier serve` (host:port or unix:/path/to/socket) to delegate the work to. Its configuration is used instead of the options above.",
+)
+@profile_options
+def get(
+    input,
+    outdir,
+    manipulation,
+    manipulation_config,
+    hgnc_index,
+    id_table,
+    id_type,
+    cache_dir,
+    cache_max_size,
+    merge,
+    server,
+    profile,
+    cprofile_dir,
+):
     """Get changes for the input .h5ad files."""
 
-    # Create output directory if it doesn't exist
-    os.makedirs(outdir, exist_ok=True)
+    if server is not None:
+        if (
+            manipulation
+            or manipulation_config
+            or hgnc_index
+            or id_table
+            or id_type
+            or cache_dir
+            or merge
+        ):
+            raise click.UsageError(
+                "Options configuring the resolution cannot be combined with --server."
+            )
+        report = make_report("get", profile, cprofile_dir)
+        with activate(report):
+            _get_from_server(input, outdir, server)
+        if profile is not None:
+            report.write(profile)
+        return
+
+    manipulations = select_manipulations(manipulation, manipulation_config)
+
+    report = make_report("get", profile, cprofile_dir)
+    with activate(report):
+        _get(
+            input,
+            outdir,
+            manipulations,
+            hgnc_index,
+            id_table,
+            id_type,
+            cache_dir,
+            cache_max_size,
+            merge,
+        )
+    if profile is not None:
+        report.write(profile)
+
+
+def select_manipulations(manipulation, manipulation_config):
+    """Resolve the --manipulation and --manipulation-config options to a list of names."""
+    from hugo_unifier.symbol_manipulations import (
+        default_manipulations,
+        load_manipulations,
+        manipulation_mapping,
+    )
 
-    # Build a dictionary from file names and adata.var.index
-    symbols_dict = {}
+    manipulations = list(manipulation) or list(default_manipulations)
+    if manipulation_config is not None:
+        configured = load_manipulations(manipulation_config, overwrite=True)
+        if not manipulation:
+            manipulations.extend(configured)
+
+    for name in manipulations:
+        if name not in manipulation_mapping:
+            raise click.BadParameter(
+                f"Manipulation {name} is not valid. Choose from {list(manipulation_mapping)}."
+            )
+    return manipulations
+
+
+def parse_inputs(input):
+    """Validate the --input options and return the paths by dataset name."""
+    datasets = {}
     for item in input:
         if ":" in item:
             dataset_name, file_path = item.split(":", 1)
@@ -53,21 +264,153 @@ def get(input, outdir):
         if not file_path.endswith(".h5ad"):
             raise click.BadParameter(f"File {file_path} must have a .h5ad suffix.")
 
-        if dataset_name in symbols_dict:
+        if dataset_name in datasets:
             raise click.BadParameter(
                 f"Dataset name {dataset_name} is duplicated in the input."
             )
+        datasets[dataset_name] = file_path
+    return datasets
+
 
-        adata = ad.read_h5ad(file_path, backed="r")
-        symbols_dict[dataset_name] = adata.var.index.tolist()
+def resolution_config(
+    manipulations,
+    hgnc_index,
+    id_table,
+    id_types,
+    cache_dir,
+    cache_max_size,
+    merge=False,
+):
+    """Build the keyword arguments of get_changes from the resolution options."""
+    from hugo_unifier.hgnc_index import HGNCIndex
+    from hugo_unifier.id_resolution import default_id_types, load_xref_table
+    from hugo_unifier.result_cache import ResultCache
+
+    cache = None
+    if cache_dir is not None:
+        cache = ResultCache(cache_dir, max_bytes=cache_max_size * 1024 * 1024)
+
+    if id_table is not None:
+        id_table = load_xref_table(id_table)
+    id_types = list(id_types) or default_id_types
+
+    resolver = None
+    if hgnc_index is not None:
+        resolver = HGNCIndex(hgnc_index)
+        report = active_report()
+        if report is not None:
+            report.metadata["hgnc_release"] = resolver.metadata["release"]
+
+    return {
+        "manipulations": manipulations,
+        "resolver": resolver,
+        "id_table": id_table,
+        "id_types": id_types,
+        "cache": cache,
+        "merge": merge,
+    }
+
+
+def _get(
+    input,
+    outdir,
+    manipulations,
+    hgnc_index,
+    id_table,
+    id_types,
+    cache_dir,
+    cache_max_size,
+    merge,
+):
+    from hugo_unifier import get_changes
+    from hugo_unifier.symbol_table import read_h5ad_symbols
+
+    config = resolution_config(
+        manipulations,
+        hgnc_index,
+        id_table,
+        id_types,
+        cache_dir,
+        cache_max_size,
+        merge,
+    )
+
+    # Validate all inputs before reading any of them
+    datasets = parse_inputs(input)
+
+    # Create output directory if it doesn't exist
+    os.makedirs(outdir, exist_ok=True)
 
     # Process the symbols using get_changes
-    _, sample_changes = get_changes(symbols_dict)
+    with span("get_changes"):
+        # The var index of one file at a time is streamed into get_changes
+        _, sample_changes = get_changes(read_h5ad_symbols(datasets), **config)
+
+    write_changes(sample_changes, outdir)
+
+
+def write_changes(sample_changes, outdir):
+    """Save the change DataFrames into the output directory."""
+    with span("write_changes"):
+        for dataset_name, df_changes in sample_changes.items():
+            output_file = os.path.join(outdir, f"{dataset_name}.csv")
+            df_changes.to_csv(output_file, index=False)
+            count("change_files_written")
+
+
+def _get_from_server(input, outdir, server):
+    import csv
+
+    from hugo_unifier.server import request_changes
+
+    datasets = parse_inputs(input)
+    os.makedirs(outdir, exist_ok=True)
+
+    with span("request_server"):
+        try:
+            columns, changes = request_changes(server, datasets)
+        except (OSError, RuntimeError) as e:
+            raise click.ClickException(f"Request to {server} failed: {e}")
+
+    # Written like DataFrame.to_csv, without importing pandas
+    with span("write_changes"):
+        for dataset_name, rows in changes.items():
+            output_file = os.path.join(outdir, f"{dataset_name}.csv")
+            with open(output_file, "w", newline="") as f:
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(columns)
+                writer.writerows(rows)
+            count("change_files_written")
+
+
+def read_checked_changes(input, changes):
+    """
+    Read a changes CSV file and check it against the var index of the input,
+    before the whole input is read. Reports the conflicts that are skipped.
+    """
+    import pandas as pd
+
+    from hugo_unifier.symbol_table import read_var_names
+    from hugo_unifier.validate import validate_changes
+
+    df_changes = pd.read_csv(changes)
+    count("changes", len(df_changes))
 
-    # Save the change DataFrames into the output directory
-    for dataset_name, df_changes in sample_changes.items():
-        output_file = os.path.join(outdir, f"{dataset_name}.csv")
-        df_changes.to_csv(output_file, index=False)
+    with span("validate"):
+        problems = validate_changes(read_var_names(input), df_changes)
+    errors = problems[problems["severity"] == "error"]
+    if len(errors) > 0:
+        raise click.ClickException(
+            f"The changes cannot be applied to {input}:\n"
+            + "\n".join(errors["message"])
+        )
+
+    conflicts = int((df_changes["action"] == "conflict").sum())
+    if conflicts > 0:
+        click.echo(
+            f"Skipping {conflicts} conflicts in {changes}, their symbols are left unchanged."
+        )
+    return df_changes
 
 
 @cli.command()
@@ -90,24 +433,532 @@ def get(input, outdir):
     "-o",
     type=click.Path(writable=True),
     required=True,
-    help="Path to save the updated .h5ad file.",
+    help="Path to save the updated .h5ad file or zarr store.",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["h5ad", "zarr"]),
+    default=None,
+    help="Output format. Defaults to zarr for outputs ending with .zarr and to h5ad otherwise.",
 )
-def apply(input, changes, output):
+@click.option(
+    "--merge-method",
+    type=click.Choice(["sum", "max"]),
+    default="sum",
+    show_default=True,
+    help="How the columns of merged symbols are combined.",
+)
+@output_options
+@profile_options
+def apply(
+    input,
+    changes,
+    output,
+    output_format,
+    merge_method,
+    compression,
+    compression_level,
+    chunks,
+    threads,
+    profile,
+    cprofile_dir,
+):
     """Apply changes to the input .h5ad file."""
 
     # Validate the input file
     if not input.endswith(".h5ad"):
         raise click.BadParameter("Input file must have a .h5ad suffix.")
+    if output_format is None:
+        output_format = "zarr" if output.rstrip("/").endswith(".zarr") else "h5ad"
+    if compression == "lzf" and output_format == "zarr":
+        raise click.BadParameter(
+            "lzf compression is not available for zarr outputs.",
+            param_hint="'--compression'",
+        )
 
-    # Load the AnnData object and changes DataFrame
-    adata = ad.read_h5ad(input)
-    df_changes = pd.read_csv(changes)
+    import anndata as ad
+
+    from hugo_unifier import apply_changes
+    from hugo_unifier.output import write_output
+
+    report = make_report("apply", profile, cprofile_dir)
+    with activate(report):
+        df_changes = read_checked_changes(input, changes)
+
+        # Load the AnnData object
+        with span("read_input"):
+            adata = ad.read_h5ad(input)
+
+        # Apply the changes
+        with span("apply_changes", profile=True):
+            try:
+                updated_adata = apply_changes(adata, df_changes, merge=merge_method)
+            except ValueError as e:
+                raise click.ClickException(str(e))
+
+        # Save the updated AnnData object
+        with span("write_output"):
+            write_output(
+                updated_adata,
+                output,
+                format=output_format,
+                compression=compression,
+                level=compression_level,
+                chunks=chunks,
+                threads=threads,
+            )
+    if profile is not None:
+        report.write(profile)
+
+
+@cli.command("apply-shard")
+@click.option(
+    "--input",
+    "-i",
+    type=click.Path(exists=True),
+    required=True,
+    help="Path to the input .h5ad file.",
+)
+@click.option(
+    "--changes",
+    "-c",
+    type=click.Path(exists=True),
+    required=True,
+    help="Path to the changes CSV file.",
+)
+@click.option(
+    "--shard",
+    type=click.IntRange(min=0),
+    required=True,
+    help="Index of the shard to apply the changes to, from 0 to --n-shards - 1.",
+)
+@click.option(
+    "--n-shards",
+    type=click.IntRange(min=1),
+    required=True,
+    help="Number of shards the obs rows of the input are split into.",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, writable=True),
+    required=True,
+    help="Path to save the updated shard as .h5ad file.",
+)
+@click.option(
+    "--merge-method",
+    type=click.Choice(["sum", "max"]),
+    default="sum",
+    show_default=True,
+    help="How the columns of merged symbols are combined.",
+)
+@output_options
+@profile_options
+def apply_shard(
+    input,
+    changes,
+    shard,
+    n_shards,
+    output,
+    merge_method,
+    compression,
+    compression_level,
+    chunks,
+    threads,
+    profile,
+    cprofile_dir,
+):
+    """Apply changes to one row shard of the input .h5ad file."""
+
+    if not input.endswith(".h5ad"):
+        raise click.BadParameter("Input file must have a .h5ad suffix.")
+    if shard >= n_shards:
+        raise click.BadParameter(f"Shard must be lower than {n_shards}.")
+
+    from hugo_unifier.output import write_output
+    from hugo_unifier.shards import apply_shard as apply_to_shard
+
+    report = make_report("apply-shard", profile, cprofile_dir)
+    with activate(report):
+        df_changes = read_checked_changes(input, changes)
+        try:
+            updated_adata = apply_to_shard(
+                input, df_changes, shard, n_shards, merge=merge_method
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        with span("write_output"):
+            write_output(
+                updated_adata,
+                output,
+                format="h5ad",
+                compression=compression,
+                level=compression_level,
+                chunks=chunks,
+                threads=threads,
+            )
+    if profile is not None:
+        report.write(profile)
+
+
+@cli.command("merge-shards")
+@click.argument("shard", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(writable=True),
+    required=True,
+    help="Path to save the merged .h5ad file or zarr store.",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["h5ad", "zarr"]),
+    default=None,
+    help="Output format. Defaults to zarr for outputs ending with .zarr and to h5ad otherwise.",
+)
+@profile_options
+def merge_shard_files(shard, output, output_format, profile, cprofile_dir):
+    """Merge shards written by apply-shard into one .h5ad file or zarr store."""
+    from hugo_unifier.shards import merge_shards
+
+    report = make_report("merge-shards", profile, cprofile_dir)
+    with activate(report):
+        try:
+            merge_shards(shard, output, format=output_format)
+        except AssertionError as e:
+            raise click.ClickException(str(e))
+    if profile is not None:
+        report.write(profile)
+
+
+@cli.command()
+@click.option(
+    "--input",
+    "-i",
+    type=str,
+    required=True,
+    multiple=True,
+    help="Paths to the input .h5ad files with optional dataset names (e.g., dataset1:test1.h5ad).",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, writable=True),
+    required=True,
+    help="Path to save the manifest (gzip-compressed JSON).",
+)
+def collect(input, output):
+    """Collect the symbols of .h5ad files into a manifest for `reduce`."""
+    from hugo_unifier.manifest import collect_manifest, write_manifest
+    from hugo_unifier.symbol_table import read_h5ad_symbols
+
+    datasets = parse_inputs(input)
+    manifest = collect_manifest(
+        read_h5ad_symbols(datasets),
+        sources={name: os.path.abspath(path) for name, path in datasets.items()},
+    )
+    write_manifest(manifest, output)
+    click.echo(
+        f"Collected {len(manifest['datasets'])} datasets with "
+        f"{len(manifest['panels'])} distinct panels into {output}."
+    )
+
+
+@cli.command("merge-manifests")
+@click.argument(
+    "manifest",
+    type=click.Path(exists=True, dir_okay=False),
+    nargs=-1,
+    required=True,
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, writable=True),
+    required=True,
+    help="Path to save the merged manifest.",
+)
+def merge_manifest_files(manifest, output):
+    """Merge MANIFEST files into one, e.g. per node and then per cluster."""
+    from hugo_unifier.manifest import merge_manifests, read_manifest, write_manifest
+
+    try:
+        merged = merge_manifests(read_manifest(path) for path in manifest)
+    except AssertionError as e:
+        raise click.BadParameter(str(e))
+    write_manifest(merged, output)
+    click.echo(
+        f"Merged {len(merged['datasets'])} datasets with "
+        f"{len(merged['panels'])} distinct panels into {output}."
+    )
+
+
+@cli.command()
+@click.argument(
+    "manifest",
+    type=click.Path(exists=True, dir_okay=False),
+    nargs=-1,
+    required=True,
+)
+@click.option(
+    "--outdir",
+    "-o",
+    type=click.Path(file_okay=False, writable=True),
+    required=True,
+    help="Path to the output directory for change DataFrames.",
+)
+@unifier_options
+@profile_options
+def reduce(
+    manifest,
+    outdir,
+    manipulation,
+    manipulation_config,
+    hgnc_index,
+    id_table,
+    id_type,
+    cache_dir,
+    cache_max_size,
+    merge,
+    profile,
+    cprofile_dir,
+):
+    """Get changes for the datasets of MANIFEST files (see collect), like `get`."""
+    manipulations = select_manipulations(manipulation, manipulation_config)
+
+    report = make_report("reduce", profile, cprofile_dir)
+    with activate(report):
+        from hugo_unifier import get_changes
+        from hugo_unifier.manifest import (
+            manifest_symbols,
+            merge_manifests,
+            read_manifest,
+        )
+
+        config = resolution_config(
+            manipulations,
+            hgnc_index,
+            id_table,
+            id_type,
+            cache_dir,
+            cache_max_size,
+            merge,
+        )
+        with span("read_manifests"):
+            try:
+                merged = merge_manifests(read_manifest(path) for path in manifest)
+            except AssertionError as e:
+                raise click.BadParameter(str(e))
+
+        os.makedirs(outdir, exist_ok=True)
+        with span("get_changes"):
+            _, sample_changes = get_changes(manifest_symbols(merged), **config)
+        write_changes(sample_changes, outdir)
+    if profile is not None:
+        report.write(profile)
+
+
+@cli.command()
+@unifier_options
+@click.option(
+    "--host",
+    type=str,
+    default="127.0.0.1",
+    show_default=True,
+    help="Host to listen on.",
+)
+@click.option(
+    "--port",
+    type=int,
+    default=8765,
+    show_default=True,
+    help="Port to listen on.",
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Listen on a Unix domain socket at this path instead of a TCP port.",
+)
+@click.option(
+    "--workers",
+    type=int,
+    default=8,
+    show_default=True,
+    help="Number of worker threads handling requests.",
+)
+@click.option(
+    "--verbose",
+    is_flag=True,
+    default=False,
+    help="Log every request.",
+)
+def serve(
+    manipulation,
+    manipulation_config,
+    hgnc_index,
+    id_table,
+    id_type,
+    cache_dir,
+    cache_max_size,
+    merge,
+    host,
+    port,
+    socket_path,
+    workers,
+    verbose,
+):
+    """Serve changes from a long-running process with warm caches.
+
+    Use `hugo-unifier get --server` to delegate to it. Clients can ask the
+    server to read any .h5ad file it has access to, so only listen on
+    addresses reachable by trusted clients.
+    """
+    import signal
+    import sys
+
+    from hugo_unifier.server import make_server
+    from hugo_unifier.unifier import Unifier
+
+    manipulations = select_manipulations(manipulation, manipulation_config)
+    unifier = Unifier(
+        **resolution_config(
+            manipulations,
+            hgnc_index,
+            id_table,
+            id_type,
+            cache_dir,
+            cache_max_size,
+            merge,
+        )
+    )
+
+    address = f"unix:{socket_path}" if socket_path else f"{host}:{port}"
+    server = make_server(unifier, address, workers=workers, verbose=verbose)
+    if not socket_path:
+        address = f"{host}:{server.server_address[1]}"
+    click.echo(f"Serving on {address} with {workers} workers.")
 
-    # Apply the changes
-    updated_adata = apply_changes(adata, df_changes)
+    # Shut down cleanly (e.g. removing the socket file) when terminated
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        unifier.close()
+
+
+@cli.command()
+@click.option(
+    "--input",
+    "-i",
+    type=str,
+    required=True,
+    multiple=True,
+    help="Paths to the input .h5ad files with optional dataset names (e.g., dataset1:test1.h5ad).",
+)
+@click.option(
+    "--changes",
+    "-c",
+    type=click.Path(exists=True),
+    required=True,
+    help="Changes CSV of a single input, or a directory with a <dataset>.csv per input (as written by get).",
+)
+@click.option(
+    "--report",
+    "report_path",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Path to write all problems to as CSV.",
+)
+@click.option(
+    "--strict",
+    is_flag=True,
+    default=False,
+    help="Also fail if there are warnings.",
+)
+@profile_options
+def validate(input, changes, report_path, strict, profile, cprofile_dir):
+    """Check changes against the var index of .h5ad files without applying them."""
+    import pandas as pd
+
+    from hugo_unifier.validate import validate_datasets
+
+    datasets = parse_inputs(input)
+    if os.path.isdir(changes):
+        change_files = {name: os.path.join(changes, f"{name}.csv") for name in datasets}
+        for path in change_files.values():
+            if not os.path.isfile(path):
+                raise click.BadParameter(f"Changes file {path} does not exist.")
+    elif len(datasets) == 1:
+        change_files = {name: changes for name in datasets}
+    else:
+        raise click.BadParameter(
+            "Changes of multiple inputs must be given as a directory."
+        )
+
+    report = make_report("validate", profile, cprofile_dir)
+    with activate(report):
+        with span("read_changes"):
+            sample_changes = {
+                name: pd.read_csv(path) for name, path in change_files.items()
+            }
+        with span("validate"):
+            problems = validate_datasets(datasets, sample_changes)
+    if profile is not None:
+        report.write(profile)
+
+    for problem in problems.itertuples():
+        click.echo(
+            f"{problem.severity}: {problem.dataset}, row {problem.row}: {problem.message}"
+        )
+    if report_path is not None:
+        problems.to_csv(report_path, index=False)
+
+    errors = int((problems["severity"] == "error").sum())
+    warnings = int((problems["severity"] == "warning").sum())
+    click.echo(
+        f"Checked {len(datasets)} datasets: {errors} errors, {warnings} warnings."
+    )
+    if errors > 0 or (strict and warnings > 0):
+        raise click.exceptions.Exit(1)
+
+
+@cli.command("compile-index")
+@click.option(
+    "--hgnc",
+    type=click.Path(exists=True, dir_okay=False),
+    required=True,
+    help="Path to an HGNC complete set TSV (hgnc_complete_set.txt).",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, writable=True),
+    required=True,
+    help="Path to save the compiled index.",
+)
+@click.option(
+    "--release",
+    type=str,
+    default=None,
+    help="Name of the HGNC release. Defaults to the modification date of the TSV.",
+)
+def compile_index(hgnc, output, release):
+    """Compile an HGNC release into a memory-mapped index."""
+    from hugo_unifier.hgnc_index import compile_hgnc_index
 
-    # Save the updated AnnData object
-    updated_adata.write_h5ad(output)
+    metadata = compile_hgnc_index(hgnc, output, release=release)
+    click.echo(
+        f"Compiled HGNC release {metadata['release']} with {metadata['genes']} genes "
+        f"and {metadata['records']} lookup records to {output}."
+    )
 
 
 def main():
@@ -0,0 +1,112 @@
+import gzip
+import json
+import socket
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from hugo_unifier.result_cache import hash_symbols
+from hugo_unifier.symbol_table import SymbolInput, intern_symbols
+
+MANIFEST_FORMAT = "hugo-unifier-manifest"
+MANIFEST_VERSION = 1
+
+
+def collect_manifest(
+    symbols: SymbolInput, sources: Optional[Dict[str, str]] = None
+) -> Dict[str, object]:
+    """
+    Collect the symbols of datasets into a manifest.
+
+    A manifest holds everything `hugo_unifier.get_changes` needs to know about
+    a set of datasets. Identical symbol lists (panels) are stored once, under
+    the hash of their symbols, and each dataset refers to its panel.
+
+    Parameters
+    ----------
+    symbols : Mapping or Iterable[Tuple[str, array-like]]
+        Symbols of each dataset, see `hugo_unifier.symbol_table.intern_symbols`.
+    sources : Dict[str, str], optional
+        Where each dataset was read from, stored for reference.
+
+    Returns
+    -------
+    Dict[str, object]
+        The manifest, see `write_manifest`.
+    """
+    table = intern_symbols(symbols)
+    host = socket.gethostname()
+
+    panels: Dict[str, List[str]] = {}
+    datasets: Dict[str, Dict[str, object]] = {}
+    for name in table:
+        dataset_symbols = table[name].tolist()
+        panel = hash_symbols(dataset_symbols)
+        panels.setdefault(panel, dataset_symbols)
+        datasets[name] = {
+            "panel": panel,
+            "n_symbols": len(dataset_symbols),
+            "source": (sources or {}).get(name),
+            "host": host,
+        }
+
+    return {
+        "format": MANIFEST_FORMAT,
+        "version": MANIFEST_VERSION,
+        "panels": panels,
+        "datasets": datasets,
+    }
+
+
+def merge_manifests(manifests: Iterable[Dict[str, object]]) -> Dict[str, object]:
+    """
+    Merge manifests, e.g. collected on different nodes, into one.
+
+    Merged manifests can be merged again, so that manifests can be combined
+    hierarchically. Dataset names must be unique across all manifests.
+    """
+    panels: Dict[str, List[str]] = {}
+    datasets: Dict[str, Dict[str, object]] = {}
+    for manifest in manifests:
+        for panel, panel_symbols in manifest["panels"].items():
+            panels.setdefault(panel, panel_symbols)
+        for name, dataset in manifest["datasets"].items():
+            assert (
+                name not in datasets or datasets[name] == dataset
+            ), f"Dataset name {name} is duplicated across manifests."
+            datasets[name] = dataset
+
+    return {
+        "format": MANIFEST_FORMAT,
+        "version": MANIFEST_VERSION,
+        "panels": panels,
+        "datasets": datasets,
+    }
+
+
+def manifest_symbols(manifest: Dict[str, object]) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Yield the name and symbols of each dataset in a manifest, e.g. as input of
+    `hugo_unifier.get_changes`.
+    """
+    panels = manifest["panels"]
+    for name, dataset in manifest["datasets"].items():
+        yield name, panels[dataset["panel"]]
+
+
+def write_manifest(manifest: Dict[str, object], path: str) -> None:
+    """Write a manifest as gzip-compressed JSON."""
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+
+
+def read_manifest(path: str) -> Dict[str, object]:
+    """Read a manifest written by `write_manifest`."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    assert (
+        manifest.get("format") == MANIFEST_FORMAT
+    ), f"{path} is not a hugo-unifier manifest."
+    assert (
+        manifest.get("version") == MANIFEST_VERSION
+    ), f"Unsupported manifest version {manifest.get('version')}."
+    return manifest
@@ -1,15 +1,27 @@
 import pandas as pd
-from typing import Callable, List, Tuple
+from typing import Callable, List, Optional, Tuple
 from hugo_unifier.hugo_fetch import fetch_symbol_check_results
+from hugo_unifier.id_resolution import default_id_types, detect_ids, resolve_ids
+from hugo_unifier.instrumentation import count, span
+from hugo_unifier.symbol_manipulations import apply_manipulation
+from hugo_unifier.symbol_table import SymbolTable
+
+# Columns of the result that the symbol graph is built from
+GRAPH_COLUMNS = ["original", "input", "approvedSymbol", "matchType", "resolution"]
 
 
 def fetch_manipulation(
-    original_symbols: List[str], manipulation: Callable[[str], str]
+    original_symbols: List[str],
+    manipulation: Callable[[pd.Series], pd.Series],
+    resolver: Callable[[List[str]], pd.DataFrame] = fetch_symbol_check_results,
 ) -> pd.DataFrame:
-    df_manipulation = pd.DataFrame(original_symbols, columns=["original"])
-    df_manipulation["input"] = df_manipulation["original"].apply(manipulation)
+    df_manipulation = apply_manipulation(pd.Series(original_symbols), manipulation)
+    # Manipulations can produce empty symbols (e.g. ".1" -> ""), which cannot be queried
+    df_manipulation = df_manipulation[
+        df_manipulation["input"].notna() & (df_manipulation["input"] != "")
+    ]
 
-    df_result = fetch_symbol_check_results(df_manipulation["input"].tolist())
+    df_result = resolver(df_manipulation["input"].tolist())
 
     df = df_manipulation.merge(df_result, how="inner", on="input")
     df = df[
@@ -19,27 +31,84 @@ def fetch_manipulation(
 
 
 def orchestrated_fetch(
-    original_symbols: List[str], manipulations: List[Tuple[str, Callable[[str], str]]]
+    original_symbols: List[str],
+    manipulations: List[Tuple[str, Callable[[pd.Series], pd.Series]]],
+    resolver: Callable[[List[str]], pd.DataFrame] = fetch_symbol_check_results,
+    xref: Optional[pd.DataFrame] = None,
+    id_types: List[str] = default_id_types,
+    table: Optional[SymbolTable] = None,
 ) -> pd.DataFrame:
+    """
+    Look up symbols, trying the manipulations in order until a symbol matches.
+
+    Parameters
+    ----------
+    original_symbols : List[str]
+        Distinct symbols to look up.
+    manipulations : List[Tuple[str, Callable[[pd.Series], pd.Series]]]
+        Names and manipulations to try, in order.
+    resolver : Callable[[List[str]], pd.DataFrame]
+        Function that looks up a list of symbols, see
+        `hugo_unifier.get_changes`.
+    xref : pd.DataFrame, optional
+        HGNC cross-references to resolve gene IDs with.
+    id_types : List[str]
+        Types of gene IDs to recognize.
+    table : SymbolTable, optional
+        If given, the symbols of the result are interned into the vocabulary
+        of the table: the columns 'original', 'input' and 'approvedSymbol'
+        hold codes instead of strings, 'matchType' and 'resolution' are
+        categoricals, and the other columns are dropped.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per match, with the columns of the resolver's result and
+        'original' and 'resolution' (the name of the manipulation).
+    """
     results = []
     remaining_symbols = original_symbols
+
+    if xref is not None and id_types:
+        with span("resolve_ids"):
+            df_ids = detect_ids(pd.Series(remaining_symbols, dtype=object), id_types)
+            results.append(_intern_result(resolve_ids(df_ids, xref), table))
+
+        # IDs cannot be matched by the symbol checker, so do not query them
+        ids = set(df_ids["original"])
+        remaining_symbols = [
+            symbol for symbol in remaining_symbols if symbol not in ids
+        ]
     for name, manipulation in manipulations:
         # If no symbols remain, break the loop
         if not remaining_symbols:
             break
 
-        df = fetch_manipulation(remaining_symbols, manipulation)
+        with span(name):
+            df = fetch_manipulation(remaining_symbols, manipulation, resolver)
+        count(f"symbols_queried_{name}", len(remaining_symbols))
+        count(f"symbols_matched_{name}", df["original"].nunique())
 
-        # Remove values in df["input"] from remaining_symbols
+        # Remove values in df["original"] from remaining_symbols
+        matched = set(df["original"])
         remaining_symbols = [
-            symbol
-            for symbol in remaining_symbols
-            if symbol not in df["original"].values
+            symbol for symbol in remaining_symbols if symbol not in matched
         ]
 
         df["resolution"] = name
-        results.append(df)
+        results.append(_intern_result(df, table))
 
     # Concatenate all results into a single DataFrame
     df_final = pd.concat(results, ignore_index=True)
+    if table is not None:
+        df_final = df_final.astype({"matchType": "category", "resolution": "category"})
     return df_final
+
+
+def _intern_result(df: pd.DataFrame, table: Optional[SymbolTable]) -> pd.DataFrame:
+    if table is None:
+        return df
+    df = df[GRAPH_COLUMNS].copy()
+    for column in ["original", "input", "approvedSymbol"]:
+        df[column] = table.intern(df[column])
+    return df
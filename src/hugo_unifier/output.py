@@ -0,0 +1,334 @@
+import itertools
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, Tuple
+
+import anndata as ad
+import h5py
+import numpy as np
+from scipy import sparse
+
+from hugo_unifier.instrumentation import active_report, count, span
+
+COMPRESSIONS = ["gzip", "lzf", "blosc"]
+DEFAULT_LEVELS = {"gzip": 4, "blosc": 5}
+
+# Target size of a chunk when no chunk shape is given
+CHUNK_BYTES = 1 << 20
+
+
+def output_size(path: str) -> int:
+    """Return the size of a file, or of all files in a directory, in bytes."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def chunk_shape(
+    shape: Tuple[int, ...], itemsize: int, chunks: Optional[Tuple[int, ...]] = None
+) -> Tuple[int, ...]:
+    """
+    Return the chunk shape of an array.
+
+    Given chunks are clipped to the shape of the array. By default, chunks span
+    whole rows and hold about 1 MiB.
+    """
+    if chunks is None:
+        row_bytes = itemsize * int(np.prod(shape[1:], dtype=np.int64))
+        chunks = (max(1, CHUNK_BYTES // max(row_bytes, 1)), *shape[1:])
+    elif len(chunks) != len(shape):
+        # e.g. the 2-d chunk shape of X for the 1-d arrays of a sparse matrix
+        chunks = (int(np.prod(chunks, dtype=np.int64)), *shape[1:])
+    return tuple(max(1, min(c, s)) for c, s in zip(chunks, shape))
+
+
+def h5py_filter(compression: Optional[str], level: Optional[int]) -> Dict[str, object]:
+    """Return the h5py dataset arguments of a compression."""
+    if compression is None:
+        return {}
+    assert (
+        compression in COMPRESSIONS
+    ), f"Compression {compression} is not valid. Choose from {COMPRESSIONS}."
+    if compression == "lzf":
+        return {"compression": "lzf"}
+    level = DEFAULT_LEVELS[compression] if level is None else level
+    if compression == "gzip":
+        return {"compression": "gzip", "compression_opts": level}
+
+    try:
+        import hdf5plugin
+    except ImportError:
+        raise ImportError(
+            "Blosc compression of .h5ad files requires the hdf5plugin package."
+        )
+    return dict(hdf5plugin.Blosc(cname="zstd", clevel=level))
+
+
+def _chunk_offsets(
+    shape: Tuple[int, ...], chunks: Tuple[int, ...]
+) -> Iterator[Tuple[int, ...]]:
+    return itertools.product(*(range(0, s, c) for s, c in zip(shape, chunks)))
+
+
+def write_array(
+    group: h5py.Group,
+    key: str,
+    array: np.ndarray,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+    chunks: Optional[Tuple[int, ...]] = None,
+    executor: Optional[ThreadPoolExecutor] = None,
+    threads: Optional[int] = None,
+) -> h5py.Dataset:
+    """
+    Write an array as a chunked, optionally compressed dataset.
+
+    With gzip compression and an executor, the chunks are compressed on the
+    threads of the executor and written with ``write_direct_chunk``. Other
+    compressions are applied by the HDF5 filter pipeline. ``threads`` is the
+    number of workers of the executor (default: the number of processors).
+    """
+    array = np.asarray(array)
+    if array.size == 0:
+        return group.create_dataset(key, data=array)
+
+    chunks = chunk_shape(array.shape, array.dtype.itemsize, chunks)
+    filter_args = h5py_filter(compression, level)
+    if compression != "gzip" or executor is None:
+        return group.create_dataset(key, data=array, chunks=chunks, **filter_args)
+
+    dataset = group.create_dataset(
+        key, shape=array.shape, dtype=array.dtype, chunks=chunks, **filter_args
+    )
+    level = filter_args["compression_opts"]
+
+    def compress(offset):
+        block = array[tuple(slice(o, o + c) for o, c in zip(offset, chunks))]
+        if block.shape != chunks:
+            # HDF5 stores edge chunks at their full size
+            padded = np.zeros(chunks, dtype=array.dtype)
+            padded[tuple(slice(0, s) for s in block.shape)] = block
+            block = padded
+        return offset, zlib.compress(np.ascontiguousarray(block).data, level)
+
+    # Compress a bounded window of chunks at a time, zlib releases the GIL
+    offsets = _chunk_offsets(array.shape, chunks)
+    window = 4 * (threads or os.cpu_count())
+    while True:
+        batch = list(itertools.islice(offsets, window))
+        if not batch:
+            break
+        for offset, data in executor.map(compress, batch):
+            dataset.id.write_direct_chunk(offset, data)
+    return dataset
+
+
+def write_matrix(
+    group: h5py.Group,
+    key: str,
+    matrix,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+    chunks: Optional[Tuple[int, ...]] = None,
+    executor: Optional[ThreadPoolExecutor] = None,
+    threads: Optional[int] = None,
+) -> None:
+    """
+    Write a dense array or a CSR/CSC matrix in the AnnData on-disk format.
+    """
+    options = dict(
+        compression=compression, level=level, executor=executor, threads=threads
+    )
+    if sparse.issparse(matrix):
+        fmt = matrix.format
+        element = group.create_group(key)
+        element.attrs["encoding-type"] = f"{fmt}_matrix"
+        element.attrs["encoding-version"] = "0.1.0"
+        element.attrs["shape"] = np.array(matrix.shape)
+        for name in ["data", "indices", "indptr"]:
+            write_array(element, name, getattr(matrix, name), chunks=chunks, **options)
+    else:
+        dataset = write_array(group, key, matrix, chunks=chunks, **options)
+        dataset.attrs["encoding-type"] = "array"
+        dataset.attrs["encoding-version"] = "0.2.0"
+
+
+def _is_writable_matrix(matrix) -> bool:
+    return isinstance(matrix, np.ndarray) or (
+        sparse.issparse(matrix) and matrix.format in ("csr", "csc")
+    )
+
+
+def write_h5ad(
+    adata: ad.AnnData,
+    path: str,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+    chunks: Optional[Tuple[int, ...]] = None,
+    threads: Optional[int] = None,
+) -> None:
+    """
+    Write an AnnData object to an .h5ad file with chunked, compressed matrices.
+
+    X and the layers are written by `write_matrix`, which compresses gzip
+    chunks on a thread pool. All other elements (including raw) are written by
+    anndata with the same compression.
+    """
+    if compression is None and chunks is None:
+        adata.write_h5ad(path)
+        return
+
+    matrices = {}
+    if _is_writable_matrix(adata.X):
+        matrices["X"] = adata.X
+    for name, layer in adata.layers.items():
+        # Newer versions of anndata expose X as the layer None
+        if name is not None and _is_writable_matrix(layer):
+            matrices[f"layers/{name}"] = layer
+
+    # A shallow copy of everything else, the matrices are added below
+    rest = ad.AnnData(
+        X=None if "X" in matrices else adata.X,
+        obs=adata.obs,
+        var=adata.var,
+        uns=adata.uns,
+        obsm=adata.obsm,
+        varm=adata.varm,
+        obsp=adata.obsp,
+        varp=adata.varp,
+        layers={
+            k: v
+            for k, v in adata.layers.items()
+            if k is not None and f"layers/{k}" not in matrices
+        },
+    )
+    if adata.raw is not None:
+        rest.raw = adata.raw.to_adata()
+    filter_args = h5py_filter(compression, level)
+    rest.write_h5ad(path, **filter_args)
+
+    threads = threads or os.cpu_count()
+    with h5py.File(path, "a") as f, ThreadPoolExecutor(threads) as executor:
+        for key, matrix in matrices.items():
+            with span(key.replace("/", "_")):
+                write_matrix(
+                    f,
+                    key,
+                    matrix,
+                    compression,
+                    level,
+                    chunks,
+                    executor=executor,
+                    threads=threads,
+                )
+
+
+def write_zarr(
+    adata: ad.AnnData,
+    path: str,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+    chunks: Optional[Tuple[int, ...]] = None,
+    threads: Optional[int] = None,
+) -> None:
+    """
+    Write an AnnData object to a zarr store, compressing and writing chunks in
+    parallel.
+    """
+    import zarr
+
+    assert compression != "lzf", "lzf compression is not available for zarr."
+    level = DEFAULT_LEVELS.get(compression) if level is None else level
+    zarr_v3 = int(zarr.__version__.split(".")[0]) >= 3
+
+    if zarr_v3:
+        from zarr import codecs
+
+        compressor = {
+            None: None,
+            "gzip": lambda: codecs.GzipCodec(level=level),
+            "blosc": lambda: codecs.BloscCodec(cname="zstd", clevel=level),
+        }[compression]
+        kwargs = {"compressors": compressor() if compressor else None}
+        config = {"threading.max_workers": threads, "async.concurrency": threads}
+        with zarr.config.set({k: v for k, v in config.items() if v is not None}):
+            ad.io.write_zarr(path, adata, chunks=chunks, **kwargs)
+    else:
+        import numcodecs
+
+        compressor = {
+            None: None,
+            "gzip": lambda: numcodecs.GZip(level=level),
+            "blosc": lambda: numcodecs.Blosc(cname="zstd", clevel=level),
+        }[compression]
+        if threads is not None:
+            numcodecs.blosc.set_nthreads(threads)
+        ad.io.write_zarr(
+            path, adata, chunks=chunks, compressor=compressor and compressor()
+        )
+
+
+def write_output(
+    adata: ad.AnnData,
+    path: str,
+    format: Optional[str] = None,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+    chunks: Optional[Tuple[int, ...]] = None,
+    threads: Optional[int] = None,
+) -> int:
+    """
+    Write an AnnData object as .h5ad or zarr.
+
+    Parameters
+    ----------
+    adata : ad.AnnData
+        The AnnData object to write.
+    path : str
+        Path of the output.
+    format : str, optional
+        'h5ad' or 'zarr'. Defaults to 'zarr' for paths ending with '.zarr' and
+        to 'h5ad' otherwise.
+    compression : str, optional
+        'gzip', 'lzf' (h5ad only) or 'blosc'. Blosc compression of .h5ad files
+        requires the hdf5plugin package. Defaults to no compression.
+    level : int, optional
+        Compression level.
+    chunks : Tuple[int, ...], optional
+        Chunk shape of X and the layers. By default, chunks span whole rows
+        and hold about 1 MiB.
+    threads : int, optional
+        Number of threads compressing and writing chunks. Defaults to the
+        number of processors.
+
+    Returns
+    -------
+    int
+        The size of the output in bytes. It is also recorded in the active run
+        report, together with the write options.
+    """
+    if format is None:
+        format = "zarr" if path.rstrip("/").endswith(".zarr") else "h5ad"
+    assert format in ("h5ad", "zarr"), f"Format {format} is not valid."
+    threads = threads or os.cpu_count()
+
+    writer = write_zarr if format == "zarr" else write_h5ad
+    writer(adata, path, compression, level, chunks, threads)
+
+    size = output_size(path)
+    count("output_bytes", size)
+    report = active_report()
+    if report is not None:
+        report.metadata["output"] = {
+            "format": format,
+            "compression": compression,
+            "level": level,
+            "chunks": list(chunks) if chunks else None,
+            "threads": threads,
+        }
+    return size
@@ -0,0 +1,166 @@
+from collections.abc import Set
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from hugo_unifier.symbol_table import SymbolInput, SymbolTable, intern_symbols
+
+
+class Panels:
+    """
+    Datasets of a `SymbolTable`, grouped into panels of identical symbols.
+
+    Panels are numbered in the order of their first dataset.
+
+    Parameters
+    ----------
+    table : SymbolTable
+        The interned symbols of the datasets.
+    """
+
+    def __init__(self, table: SymbolTable):
+        self.names: List[str] = []
+        self.members: List[List[str]] = []
+        self.index: Dict[str, int] = {}
+
+        panel_ids: Dict[bytes, int] = {}
+        for dataset, codes in table.codes.items():
+            key = np.unique(codes).tobytes()
+            panel = panel_ids.setdefault(key, len(panel_ids))
+            if panel == len(self.names):
+                self.names.append(dataset)
+                self.members.append([])
+            self.members[panel].append(dataset)
+            self.index[dataset] = panel
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def symbol_masks(self, table: SymbolTable, codes: np.ndarray) -> List[int]:
+        """
+        Return the bitmask of the panels that contain each symbol.
+
+        Parameters
+        ----------
+        table : SymbolTable
+            The table the panels were built from.
+        codes : np.ndarray
+            Codes of the symbols in the vocabulary of the table.
+
+        Returns
+        -------
+        List[int]
+            For each symbol, an integer whose bit ``i`` is set if panel ``i``
+            contains the symbol.
+        """
+        bits = np.zeros((len(table.vocabulary), (len(self) + 7) // 8), dtype=np.uint8)
+        for panel, name in enumerate(self.names):
+            bits[table.codes[name], panel >> 3] |= np.uint8(1 << (panel & 7))
+        return [int.from_bytes(row.tobytes(), "little") for row in bits[codes]]
+
+
+class PanelSet(Set):
+    """
+    Read-only set of dataset names, stored as a bitmask of panels.
+
+    Datasets of the same panel are always in the same sets, so one bit per
+    panel is enough. Set operations between PanelSets of the same panels are
+    bitwise operations; iterating yields the names of the datasets.
+
+    Parameters
+    ----------
+    mask : int
+        Bitmask of the panels in the set.
+    panels : Panels
+        The panels that the bits refer to.
+    """
+
+    __slots__ = ("mask", "panels")
+
+    def __init__(self, mask: int, panels: Panels):
+        self.mask = mask
+        self.panels = panels
+
+    @classmethod
+    def _from_iterable(cls, iterable) -> set:
+        # Results of operations with other sets are plain sets
+        return set(iterable)
+
+    def panel_indices(self) -> Iterator[int]:
+        """Iterate over the indices of the panels in the set."""
+        mask = self.mask
+        while mask:
+            lowest = mask & -mask
+            yield lowest.bit_length() - 1
+            mask ^= lowest
+
+    def __iter__(self) -> Iterator[str]:
+        for panel in self.panel_indices():
+            yield from self.panels.members[panel]
+
+    def __len__(self) -> int:
+        return sum(len(self.panels.members[panel]) for panel in self.panel_indices())
+
+    def __bool__(self) -> bool:
+        return self.mask != 0
+
+    def __contains__(self, dataset) -> bool:
+        panel = self.panels.index.get(dataset)
+        return panel is not None and bool(self.mask >> panel & 1)
+
+    def _same_panels(self, other) -> bool:
+        return isinstance(other, PanelSet) and other.panels is self.panels
+
+    def __and__(self, other):
+        if self._same_panels(other):
+            return PanelSet(self.mask & other.mask, self.panels)
+        return super().__and__(other)
+
+    def __or__(self, other):
+        if self._same_panels(other):
+            return PanelSet(self.mask | other.mask, self.panels)
+        return super().__or__(other)
+
+    def __sub__(self, other):
+        if self._same_panels(other):
+            return PanelSet(self.mask & ~other.mask, self.panels)
+        return super().__sub__(other)
+
+    def __eq__(self, other) -> bool:
+        if self._same_panels(other):
+            return self.mask == other.mask
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        return hash(self.mask)
+
+    def __repr__(self) -> str:
+        # Sorted, so that reasons do not depend on the hash seed
+        return "{" + ", ".join(repr(dataset) for dataset in sorted(self)) + "}"
+
+
+def group_panels(
+    symbols: SymbolInput,
+) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+    """
+    Group datasets that share exactly the same set of symbols into panels.
+
+    Each panel is named after the first dataset that has it.
+
+    Parameters
+    ----------
+    symbols : Mapping or Iterable[Tuple[str, array-like]]
+        Symbols of each dataset, see `hugo_unifier.symbol_table.intern_symbols`.
+
+    Returns
+    -------
+    panel_symbols : Dict[str, np.ndarray]
+        Symbols of each panel.
+    panel_members : Dict[str, List[str]]
+        Names of the datasets that share each panel.
+    """
+    table = intern_symbols(symbols)
+    panels = Panels(table)
+    panel_symbols = {name: table[name] for name in panels.names}
+    panel_members = dict(zip(panels.names, panels.members))
+    return panel_symbols, panel_members
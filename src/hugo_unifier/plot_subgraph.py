@@ -1,17 +1,51 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, List, Optional, Union
+
 import networkx as nx
+import matplotlib
 import matplotlib.pyplot as plt
+import pandas as pd
 
 
-def plot_symbol_subgraph(G: nx.DiGraph, symbol: str):
+def component_index(G: nx.DiGraph) -> Dict[str, FrozenSet[str]]:
+    """
+    Map every symbol to the weakly connected component that contains it.
+
+    Building the index scans the whole graph. To look up many symbols, build
+    it once and pass it to `plot_symbol_subgraph` or `export_conflict_subgraphs`;
+    rebuild it after changing the graph.
+
+    Args:
+        G (nx.DiGraph): The symbol graph.
+
+    Returns:
+        Dict[str, FrozenSet[str]]: Mapping from symbol to its component. All
+            symbols of a component share the same frozenset.
+    """
+    index = {}
+    for component in nx.weakly_connected_components(G):
+        component = frozenset(component)
+        for node in component:
+            index[node] = component
+    return index
+
+
+def plot_symbol_subgraph(
+    G: nx.DiGraph, symbol: str, index: Optional[Dict[str, FrozenSet[str]]] = None
+):
     """
     Plot the subgraph containing the symbol and its related nodes.
     Args:
         G (nx.DiGraph): The directed graph containing the symbol.
         symbol (str): The symbol to plot.
+        index (Dict[str, FrozenSet[str]], optional): The component index of G
+            built by component_index. Built from G if not given.
     """
+    if index is None:
+        index = component_index(G)
 
-    components = list(nx.weakly_connected_components(G))
-    component = next((c for c in components if symbol in c), None)
+    component = index.get(symbol)
     if component is None:
         print(f"Symbol '{symbol}' not found in any connected component.")
         return
@@ -19,8 +53,8 @@ def plot_symbol_subgraph(G: nx.DiGraph, symbol: str):
     plot_subgraph(G.subgraph(component))
 
 
-def plot_subgraph(subgraph):
-    pos = nx.spring_layout(subgraph)
+def plot_subgraph(subgraph, seed: Optional[int] = None):
+    pos = nx.spring_layout(subgraph, seed=seed)
 
     # Extract edge labels from "type" attribute
     edge_labels = {(u, v): d["type"] for u, v, d in subgraph.edges(data=True)}
@@ -67,3 +101,71 @@ def plot_subgraph(subgraph):
 
     # Add some padding
     plt.margins(0.3)
+
+
+def _use_non_interactive_backend():
+    matplotlib.use("Agg", force=True)
+
+
+def _render_subgraph(task):
+    subgraph, path = task
+    plot_subgraph(subgraph, seed=0)
+    plt.savefig(path, bbox_inches="tight")
+    plt.close("all")
+    return path
+
+
+def export_conflict_subgraphs(
+    G: nx.DiGraph,
+    changes: Union[pd.DataFrame, Dict[str, pd.DataFrame]],
+    outdir: str,
+    format: str = "png",
+    processes: Optional[int] = None,
+    index: Optional[Dict[str, FrozenSet[str]]] = None,
+) -> List[str]:
+    """
+    Render every component that contains a conflict to an image file.
+
+    Each component is rendered once, even if it contains multiple conflicts or
+    conflicts from multiple samples. Rendering happens in a process pool with a
+    non-interactive matplotlib backend.
+
+    Args:
+        G (nx.DiGraph): The symbol graph returned by get_changes.
+        changes (pd.DataFrame | Dict[str, pd.DataFrame]): A change DataFrame, or
+            the per-sample change DataFrames returned by get_changes.
+        outdir (str): Directory to write the images to.
+        format (str): Image format supported by matplotlib, e.g. "png" or "svg".
+        processes (int, optional): Number of worker processes.
+        index (Dict[str, FrozenSet[str]], optional): The component index of G
+            built by component_index. Built from G if not given.
+
+    Returns:
+        List[str]: Paths of the written images.
+    """
+    if isinstance(changes, dict):
+        changes = pd.concat(changes.values(), ignore_index=True)
+    conflict_symbols = changes.loc[changes["action"] == "conflict", "symbol"]
+
+    if index is None:
+        index = component_index(G)
+    components = {}
+    for symbol in sorted(set(conflict_symbols)):
+        component = index.get(symbol)
+        if component is not None and component not in components:
+            components[component] = symbol
+
+    os.makedirs(outdir, exist_ok=True)
+    tasks = []
+    for component, symbol in components.items():
+        filename = f"{symbol.replace(os.sep, '_')}.{format}"
+        # Subgraph views reference the full graph, so send copies to the workers
+        tasks.append((G.subgraph(component).copy(), os.path.join(outdir, filename)))
+
+    if not tasks:
+        return []
+
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=_use_non_interactive_backend
+    ) as executor:
+        return list(executor.map(_render_subgraph, tasks))
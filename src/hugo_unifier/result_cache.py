@@ -0,0 +1,202 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import tempfile
+import time
+from importlib.metadata import version
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from hugo_unifier.instrumentation import count
+from hugo_unifier.symbol_manipulations import manipulation_mapping
+
+
+def hash_symbols(symbols) -> str:
+    """Return the SHA-256 of a list of symbols, in order."""
+    digest = hashlib.sha256()
+    for symbol in symbols:
+        digest.update(str(symbol).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def hash_code(code) -> str:
+    """
+    Return the SHA-256 of the bytecode, constants and names of a code object,
+    including the code of functions defined within it.
+    """
+    digest = hashlib.sha256()
+    digest.update(code.co_code)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            digest.update(hash_code(const).encode("utf-8"))
+        else:
+            digest.update(repr(const).encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(repr(code.co_names).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def describe_manipulation(name: str) -> str:
+    """
+    Describe a registered manipulation by what it does, not only by its name.
+
+    Regex manipulations are described by their pattern and replacement, other
+    manipulations by the name and code of their function. Functions called by
+    the manipulation are not covered, changes to them require a new cache
+    directory.
+    """
+    manipulation = manipulation_mapping[name]
+    if hasattr(manipulation, "pattern"):
+        return f"{name}:regex:{manipulation.pattern}:{manipulation.replacement}"
+    function = getattr(manipulation, "function", manipulation)
+    description = f"{name}:{function.__module__}.{function.__qualname__}"
+    code = getattr(function, "__code__", None)
+    if code is not None:
+        description += f":{hash_code(code)}"
+    return description
+
+
+def describe_resolver(resolver: Callable) -> str:
+    """
+    Describe the data source of a resolver, e.g. the HGNC release of an index.
+    """
+    # Describe the underlying resolver of wrappers like `Unifier.symbol_cache`
+    resolver = inspect.unwrap(resolver)
+    if isinstance(resolver, functools.partial):
+        resolver = resolver.func
+    metadata = getattr(resolver, "metadata", None)
+    if metadata is not None:
+        return f"index:{metadata['release']}:{metadata['source_sha256']}"
+    return f"{resolver.__module__}.{getattr(resolver, '__qualname__', '')}"
+
+
+def result_key(
+    symbols: Dict[str, List[str]],
+    manipulations: List[str],
+    resolver: Callable,
+    options: Optional[Dict[str, object]] = None,
+) -> str:
+    """
+    Compute the content address of a get_changes call.
+
+    The key covers the symbols of each dataset, the manipulations (including
+    their definitions), the resolver and its HGNC release, further options and
+    the version of hugo-unifier.
+    """
+    description = {
+        "version": version("hugo-unifier"),
+        "datasets": {name: hash_symbols(s) for name, s in symbols.items()},
+        "manipulations": [describe_manipulation(name) for name in manipulations],
+        "resolver": describe_resolver(resolver),
+        "options": options or {},
+    }
+    encoded = json.dumps(description, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def hash_frame(df: Optional[pd.DataFrame]) -> Optional[str]:
+    """Return a content hash of a DataFrame, or None."""
+    if df is None:
+        return None
+    hashed = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()
+
+
+class ResultCache:
+    """
+    Bounded on-disk store of get_changes results, addressed by `result_key`.
+
+    Entries are evicted in least recently used order once the store exceeds
+    ``max_bytes`` or ``max_entries``. Recency is tracked through the
+    modification time of the entries, which is updated on every hit.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the store. Created if it does not exist.
+    max_bytes : int
+        Maximum total size of all entries.
+    max_entries : int, optional
+        Maximum number of entries.
+    """
+
+    suffix = ".pkl"
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 1 << 30,
+        max_entries: Optional[int] = None,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _touch(self, path: str) -> None:
+        # Set the time explicitly, the kernel's own timestamps are too coarse to
+        # order entries that are used in quick succession
+        now = time.time_ns()
+        try:
+            os.utime(path, ns=(now, now))
+        except FileNotFoundError:
+            # Evicted by a concurrent run sharing the store
+            pass
+
+    def get(self, key: str):
+        """Return the stored result for ``key``, or None."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            count("result_cache_misses")
+            return None
+
+        self._touch(path)
+        self.hits += 1
+        count("result_cache_hits")
+        return result
+
+    def put(self, key: str, result) -> None:
+        """Store ``result`` under ``key`` and evict old entries if needed."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self._touch(self._path(key))
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the store is within bounds."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.suffix):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        while entries and (
+            total > self.max_bytes
+            or (self.max_entries is not None and len(entries) > self.max_entries)
+        ):
+            _, size, path = entries.pop(0)
+            total -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Already evicted by a concurrent run sharing the store
+                continue
+            count("result_cache_evictions")
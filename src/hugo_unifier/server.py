@@ -0,0 +1,284 @@
+import http.client
+import json
+import math
+import os
+import socket
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from importlib.metadata import version
+from typing import Dict, List, Tuple
+
+# Only the standard library is imported at module level, so that clients
+# (`hugo-unifier get --server`) do not pay for pandas or anndata.
+
+CHANGE_COLUMNS = ["action", "symbol", "new", "reason"]
+
+
+def parse_address(address: str) -> Tuple[str, object]:
+    """
+    Parse a server address, either ``unix:/path/to/socket`` or ``host:port``.
+
+    Returns
+    -------
+    Tuple[str, object]
+        The address family ('unix' or 'tcp') and the socket path or a
+        ``(host, port)`` tuple.
+    """
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:") :]
+    if address.startswith("http://"):
+        address = address[len("http://") :]
+    host, _, port = address.rstrip("/").rpartition(":")
+    assert host and port.isdigit(), f"Invalid server address {address}."
+    return "tcp", (host, int(port))
+
+
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTP server that handles requests on a fixed pool of worker threads.
+    """
+
+    def __init__(self, address, handler, workers: int = 8):
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="hugo-unifier-worker"
+        )
+        super().__init__(address, handler)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+class UnixPooledHTTPServer(PooledHTTPServer):
+    """`PooledHTTPServer` listening on a Unix domain socket."""
+
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+class UnifierRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the changes of a shared `hugo_unifier.unifier.Unifier`.
+
+    Endpoints
+    ---------
+    GET /health
+        Version and HGNC release of the service.
+    GET /stats
+        Symbol cache statistics and the number of handled requests.
+    POST /changes
+        Body ``{"datasets": {name: [symbols]}}`` or ``{"paths": {name: path}}``
+        with paths to .h5ad files readable by the server. Returns
+        ``{"columns": [...], "changes": {name: [[action, symbol, new, reason]]}}``.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self):
+        # Clients of Unix sockets have no address
+        return self.client_address[0] if self.client_address else "local"
+
+    def log_message(self, format, *args):
+        if self.server.service.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: dict) -> None:
+        encoded = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.server.service.health())
+        elif self.path == "/stats":
+            self._send_json(200, self.server.service.stats())
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}."})
+
+    def do_POST(self):
+        if self.path != "/changes":
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}."})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length))
+            body = self.server.service.changes(payload)
+        except (AssertionError, ValueError, KeyError, FileNotFoundError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self._send_json(200, body)
+
+
+class UnifierService:
+    """
+    State shared by all requests of a server: a warm `Unifier` and statistics.
+    """
+
+    def __init__(self, unifier, verbose: bool = False):
+        self.unifier = unifier
+        self.verbose = verbose
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def health(self) -> dict:
+        metadata = getattr(self.unifier.resolver, "metadata", None) or {}
+        return {
+            "status": "ok",
+            "version": version("hugo-unifier"),
+            "hgnc_release": metadata.get("release"),
+            "manipulations": self.unifier.manipulations,
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.requests
+        return {"requests": requests, "symbol_cache": self.unifier.stats()}
+
+    def changes(self, payload: dict) -> dict:
+        from hugo_unifier.symbol_table import read_h5ad_symbols
+
+        if "datasets" in payload:
+            symbols = payload["datasets"]
+        elif "paths" in payload:
+            symbols = read_h5ad_symbols(payload["paths"])
+        else:
+            raise KeyError("The request needs either 'datasets' or 'paths'.")
+
+        _, sample_changes = self.unifier.get_changes(symbols)
+        with self._lock:
+            self.requests += 1
+
+        return {
+            "columns": CHANGE_COLUMNS,
+            "changes": {
+                name: [
+                    [None if _is_missing(v) else v for v in row]
+                    for row in df[CHANGE_COLUMNS].itertuples(index=False, name=None)
+                ]
+                for name, df in sample_changes.items()
+            },
+        }
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def make_server(
+    unifier, address: str, workers: int = 8, verbose: bool = False
+) -> PooledHTTPServer:
+    """
+    Create a server for a `hugo_unifier.unifier.Unifier`.
+
+    Parameters
+    ----------
+    unifier : Unifier
+        Unifier shared by all requests.
+    address : str
+        ``host:port`` or ``unix:/path/to/socket``. Port 0 picks a free port.
+    workers : int
+        Number of worker threads handling requests.
+    verbose : bool
+        Whether to log every request.
+
+    Returns
+    -------
+    PooledHTTPServer
+        The bound server. Call ``serve_forever`` to start handling requests.
+    """
+    family, bind = parse_address(address)
+    server_class = UnixPooledHTTPServer if family == "unix" else PooledHTTPServer
+    server = server_class(bind, UnifierRequestHandler, workers=workers)
+    server.service = UnifierService(unifier, verbose=verbose)
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+def request(address: str, method: str, path: str, body=None, timeout: float = 3600):
+    """
+    Send a request to a server started with `make_server` and return the
+    decoded JSON response. Raises a RuntimeError if the server reports an error
+    or the reply is not a JSON object, e.g. from another server.
+    """
+    family, target = parse_address(address)
+    if family == "unix":
+        connection = _UnixHTTPConnection(target, timeout)
+    else:
+        connection = http.client.HTTPConnection(*target, timeout=timeout)
+
+    try:
+        encoded = None if body is None else json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        connection.request(method, path, body=encoded, headers=headers)
+        response = connection.getresponse()
+        data = response.read()
+    finally:
+        connection.close()
+
+    try:
+        result = json.loads(data)
+    except ValueError:
+        result = None
+    if not isinstance(result, dict):
+        raise RuntimeError(
+            f"The reply (HTTP status {response.status}) is not a JSON object, "
+            f"{address} may not be a hugo-unifier server."
+        )
+    if response.status != 200:
+        raise RuntimeError(result.get("error", f"HTTP status {response.status}"))
+    return result
+
+
+def request_changes(
+    address: str, paths: Dict[str, str]
+) -> Tuple[List[str], Dict[str, List[list]]]:
+    """
+    Get the changes for .h5ad files from a server.
+
+    Returns
+    -------
+    Tuple[List[str], Dict[str, List[list]]]
+        The column names and the rows of the changes of each dataset.
+    """
+    paths = {name: os.path.abspath(path) for name, path in paths.items()}
+    result = request(address, "POST", "/changes", {"paths": paths})
+    return result["columns"], result["changes"]
@@ -0,0 +1,276 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import anndata as ad
+import h5py
+import numpy as np
+import pandas as pd
+from anndata.io import read_elem, sparse_dataset, write_elem
+from scipy import sparse
+
+from hugo_unifier.apply_changes import apply_changes
+from hugo_unifier.instrumentation import count, span
+from hugo_unifier.output import chunk_shape
+from hugo_unifier.symbol_table import read_var_names
+
+# Key in .uns under which each shard records its position in the input
+SHARD_KEY = "hugo_unifier_shard"
+
+
+def shard_range(n_obs: int, shard: int, n_shards: int) -> Tuple[int, int]:
+    """
+    Return the obs row range ``[start, stop)`` of a shard.
+
+    The rows are split into ``n_shards`` contiguous ranges whose sizes differ
+    by at most one row.
+    """
+    assert n_shards >= 1, "The number of shards must be at least 1."
+    assert (
+        0 <= shard < n_shards
+    ), f"Shard {shard} is not valid. Choose from 0 to {n_shards - 1}."
+    return n_obs * shard // n_shards, n_obs * (shard + 1) // n_shards
+
+
+def read_shard(path: str, shard: int, n_shards: int) -> ad.AnnData:
+    """
+    Read the rows of one shard of an .h5ad file.
+
+    The file is opened in backed mode, so that only the rows of the shard are
+    read. The position of the shard is recorded in ``.uns['hugo_unifier_shard']``
+    for `merge_shards`.
+    """
+    adata = ad.read_h5ad(path, backed="r")
+    start, stop = shard_range(adata.n_obs, shard, n_shards)
+    try:
+        shard_adata = adata[start:stop].to_memory()
+    finally:
+        adata.file.close()
+
+    shard_adata.uns[SHARD_KEY] = {
+        "shard": shard,
+        "n_shards": n_shards,
+        "start": start,
+        "stop": stop,
+        "n_obs": adata.n_obs,
+    }
+    count("shard_rows", stop - start)
+    return shard_adata
+
+
+def apply_shard(
+    path: str,
+    df_changes: pd.DataFrame,
+    shard: int,
+    n_shards: int,
+    merge: str = "sum",
+) -> ad.AnnData:
+    """
+    Apply changes to one shard of an .h5ad file.
+
+    Every shard of a file gets the same var layout from the same changes, so
+    the shards can be processed independently (e.g. on different nodes) and
+    appended by `merge_shards`.
+
+    Parameters
+    ----------
+    path : str
+        Path to the input .h5ad file.
+    df_changes : pd.DataFrame
+        Changes of the dataset, see `hugo_unifier.apply_changes`.
+    shard : int
+        Index of the shard, from 0 to ``n_shards - 1``.
+    n_shards : int
+        Number of shards the obs rows are split into.
+    merge : str
+        How merged columns are combined, 'sum' or 'max'.
+
+    Returns
+    -------
+    ad.AnnData
+        The changed rows of the shard.
+    """
+    with span("read_shard"):
+        adata = read_shard(path, shard, n_shards)
+    with span("apply_changes", profile=True):
+        return apply_changes(adata, df_changes, merge=merge)
+
+
+def _shard_info(path: str) -> Dict[str, int]:
+    with h5py.File(path, "r") as f:
+        assert (
+            "uns" in f and SHARD_KEY in f["uns"]
+        ), f"{path} is not a shard written by apply-shard."
+        info = read_elem(f["uns"][SHARD_KEY])
+    return {k: int(v) for k, v in info.items()}
+
+
+def order_shards(paths: Iterable[str]) -> List[str]:
+    """
+    Order shards by their index and check that they cover the whole input
+    with identical var layouts.
+    """
+    infos = sorted(
+        ((_shard_info(path), path) for path in paths), key=lambda x: x[0]["shard"]
+    )
+    assert len(infos) > 0, "No shards to merge."
+
+    n_shards = infos[0][0]["n_shards"]
+    indices = [info["shard"] for info, _ in infos]
+    assert indices == list(
+        range(n_shards)
+    ), f"Expected shards 0 to {n_shards - 1}, got {indices}."
+    stop = 0
+    for info, path in infos:
+        assert info["start"] == stop, f"Shard {path} does not continue at row {stop}."
+        stop = info["stop"]
+    assert stop == infos[0][0]["n_obs"], "The shards do not cover all rows."
+
+    var_names = read_var_names(infos[0][1])
+    for _, path in infos[1:]:
+        assert read_var_names(path).equals(
+            var_names
+        ), f"Shard {path} has a different var layout than the first shard."
+    return [path for _, path in infos]
+
+
+def _concat_obsm(parts: List[Dict[str, object]]) -> Dict[str, object]:
+    obsm = {}
+    for key, first in parts[0].items():
+        values = [part[key] for part in parts]
+        if isinstance(first, pd.DataFrame):
+            obsm[key] = pd.concat(values)
+        elif sparse.issparse(first):
+            obsm[key] = sparse.vstack(values, format=first.format)
+        else:
+            obsm[key] = np.concatenate(values)
+    return obsm
+
+
+def _create_array(group, key: str, shape: Tuple[int, ...], dtype):
+    chunks = chunk_shape(shape, np.dtype(dtype).itemsize) if shape[0] else None
+    if isinstance(group, h5py.Group):
+        return group.create_dataset(key, shape=shape, dtype=dtype, chunks=chunks)
+    # zarr
+    create = getattr(group, "create_array", None) or group.create_dataset
+    return create(key, shape=shape, dtype=dtype, chunks=chunks or shape)
+
+
+def _merge_matrix(root, key: str, paths: List[str], n_obs: int) -> None:
+    """Append the rows of a matrix of each shard, reading each shard once."""
+    parent, _, name = key.rpartition("/")
+    group = root[parent] if parent else root
+    if name in group:
+        # zarr stores a placeholder for the missing X of the skeleton
+        del group[name]
+    offset = 0
+    for path in paths:
+        with h5py.File(path, "r") as f:
+            matrix = read_elem(f[key])
+
+        if sparse.issparse(matrix):
+            assert (
+                matrix.format == "csr"
+            ), f"{key} is a {matrix.format} matrix, only CSR matrices can be merged by rows."
+            if offset == 0:
+                write_elem(group, name, matrix)
+            else:
+                sparse_dataset(group[name]).append(matrix)
+        else:
+            if offset == 0:
+                dataset = _create_array(
+                    group, name, (n_obs, *matrix.shape[1:]), matrix.dtype
+                )
+                dataset.attrs["encoding-type"] = "array"
+                dataset.attrs["encoding-version"] = "0.2.0"
+            group[name][offset : offset + matrix.shape[0]] = matrix
+        offset += matrix.shape[0]
+    count("merged_matrices")
+
+
+def merge_shards(
+    paths: Iterable[str], output: str, format: Optional[str] = None
+) -> None:
+    """
+    Merge the shards of an input into one .h5ad file or zarr store.
+
+    The annotations (obs, obsm) of the shards are concatenated, the var
+    annotations and uns are taken from the first shard. X, the layers and
+    raw X are appended shard by shard, so each shard is read once and only
+    one shard is held in memory at a time. Pairwise obs annotations (obsp)
+    do not survive sharding and are dropped.
+
+    Parameters
+    ----------
+    paths : Iterable[str]
+        Paths to the shards written by ``hugo-unifier apply-shard``, in any
+        order.
+    output : str
+        Path of the merged output.
+    format : str, optional
+        'h5ad' or 'zarr'. Defaults to 'zarr' for paths ending with '.zarr' and
+        to 'h5ad' otherwise.
+    """
+    if format is None:
+        format = "zarr" if output.rstrip("/").endswith(".zarr") else "h5ad"
+    assert format in ("h5ad", "zarr"), f"Format {format} is not valid."
+
+    with span("order_shards"):
+        paths = order_shards(paths)
+
+    with span("merge_annotations"):
+        obs, obsm = [], []
+        for path in paths:
+            with h5py.File(path, "r") as f:
+                obs.append(read_elem(f["obs"]))
+                obsm.append(read_elem(f["obsm"]) if "obsm" in f else {})
+        with h5py.File(paths[0], "r") as f:
+            first = {
+                key: read_elem(f[key])
+                for key in ["var", "uns", "varm", "varp"]
+                if key in f
+            }
+            raw = (
+                {key: read_elem(f["raw"][key]) for key in f["raw"] if key != "X"}
+                if "raw" in f
+                else None
+            )
+            keys = [key for key in ["X", "raw/X"] if key in f]
+            if "layers" in f:
+                keys.extend(f"layers/{name}" for name in f["layers"])
+        first["uns"].pop(SHARD_KEY, None)
+
+        skeleton = ad.AnnData(obs=pd.concat(obs), obsm=_concat_obsm(obsm), **first)
+        if format == "zarr":
+            ad.io.write_zarr(output, skeleton)
+        else:
+            skeleton.write_h5ad(output)
+    count("merged_shards", len(paths))
+
+    if format == "zarr":
+        import zarr
+
+        # Bypass the consolidated metadata, it is updated after the writes
+        kwargs = {}
+        if int(zarr.__version__.split(".")[0]) >= 3:
+            kwargs["use_consolidated"] = False
+        root = zarr.open_group(output, mode="a", **kwargs)
+    else:
+        root = h5py.File(output, "a")
+    try:
+        if raw is not None:
+            if "raw" in root:
+                # zarr stores a placeholder for the missing raw of the skeleton
+                del root["raw"]
+            group = root.create_group("raw")
+            group.attrs["encoding-type"] = "raw"
+            group.attrs["encoding-version"] = "0.1.0"
+            for key, value in raw.items():
+                write_elem(group, key, value)
+        for key in keys:
+            with span("merge_matrices"):
+                _merge_matrix(root, key, paths, skeleton.n_obs)
+    finally:
+        if format == "h5ad":
+            root.close()
+
+    if format == "zarr":
+        zarr.consolidate_metadata(output)
@@ -1,4 +1,8 @@
-from typing import Callable, Dict
+import json
+import re
+from typing import Callable, Dict, List
+
+import pandas as pd
 
 
 def identity(symbol: str) -> str:
@@ -22,8 +26,189 @@ def dot_to_dash(symbol: str) -> str:
     return symbol.replace(".", "-")
 
 
-manipulation_mapping: Dict[str, Callable[[str], str]] = {
-    "identity": identity,
-    "discard_after_dot": discard_after_dot,
-    "dot_to_dash": dot_to_dash,
+def regex_manipulation(
+    pattern: str, replacement: str = ""
+) -> Callable[[pd.Series], pd.Series]:
+    """
+    Create a vectorized manipulation that replaces all matches of a regular expression.
+
+    Parameters
+    ----------
+    pattern : str
+        Regular expression to search for.
+    replacement : str
+        Replacement string, may contain group references like ``\\1``.
+
+    Returns
+    -------
+    Callable[[pd.Series], pd.Series]
+        Manipulation that operates on a Series of symbols.
+    """
+    compiled = re.compile(pattern)
+
+    def manipulation(symbols: pd.Series) -> pd.Series:
+        return symbols.str.replace(compiled, replacement, regex=True)
+
+    manipulation.pattern = pattern
+    manipulation.replacement = replacement
+    manipulation.vectorized = True
+    return manipulation
+
+
+def scalar_manipulation(
+    function: Callable[[str], str],
+) -> Callable[[pd.Series], pd.Series]:
+    """
+    Wrap a per-symbol function into a manipulation that operates on a Series.
+    """
+
+    def manipulation(symbols: pd.Series) -> pd.Series:
+        return symbols.map(function)
+
+    manipulation.function = function
+    manipulation.vectorized = True
+    return manipulation
+
+
+def vectorized_manipulation(
+    function: Callable[[pd.Series], pd.Series],
+) -> Callable[[pd.Series], pd.Series]:
+    """
+    Mark a function that operates on a whole Series as a manipulation.
+    """
+
+    def manipulation(symbols: pd.Series) -> pd.Series:
+        return function(symbols)
+
+    manipulation.function = function
+    manipulation.vectorized = True
+    return manipulation
+
+
+def as_manipulation(
+    manipulation: Callable,
+) -> Callable[[pd.Series], pd.Series]:
+    """
+    Return a manipulation that operates on a Series.
+
+    Callables that were not created by `regex_manipulation`,
+    `scalar_manipulation` or `vectorized_manipulation` (e.g. per-symbol
+    functions added to `manipulation_mapping` directly, as in earlier versions)
+    are treated as per-symbol functions and wrapped with `scalar_manipulation`.
+    """
+    if getattr(manipulation, "vectorized", False):
+        return manipulation
+    return scalar_manipulation(manipulation)
+
+
+def _identity(symbols: pd.Series) -> pd.Series:
+    return symbols
+
+
+def _uppercase(symbols: pd.Series) -> pd.Series:
+    return symbols.str.upper()
+
+
+# All manipulations operate on a Series of distinct symbols and return a Series
+# of the same length with the manipulated symbols. Plain per-symbol functions
+# are still accepted, see `as_manipulation`.
+manipulation_mapping: Dict[str, Callable[[pd.Series], pd.Series]] = {
+    "identity": vectorized_manipulation(_identity),
+    "discard_after_dot": regex_manipulation(r"\..*"),
+    "dot_to_dash": regex_manipulation(r"\.", "-"),
+    "strip_as_suffix": regex_manipulation(r"-AS\d*$"),
+    "strip_numeric_suffix": regex_manipulation(r"_\d+$"),
+    "strip_ensembl_version": regex_manipulation(r"^(ENS[A-Z]*G\d+)\.\d+$", r"\1"),
+    "uppercase": vectorized_manipulation(_uppercase),
 }
+
+default_manipulations: List[str] = ["identity", "dot_to_dash", "discard_after_dot"]
+
+
+def register_manipulation(
+    name: str,
+    manipulation: Callable,
+    vectorized: bool = True,
+    overwrite: bool = False,
+) -> None:
+    """
+    Register a manipulation so that it can be selected by name.
+
+    Parameters
+    ----------
+    name : str
+        Name of the manipulation.
+    manipulation : Callable
+        Function that takes a Series of symbols and returns the manipulated Series,
+        or a function operating on a single symbol if ``vectorized`` is False.
+    vectorized : bool
+        Whether ``manipulation`` operates on a whole Series.
+    overwrite : bool
+        Whether an existing manipulation with the same name may be replaced.
+    """
+    assert (
+        overwrite or name not in manipulation_mapping
+    ), f"Manipulation {name} is already registered."
+
+    if vectorized:
+        manipulation = vectorized_manipulation(manipulation)
+    else:
+        manipulation = scalar_manipulation(manipulation)
+    manipulation_mapping[name] = manipulation
+
+
+def register_regex_manipulation(
+    name: str, pattern: str, replacement: str = "", overwrite: bool = False
+) -> None:
+    """
+    Register a manipulation that replaces all matches of a regular expression.
+    """
+    register_manipulation(
+        name, regex_manipulation(pattern, replacement), overwrite=overwrite
+    )
+
+
+def load_manipulations(path: str, overwrite: bool = False) -> List[str]:
+    """
+    Register the regular expression manipulations defined in a JSON file.
+
+    The file maps manipulation names to a pattern and an optional replacement,
+    e.g. ``{"strip_dash_number": {"pattern": "-\\\\d+$", "replacement": ""}}``.
+
+    Returns
+    -------
+    List[str]
+        Names of the registered manipulations, in the order of the file.
+    """
+    with open(path) as f:
+        config = json.load(f)
+
+    for name, definition in config.items():
+        register_regex_manipulation(
+            name,
+            definition["pattern"],
+            definition.get("replacement", ""),
+            overwrite=overwrite,
+        )
+
+    return list(config)
+
+
+def apply_manipulation(
+    symbols: pd.Series, manipulation: Callable[[pd.Series], pd.Series]
+) -> pd.DataFrame:
+    """
+    Apply a manipulation to each distinct symbol exactly once.
+
+    Per-symbol functions are accepted as well, see `as_manipulation`.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with the columns 'original' and 'input' (the manipulated symbol).
+    """
+    original = pd.Series(pd.unique(symbols), dtype=object)
+    manipulated = as_manipulation(manipulation)(original)
+    return pd.DataFrame(
+        {"original": original.to_numpy(), "input": manipulated.to_numpy()}
+    )
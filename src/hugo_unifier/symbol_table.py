@@ -0,0 +1,191 @@
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from hugo_unifier.instrumentation import count, span
+
+SymbolInput = Union[Mapping, Iterable[Tuple[str, Iterable[str]]]]
+
+
+class SymbolTable(Mapping):
+    """
+    Symbols of multiple datasets, interned into a shared vocabulary.
+
+    Each distinct symbol is stored once, and each dataset only keeps the integer
+    codes of its symbols. The table is a read-only mapping from dataset names to
+    their symbols, which are decoded on access.
+
+    Use `intern_symbols` to create a table.
+    """
+
+    def __init__(self):
+        self._vocabulary: Dict[str, int] = {}
+        self._symbols = np.empty(0, dtype=object)
+        self.codes: Dict[str, np.ndarray] = {}
+
+    def add(self, name: str, symbols) -> None:
+        """
+        Intern the symbols of a dataset.
+
+        Parameters
+        ----------
+        name : str
+            Name of the dataset.
+        symbols : array-like
+            Symbols of the dataset, e.g. a list, a NumPy or Arrow string array or
+            a pandas Index. Missing values are skipped.
+        """
+        assert name not in self.codes, f"Dataset name {name} is duplicated."
+        codes = self.intern(symbols)
+        self.codes[name] = codes[codes >= 0]
+
+    def intern(self, symbols) -> np.ndarray:
+        """
+        Add symbols to the vocabulary, without assigning them to a dataset.
+
+        This is used for symbols that are not part of any dataset, e.g. the
+        approved symbols returned by a resolver.
+
+        Parameters
+        ----------
+        symbols : array-like
+            Symbols, e.g. a list, a NumPy or Arrow string array or a pandas
+            Index or Series.
+
+        Returns
+        -------
+        np.ndarray
+            The code of each symbol, or -1 for missing values.
+        """
+        if hasattr(symbols, "to_pandas"):
+            # Arrow arrays
+            symbols = symbols.to_pandas()
+        if not isinstance(symbols, (np.ndarray, pd.Index, pd.Series)):
+            symbols = np.asarray(list(symbols), dtype=object)
+
+        local_codes, uniques = pd.factorize(symbols)
+        vocabulary = self._vocabulary
+        mapped = np.fromiter(
+            (vocabulary.setdefault(str(s), len(vocabulary)) for s in uniques),
+            dtype=np.int32,
+            count=len(uniques),
+        )
+        # Missing values have the local code -1, which selects the appended -1
+        return np.append(mapped, np.int32(-1))[local_codes]
+
+    @property
+    def vocabulary(self) -> np.ndarray:
+        """All distinct symbols, indexed by their code."""
+        if len(self._symbols) != len(self._vocabulary):
+            self._symbols = np.fromiter(
+                self._vocabulary, dtype=object, count=len(self._vocabulary)
+            )
+        return self._symbols
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.vocabulary[self.codes[name]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.codes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+def intern_symbols(symbols: SymbolInput) -> SymbolTable:
+    """
+    Intern the symbols of multiple datasets into a `SymbolTable`.
+
+    Parameters
+    ----------
+    symbols : Mapping or Iterable[Tuple[str, array-like]]
+        Symbols of each dataset, either as a mapping from dataset names to
+        symbols or as an iterable (e.g. a generator) of ``(name, symbols)``
+        pairs. Pairs are consumed one at a time, so only the interned codes of
+        the datasets are kept in memory.
+
+    Returns
+    -------
+    SymbolTable
+        The interned symbols. Tables are returned as they are.
+    """
+    if isinstance(symbols, SymbolTable):
+        return symbols
+    if isinstance(symbols, Mapping):
+        symbols = symbols.items()
+
+    table = SymbolTable()
+    for name, dataset_symbols in symbols:
+        table.add(name, dataset_symbols)
+
+    count("interned_symbols", len(table.vocabulary))
+    return table
+
+
+def read_var_names(path: str) -> pd.Index:
+    """
+    Read the var index of an .h5ad file without loading anything else.
+
+    Parameters
+    ----------
+    path : str
+        Path to the .h5ad file.
+
+    Returns
+    -------
+    pd.Index
+        The var names of the file.
+    """
+    # h5py is only needed here, so it is not imported with the module
+    import h5py
+
+    with h5py.File(path, "r") as f:
+        var = f["var"]
+        if isinstance(var, h5py.Dataset):
+            # Compound dataset written by anndata < 0.7, the first field is the
+            # index
+            values = var.fields(var.dtype.names[0])[...]
+            return pd.Index(
+                [v.decode("utf-8") if isinstance(v, bytes) else v for v in values],
+                dtype=object,
+            )
+        if "_index" in var.attrs:
+            index = var[var.attrs["_index"]]
+            if isinstance(index, h5py.Group):
+                # Nullable string arrays, written by newer versions of anndata
+                from anndata.io import read_elem
+
+                return pd.Index(read_elem(index), dtype=object, name=None)
+            return pd.Index(index.asstr()[...], dtype=object, name=None)
+
+    # Any other layout is left to anndata
+    import anndata as ad
+
+    adata = ad.read_h5ad(path, backed="r")
+    try:
+        return pd.Index(adata.var_names, dtype=object, name=None)
+    finally:
+        adata.file.close()
+
+
+def read_h5ad_symbols(paths: Dict[str, str]) -> Iterator[Tuple[str, pd.Index]]:
+    """
+    Read the var index of .h5ad files one at a time.
+
+    Parameters
+    ----------
+    paths : Dict[str, str]
+        Paths of the .h5ad files by dataset name.
+
+    Yields
+    ------
+    Tuple[str, pd.Index]
+        The name and var index of each dataset, e.g. as input of
+        `hugo_unifier.get_changes`.
+    """
+    for name, path in paths.items():
+        with span("read_input"):
+            var_names = read_var_names(path)
+        yield name, var_names
@@ -0,0 +1,233 @@
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+import anndata as ad
+import networkx as nx
+import pandas as pd
+import requests
+
+from hugo_unifier.apply_changes import apply_changes
+from hugo_unifier.get_changes import get_changes
+from hugo_unifier.hugo_fetch import fetch_symbol_check_results
+from hugo_unifier.id_resolution import default_id_types
+from hugo_unifier.instrumentation import count
+from hugo_unifier.result_cache import ResultCache
+from hugo_unifier.symbol_manipulations import (
+    default_manipulations,
+    manipulation_mapping,
+)
+from hugo_unifier.symbol_table import SymbolInput
+from hugo_unifier.var_mapping import MERGE_METHODS
+
+
+class SymbolCache:
+    """
+    In-memory LRU of the resolution rows of each symbol, wrapping a resolver.
+
+    Only symbols that are not cached are passed on to the resolver. Symbols
+    that are missing from the resolver's result (e.g. because a request failed)
+    are not cached. All methods can be called from multiple threads.
+
+    Parameters
+    ----------
+    resolver : Callable[[List[str]], pd.DataFrame]
+        Resolver to wrap, see `hugo_unifier.get_changes`.
+    maxsize : int
+        Maximum number of symbols to keep.
+    """
+
+    def __init__(
+        self, resolver: Callable[[List[str]], pd.DataFrame], maxsize: int = 1 << 17
+    ):
+        self.__wrapped__ = resolver
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._rows: "OrderedDict[str, Tuple[tuple, List[tuple]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def metadata(self) -> Optional[Dict[str, object]]:
+        return getattr(self.__wrapped__, "metadata", None)
+
+    def __call__(self, symbols: List[str]) -> pd.DataFrame:
+        unique_symbols = list(dict.fromkeys(symbols))
+
+        cached = []
+        missing = []
+        with self._lock:
+            for symbol in unique_symbols:
+                entry = self._rows.get(symbol)
+                if entry is None:
+                    missing.append(symbol)
+                else:
+                    self._rows.move_to_end(symbol)
+                    cached.append(entry)
+            self.hits += len(cached)
+            self.misses += len(missing)
+        count("symbol_cache_hits", len(cached))
+        count("symbol_cache_misses", len(missing))
+
+        by_columns: Dict[tuple, List[tuple]] = {}
+        for columns, rows in cached:
+            by_columns.setdefault(columns, []).extend(rows)
+        frames = [
+            pd.DataFrame.from_records(rows, columns=list(columns))
+            for columns, rows in by_columns.items()
+        ]
+        if missing:
+            # Resolve outside of the lock, so that threads do not wait for each other
+            df = self.__wrapped__(missing)
+            frames.append(df)
+            self._store(df)
+
+        if not frames:
+            return self.__wrapped__([])
+        return pd.concat(frames, ignore_index=True)
+
+    def _store(self, df: pd.DataFrame) -> None:
+        if "input" not in df.columns:
+            return
+        columns = tuple(df.columns)
+        entries = {
+            symbol: (columns, list(group.itertuples(index=False, name=None)))
+            for symbol, group in df.groupby("input", sort=False)
+        }
+        with self._lock:
+            self._rows.update(entries)
+            while len(self._rows) > self.maxsize:
+                self._rows.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached symbols and reset the statistics."""
+        with self._lock:
+            self._rows.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of hits, misses and cached symbols."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._rows),
+                "maxsize": self.maxsize,
+            }
+
+
+class Unifier:
+    """
+    Reusable configuration and warm caches for repeated unification.
+
+    A unifier validates its manipulations once, keeps a pooled HTTP session to
+    genenames.org (or uses a local resolver such as
+    `hugo_unifier.hgnc_index.HGNCIndex`) and remembers the resolution of every
+    symbol it has seen. A single instance can be shared by multiple threads.
+
+    Parameters
+    ----------
+    manipulations : List[str]
+        Manipulations to apply, see `hugo_unifier.get_changes`.
+    resolver : Callable[[List[str]], pd.DataFrame], optional
+        Resolver to look up symbols with. Defaults to the genenames.org API,
+        queried through a pooled session.
+    id_table : pd.DataFrame, optional
+        HGNC cross-references used to resolve gene IDs. Defaults to the
+        cross-references of the resolver, if it provides them.
+    id_types : List[str]
+        Types of gene IDs to recognize.
+    cache : ResultCache, optional
+        On-disk store of complete results, see `hugo_unifier.get_changes`.
+    max_cached_symbols : int
+        Maximum number of symbols kept in the in-memory symbol cache.
+    pool_size : int
+        Maximum number of pooled connections to genenames.org.
+    merge : bool
+        Whether to merge unapproved symbols into their successor instead of
+        reporting a conflict, see `hugo_unifier.get_changes`.
+    merge_method : str
+        How merged columns are combined by `apply_changes`, 'sum' or 'max'.
+    """
+
+    def __init__(
+        self,
+        manipulations: List[str] = default_manipulations,
+        resolver: Optional[Callable[[List[str]], pd.DataFrame]] = None,
+        id_table: Optional[pd.DataFrame] = None,
+        id_types: List[str] = default_id_types,
+        cache: Optional[ResultCache] = None,
+        max_cached_symbols: int = 1 << 17,
+        pool_size: int = 10,
+        merge: bool = False,
+        merge_method: str = "sum",
+    ):
+        for manipulation in manipulations:
+            assert (
+                manipulation in manipulation_mapping
+            ), f"Manipulation {manipulation} is not valid. Choose from {list(manipulation_mapping.keys())}."
+
+        assert (
+            merge_method in MERGE_METHODS
+        ), f"Merge method {merge_method} is not valid. Choose from {MERGE_METHODS}."
+
+        self.session = None
+        if resolver is None:
+            self.session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=pool_size
+            )
+            self.session.mount("https://", adapter)
+            resolver = partial(fetch_symbol_check_results, session=self.session)
+
+        if id_table is None and hasattr(resolver, "xref_table"):
+            id_table = resolver.xref_table()
+
+        self.manipulations = list(manipulations)
+        self.resolver = resolver
+        self.id_table = id_table
+        self.id_types = list(id_types)
+        self.cache = cache
+        self.merge = merge
+        self.merge_method = merge_method
+        self.symbol_cache = SymbolCache(resolver, max_cached_symbols)
+
+    def get_changes(
+        self, symbols: SymbolInput
+    ) -> Tuple[nx.DiGraph, Dict[str, pd.DataFrame]]:
+        """
+        Get the changes for the symbols of each dataset, see
+        `hugo_unifier.get_changes`.
+        """
+        return get_changes(
+            symbols,
+            manipulations=self.manipulations,
+            resolver=self.symbol_cache,
+            id_table=self.id_table,
+            id_types=self.id_types,
+            cache=self.cache,
+            merge=self.merge,
+        )
+
+    def apply_changes(self, adata: ad.AnnData, df_changes: pd.DataFrame) -> ad.AnnData:
+        """
+        Apply the changes of a dataset, see `hugo_unifier.apply_changes`.
+        """
+        return apply_changes(adata, df_changes, merge=self.merge_method)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the statistics of the symbol cache."""
+        return self.symbol_cache.stats()
+
+    def close(self) -> None:
+        """Close the pooled HTTP session, if any."""
+        if self.session is not None:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
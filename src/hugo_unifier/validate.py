@@ -0,0 +1,239 @@
+from typing import Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+from hugo_unifier.instrumentation import count
+from hugo_unifier.symbol_table import read_var_names
+
+PROBLEM_COLUMNS = [
+    "dataset",
+    "row",
+    "severity",
+    "problem",
+    "action",
+    "symbol",
+    "new",
+    "message",
+]
+
+
+def validate_changes(
+    var_names: Iterable[str],
+    df_changes: pd.DataFrame,
+    dataset: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Check a change set against the var names of a dataset without applying it.
+
+    The changes are replayed on a set of the var names in the order in which
+    `hugo_unifier.apply_changes` applies them, so that every problem is found
+    at once instead of at the first failing assertion.
+
+    Errors (problems that make `apply_changes` fail):
+    - 'unknown_action': The action is neither 'rename', 'copy', 'merge' nor
+      'conflict'.
+    - 'missing_symbol': The symbol is not in the var names, or was renamed or
+      merged by an earlier change.
+    - 'existing_new': The new symbol of a rename or copy is already in the var
+      names, or was created by an earlier change.
+    - 'missing_new': The new symbol of a merge is not in the var names.
+    - 'merge_into_itself': The symbol of a merge is also its new symbol.
+    - 'duplicate_var_name': The symbol of a copy or the new symbol of a merge
+      occurs multiple times in the var names.
+
+    Warnings:
+    - 'chain': The symbol was created by an earlier change, so the result
+      depends on the order of the changes.
+    - 'duplicate_var_name': The symbol of a rename occurs multiple times in the
+      var names, so all of its columns are renamed.
+
+    Parameters
+    ----------
+    var_names : Iterable[str]
+        Var names of the dataset, e.g. from
+        `hugo_unifier.symbol_table.read_var_names`.
+    df_changes : pd.DataFrame
+        Changes of the dataset, with the columns 'action', 'symbol' and 'new'.
+    dataset : str, optional
+        Name of the dataset, used in the report.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per problem, with the columns 'dataset', 'row' (position of the
+        change), 'severity' ('error' or 'warning'), 'problem', 'action',
+        'symbol', 'new' and 'message'. Empty if the changes are valid.
+    """
+    var_names = pd.Index(var_names)
+    current = set(var_names)
+    duplicated = set(var_names[var_names.duplicated()])
+    # Symbols removed by an earlier change, and whether they were renamed or merged
+    removed: Dict[str, str] = {}
+    created = set()
+    problems: List[tuple] = []
+
+    def report(row, severity, problem, action, symbol, new, message):
+        problems.append((dataset, row, severity, problem, action, symbol, new, message))
+
+    rows = zip(df_changes["action"], df_changes["symbol"], df_changes["new"])
+    for row, (action, symbol, new) in enumerate(rows):
+        if action == "conflict":
+            continue
+        if action not in ("rename", "copy", "merge"):
+            report(
+                row,
+                "error",
+                "unknown_action",
+                action,
+                symbol,
+                new,
+                f"Action {action} not recognized. Expected 'rename', 'copy' or 'merge'.",
+            )
+            continue
+
+        valid = True
+        if symbol not in current:
+            valid = False
+            reason = (
+                f"it was {removed[symbol]} by an earlier change"
+                if symbol in removed
+                else "it is not in the var names"
+            )
+            report(
+                row,
+                "error",
+                "missing_symbol",
+                action,
+                symbol,
+                new,
+                f"Symbol {symbol} cannot be changed because {reason}.",
+            )
+        elif symbol in created:
+            report(
+                row,
+                "warning",
+                "chain",
+                action,
+                symbol,
+                new,
+                f"Symbol {symbol} was created by an earlier change, the result depends on the order of the changes.",
+            )
+        elif symbol in duplicated:
+            if action == "copy":
+                valid = False
+                report(
+                    row,
+                    "error",
+                    "duplicate_var_name",
+                    action,
+                    symbol,
+                    new,
+                    f"Symbol {symbol} cannot be copied because it occurs multiple times in the var names.",
+                )
+            else:
+                report(
+                    row,
+                    "warning",
+                    "duplicate_var_name",
+                    action,
+                    symbol,
+                    new,
+                    f"Symbol {symbol} occurs multiple times in the var names, all of them are renamed.",
+                )
+
+        if action == "merge":
+            if symbol == new:
+                valid = False
+                report(
+                    row,
+                    "error",
+                    "merge_into_itself",
+                    action,
+                    symbol,
+                    new,
+                    f"Symbol {symbol} cannot be merged into itself.",
+                )
+            elif new not in current:
+                valid = False
+                report(
+                    row,
+                    "error",
+                    "missing_new",
+                    action,
+                    symbol,
+                    new,
+                    f"Symbol {symbol} cannot be merged into {new} because {new} is not in the var names.",
+                )
+            elif new in duplicated:
+                valid = False
+                report(
+                    row,
+                    "error",
+                    "duplicate_var_name",
+                    action,
+                    symbol,
+                    new,
+                    f"Symbol {symbol} cannot be merged into {new} because {new} occurs multiple times in the var names.",
+                )
+        elif new in current:
+            valid = False
+            reason = (
+                "an earlier change created it"
+                if new in created
+                else "it is already in the var names"
+            )
+            report(
+                row,
+                "error",
+                "existing_new",
+                action,
+                symbol,
+                new,
+                f"New symbol {new} cannot be created because {reason}.",
+            )
+
+        if not valid:
+            continue
+        if action in ("rename", "merge"):
+            current.discard(symbol)
+            removed[symbol] = "renamed" if action == "rename" else "merged"
+        if action != "merge":
+            current.add(new)
+            created.add(new)
+
+    df = pd.DataFrame.from_records(problems, columns=PROBLEM_COLUMNS)
+    count("changes_validated", len(df_changes))
+    count("validation_errors", int((df["severity"] == "error").sum()))
+    count("validation_warnings", int((df["severity"] == "warning").sum()))
+    return df
+
+
+def validate_datasets(
+    datasets: Dict[str, Union[str, Iterable[str]]],
+    changes: Dict[str, pd.DataFrame],
+) -> pd.DataFrame:
+    """
+    Check the change sets of multiple datasets, see `validate_changes`.
+
+    Parameters
+    ----------
+    datasets : Dict[str, Union[str, Iterable[str]]]
+        Path to the .h5ad file or var names of each dataset. Files are only
+        read up to their var index.
+    changes : Dict[str, pd.DataFrame]
+        Changes of each dataset, e.g. as returned by `hugo_unifier.get_changes`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The problems of all datasets.
+    """
+    problems = []
+    for name, df_changes in changes.items():
+        assert name in datasets, f"No input for the changes of dataset {name}."
+        var_names = datasets[name]
+        if isinstance(var_names, str):
+            var_names = read_var_names(var_names)
+        df = validate_changes(var_names, df_changes, dataset=name)
+        problems.extend(df.itertuples(index=False, name=None))
+    return pd.DataFrame.from_records(problems, columns=PROBLEM_COLUMNS)
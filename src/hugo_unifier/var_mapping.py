@@ -0,0 +1,202 @@
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from hugo_unifier.instrumentation import count
+
+ACTIONS = ["rename", "copy", "merge"]
+MERGE_METHODS = ["sum", "max"]
+
+
+class VarMapping:
+    """
+    Mapping from the var columns of a dataset to its columns after a change set.
+
+    The mapping is a sparse ``(n_old, n_new)`` matrix ``M`` with a one where an
+    old column contributes to a new one, so that ``X @ M`` applies all changes
+    at once: a rename or copy selects an old column, a merge adds up multiple
+    old columns.
+
+    Use `compile_var_mapping` to create a mapping.
+    """
+
+    def __init__(self, sources: List[List[int]], var_names: List[str], n_old: int):
+        self.sources = sources
+        self.var_names = pd.Index(var_names, dtype=object)
+        self.n_old = n_old
+
+        # The sources of each new column are the row indices of its CSC column
+        indptr = np.zeros(len(sources) + 1, dtype=np.int64)
+        np.cumsum([len(s) for s in sources], out=indptr[1:])
+        indices = np.fromiter(
+            (i for s in sources for i in s), dtype=np.int64, count=indptr[-1]
+        )
+        self.matrix = sparse.csc_matrix(
+            (np.ones(len(indices), dtype=np.float32), indices, indptr),
+            shape=(n_old, len(sources)),
+        )
+
+    @property
+    def first_sources(self) -> np.ndarray:
+        """The first old column of each new column, whose annotations it keeps."""
+        return np.fromiter((s[0] for s in self.sources), dtype=np.int64)
+
+    @property
+    def is_selection(self) -> bool:
+        """Whether each new column is exactly one old column (no merges)."""
+        return all(len(s) == 1 for s in self.sources)
+
+    def _nth_source(self, n: int):
+        """
+        Return the matrix selecting the n-th old column of each new column, and
+        the mask of the new columns that have an n-th old column.
+        """
+        mask = np.fromiter((len(s) > n for s in self.sources), dtype=bool)
+        columns = np.flatnonzero(mask)
+        rows = [self.sources[k][n] for k in columns]
+        matrix = sparse.csc_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=self.matrix.shape,
+        )
+        return matrix, mask
+
+    def apply(self, matrix, merge: str = "sum"):
+        """
+        Map the columns of a dense or sparse matrix.
+
+        Parameters
+        ----------
+        matrix : np.ndarray or sparse matrix
+            Matrix with one column per old var, e.g. X or a layer.
+        merge : str
+            How merged columns are combined, 'sum' or 'max'.
+
+        Returns
+        -------
+        np.ndarray or sparse matrix
+            Matrix with one column per new var, of the same type and format.
+        """
+        assert (
+            merge in MERGE_METHODS
+        ), f"Merge method {merge} is not valid. Choose from {MERGE_METHODS}."
+        assert (
+            matrix.shape[1] == self.n_old
+        ), f"Matrix has {matrix.shape[1]} columns, expected {self.n_old}."
+
+        if self.is_selection:
+            # Renames and copies only, a column selection keeps the dtype and
+            # is cheaper than a product
+            return matrix[:, self.first_sources]
+
+        if merge == "sum":
+            result = matrix @ self.matrix.astype(matrix.dtype)
+        else:
+            first, _ = self._nth_source(0)
+            result = matrix @ first.astype(matrix.dtype)
+            for n in range(1, max(len(s) for s in self.sources)):
+                nth, mask = self._nth_source(n)
+                other = matrix @ nth.astype(matrix.dtype)
+                maximum = (
+                    result.maximum(other)
+                    if sparse.issparse(result)
+                    else np.maximum(result, other)
+                )
+                # Only new columns with an n-th source change
+                diff = (maximum - result) @ sparse.diags(mask.astype(matrix.dtype))
+                result = result + diff
+
+        if sparse.issparse(matrix):
+            return result.asformat(matrix.format)
+        return np.asarray(result)
+
+
+def compile_var_mapping(
+    var_names: Iterable[str], df_changes: pd.DataFrame, strict: bool = True
+) -> VarMapping:
+    """
+    Compile a change set into a `VarMapping`.
+
+    The changes are replayed in order on the var names, like
+    `hugo_unifier.apply_changes` applies them:
+    - 'rename': The column of the symbol is renamed to the new symbol.
+    - 'copy': A column with the new symbol is added as a copy of the symbol.
+    - 'merge': The column of the symbol is combined with the existing column of
+      the new symbol and removed.
+    - 'conflict': Skipped.
+
+    Parameters
+    ----------
+    var_names : Iterable[str]
+        Var names of the dataset.
+    df_changes : pd.DataFrame
+        Changes of the dataset, with the columns 'action', 'symbol' and 'new'.
+    strict : bool
+        Whether changes that cannot be applied (e.g. to a missing symbol) raise
+        a ValueError. Otherwise they are skipped.
+
+    Returns
+    -------
+    VarMapping
+        The mapping from the old to the new var columns.
+    """
+    names = list(var_names)
+    n_old = len(names)
+    sources: List[List[int]] = [[i] for i in range(n_old)]
+    alive = [True] * n_old
+    positions: Dict[str, List[int]] = {}
+    for i, name in enumerate(names):
+        positions.setdefault(name, []).append(i)
+
+    rows = zip(df_changes["action"], df_changes["symbol"], df_changes["new"])
+    for action, symbol, new in rows:
+        if action == "conflict":
+            count("conflicts_skipped")
+            continue
+
+        problem = None
+        if symbol not in positions:
+            problem = f"Symbol {symbol} not found in AnnData object."
+        elif action == "merge" and new not in positions:
+            problem = (
+                f"Symbol {new} to merge {symbol} into not found in AnnData object."
+            )
+        elif action != "merge" and new in positions:
+            problem = f"New symbol {new} already exists in AnnData object."
+        elif action not in ACTIONS:
+            problem = (
+                f"Action {action} not recognized. Expected 'rename', 'copy' or 'merge'."
+            )
+        elif action == "copy" and len(positions[symbol]) > 1:
+            problem = f"Symbol {symbol} cannot be copied because it occurs multiple times in the var names."
+        elif action == "merge" and symbol == new:
+            problem = f"Symbol {symbol} cannot be merged into itself."
+        elif action == "merge" and len(positions[new]) > 1:
+            problem = f"Symbol {symbol} cannot be merged into {new} because {new} occurs multiple times in the var names."
+        if problem is not None:
+            if strict:
+                raise ValueError(problem)
+            count("changes_skipped")
+            continue
+
+        if action == "rename":
+            for i in positions[symbol]:
+                names[i] = new
+            positions[new] = positions.pop(symbol)
+            count("symbols_renamed")
+        elif action == "copy":
+            positions[new] = [len(names)]
+            names.append(new)
+            sources.append(list(sources[positions[symbol][0]]))
+            alive.append(True)
+            count("columns_copied")
+        else:
+            target = positions[new][0]
+            for i in positions.pop(symbol):
+                sources[target].extend(sources[i])
+                alive[i] = False
+            count("symbols_merged")
+
+    kept = [i for i in range(len(names)) if alive[i]]
+    return VarMapping([sources[i] for i in kept], [names[i] for i in kept], n_old)
@@ -27,3 +27,27 @@ def uzzan_h5ad():
 def uzzan_csv():
     """Fixture for the uzzan.csv test file."""
     return Path("tests/data/uzzan.csv")
+
+
+@pytest.fixture(scope="session")
+def hgnc_tsv():
+    """Fixture for a small subset of the HGNC complete set."""
+    return Path("tests/data/hgnc_subset.tsv")
+
+
+@pytest.fixture(scope="session")
+def hgnc_index_path(hgnc_tsv, tmp_path_factory):
+    """Fixture for an HGNC index compiled from the HGNC subset."""
+    from hugo_unifier.hgnc_index import compile_hgnc_index
+
+    path = tmp_path_factory.mktemp("hgnc") / "hgnc.idx"
+    compile_hgnc_index(str(hgnc_tsv), str(path), release="test")
+    return path
+
+
+@pytest.fixture(scope="session")
+def hgnc_index(hgnc_index_path):
+    """Fixture for the opened HGNC index."""
+    from hugo_unifier.hgnc_index import HGNCIndex
+
+    return HGNCIndex(str(hgnc_index_path))
@@ -0,0 +1,131 @@
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+
+from hugo_unifier import get_changes
+from hugo_unifier.change_log import ChangeLog, reason
+from hugo_unifier.graph_manipulations import resolve_unapproved
+from hugo_unifier.hgnc_index import HGNCIndex, compile_hgnc_index
+from hugo_unifier.panels import Panels, PanelSet
+from hugo_unifier.symbol_table import intern_symbols
+
+
+def test_change_log_to_frames():
+    table = intern_symbols({"a": ["COX1"], "b": ["COX1"], "c": ["TP53"]})
+    panels = Panels(table)
+    # a and b share the first panel
+    ab = PanelSet(0b01, panels)
+    log = ChangeLog(table.vocabulary)
+
+    log.append(ab, "rename", 0, 1, reason("{symbol} to {new} in {shared}", shared=ab))
+    log.append(ab, "conflict", 1, None, reason("{symbol} in {sample}"))
+    log.append(PanelSet(0, panels), "rename", 1, 0, reason("never"))
+    log.append(None, "conflict", 0, None, reason("not in any dataset"))
+
+    frames = log.to_frames(["a", "b", "c"])
+    assert list(frames) == ["a", "b", "c"]
+    assert frames["a"].values.tolist() == [
+        ["rename", "COX1", "TP53", "COX1 to TP53 in {'a', 'b'}"],
+        ["conflict", "TP53", np.nan, "TP53 in a"],
+    ]
+    assert frames["b"]["reason"].tolist()[1] == "TP53 in b"
+    assert frames["c"].empty
+    assert list(frames["c"].columns) == ["action", "symbol", "new", "reason"]
+
+
+def test_nested_reasons():
+    log = ChangeLog()
+    outcome = reason("merging {symbol} into {new} in {sample}")
+    log.append(
+        {"a", "b"}, "merge", "COX1", "MT-CO1", reason("{outcome}.", outcome=outcome)
+    )
+
+    frames = log.to_frames(["a", "b"])
+    assert frames["a"]["reason"].tolist() == ["merging COX1 into MT-CO1 in a."]
+    assert frames["b"]["reason"].tolist() == ["merging COX1 into MT-CO1 in b."]
+
+
+def test_changes_share_categories(hgnc_index):
+    sample_symbols = {"sample1": ["COX1"], "sample2": ["MT-CO1", "COX1"]}
+
+    _, sample_changes = get_changes(sample_symbols, resolver=hgnc_index)
+
+    for column in ["action", "symbol", "new", "reason"]:
+        dtypes = {str(df[column].dtype) for df in sample_changes.values()}
+        assert dtypes == {"category"}
+        categories = [df[column].cat.categories for df in sample_changes.values()]
+        assert categories[0] is categories[1]
+
+
+def test_resolve_unapproved_dataframe():
+    G = nx.DiGraph()
+    G.add_node("COX1", type="original", samples={"sample1"})
+    G.add_node("MT-CO1", type="approvedSymbol", samples={"sample2"})
+    G.add_edge("COX1", "MT-CO1", type="previous_symbol")
+    df = pd.DataFrame(columns=["sample", "action", "symbol", "new", "reason"])
+
+    with pytest.warns(DeprecationWarning):
+        resolve_unapproved(G, df)
+
+    assert df.values.tolist() == [
+        [
+            "sample1",
+            "rename",
+            "COX1",
+            "MT-CO1",
+            "Previous symbol, rename because no sample contains both COX1 and MT-CO1",
+        ]
+    ]
+    assert G.nodes["MT-CO1"]["samples"] == {"sample1", "sample2"}
+
+
+@pytest.fixture(scope="module")
+def synthetic_index(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("synthetic")
+    tsv = directory / "hgnc.tsv"
+    with open(tsv, "w") as f:
+        f.write("hgnc_id\tsymbol\tstatus\tlocation\tprev_symbol\n")
+        for i in range(2000):
+            f.write(f"HGNC:{i}\tGENE{i}\tApproved\t1p\tOLD{i}\n")
+    path = directory / "hgnc.idx"
+    compile_hgnc_index(str(tsv), str(path), release="synthetic")
+    return HGNCIndex(str(path))
+
+
+def test_get_changes_memory(synthetic_index):
+    rng = np.random.default_rng(0)
+    symbols = {}
+    for dataset in range(200):
+        genes = rng.choice(2000, 1000, replace=False)
+        previous = rng.random(1000) < 0.2
+        symbols[f"d{dataset}"] = [
+            f"OLD{gene}" if p else f"GENE{gene}" for gene, p in zip(genes, previous)
+        ]
+
+    tracemalloc.start()
+    try:
+        # The datasets of each symbol, as plain sets
+        reference = {}
+        for dataset, dataset_symbols in symbols.items():
+            for symbol in dataset_symbols:
+                reference.setdefault(symbol, set()).add(dataset)
+        reference_bytes = tracemalloc.get_traced_memory()[0]
+        del reference
+
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        G, sample_changes = get_changes(
+            symbols, resolver=synthetic_index, manipulations=["identity"]
+        )
+        peak = tracemalloc.get_traced_memory()[1] - start
+    finally:
+        tracemalloc.stop()
+
+    assert sum(len(df) for df in sample_changes.values()) > 20000
+    assert isinstance(G.nodes["GENE0"]["samples"], PanelSet)
+    # Symbols are codes and the datasets of each node a bitmask of panels, so
+    # the whole run needs less memory than the datasets of each symbol as sets
+    assert peak < reference_bytes
@@ -1,5 +1,11 @@
 import subprocess
 import importlib.metadata
+import sys
+import time
+
+# Upper bound for the wall time of `hugo-unifier --help` in seconds. Importing
+# anndata/pandas/networkx eagerly takes well above this.
+HELP_TIME_BUDGET = 1.5
 
 
 def test_cli_version():
@@ -24,6 +30,35 @@ def test_cli_root_help():
     assert "apply" in result.stdout, "Expected 'apply' command not found in output."
 
 
+def test_cli_help_import_time():
+    """Test that the CLI starts without importing heavy dependencies."""
+    cmd = ["hugo-unifier", "--help"]
+
+    start = time.perf_counter()
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+
+    assert result.returncode == 0, f"Command failed with error: {result.stderr}"
+    assert (
+        elapsed < HELP_TIME_BUDGET
+    ), f"'hugo-unifier --help' took {elapsed:.2f}s (budget {HELP_TIME_BUDGET}s)."
+
+
+def test_cli_lazy_imports():
+    """Test that importing the CLI module does not import heavy dependencies."""
+    code = (
+        "import sys, hugo_unifier.main; "
+        "print(','.join(m for m in ('anndata', 'pandas', 'networkx') "
+        "if m in sys.modules))"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True
+    )
+    assert result.returncode == 0, f"Command failed with error: {result.stderr}"
+    assert result.stdout.strip() == "", f"Eagerly imported: {result.stdout.strip()}"
+
+
 def test_cli_get_help():
     """Test the CLI help for the 'get' command."""
     cmd = ["hugo-unifier", "get", "--help"]
@@ -1,5 +1,8 @@
 import subprocess
+
 import anndata as ad
+import pandas as pd
+import pytest
 
 
 def test_cli_apply_changes(uzzan_h5ad, uzzan_csv, tmp_path):
@@ -38,3 +41,58 @@ def test_cli_apply_changes(uzzan_h5ad, uzzan_csv, tmp_path):
     assert set(original_adata.obs.columns) == set(
         updated_adata.obs.columns
     ), "Observation columns changed after applying changes"
+
+
+@pytest.mark.parametrize(
+    "output, options",
+    [("out.zarr", []), ("out", ["--format", "zarr"])],
+)
+def test_cli_apply_lzf_zarr(uzzan_h5ad, uzzan_csv, tmp_path, output, options):
+    """lzf compression is rejected for zarr outputs before anything is read."""
+    cmd = [
+        "hugo-unifier",
+        "apply",
+        "--input",
+        str(uzzan_h5ad),
+        "--changes",
+        str(uzzan_csv),
+        "--output",
+        str(tmp_path / output),
+        "--compression",
+        "lzf",
+        *options,
+    ]
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+
+    assert result.returncode == 2
+    assert "Invalid value for '--compression'" in result.stderr
+    assert "Traceback" not in result.stderr
+    assert not (tmp_path / output).exists()
+
+
+def test_cli_apply_reports_conflicts(uzzan_h5ad, uzzan_csv, tmp_path):
+    """Skipped conflicts are reported, not silently dropped."""
+    changes = pd.read_csv(uzzan_csv)
+    symbol = ad.read_h5ad(uzzan_h5ad).var_names[0]
+    conflicts = pd.DataFrame(
+        [["conflict", symbol, None, "reason"]] * 2,
+        columns=["action", "symbol", "new", "reason"],
+    )
+    changes_file = tmp_path / "changes.csv"
+    pd.concat([changes, conflicts]).to_csv(changes_file, index=False)
+
+    cmd = [
+        "hugo-unifier",
+        "apply",
+        "--input",
+        str(uzzan_h5ad),
+        "--changes",
+        str(changes_file),
+        "--output",
+        str(tmp_path / "out.h5ad"),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+
+    assert result.returncode == 0, f"Command failed with error: {result.stderr}"
+    assert "Skipping 2 conflicts" in result.stdout
@@ -0,0 +1,98 @@
+import pickle
+import subprocess
+
+from hugo_unifier import get_changes
+from hugo_unifier.hgnc_index import HGNCIndex
+
+
+def test_lookup(hgnc_index):
+    df = hgnc_index.lookup(["COX1", "MT-CO1"])
+
+    # Same shape as the symbol checker: one row per matched gene
+    assert len(df) == 3
+    cox1 = df[df["input"] == "COX1"]
+    assert set(cox1["matchType"]) == {"Previous symbol"}
+    assert set(cox1["approvedSymbol"]) == {"MT-CO1", "PTGS1"}
+    assert df[df["input"] == "MT-CO1"]["matchType"].tolist() == ["Approved symbol"]
+
+
+def test_lookup_best_match_type_only(hgnc_index):
+    # COX2 is a previous symbol of MT-CO2 and an alias of PTGS2
+    df = hgnc_index.lookup(["COX2"])
+    assert df["matchType"].tolist() == ["Previous symbol"]
+    assert df["approvedSymbol"].tolist() == ["MT-CO2"]
+
+
+def test_lookup_case_insensitive_and_unmatched(hgnc_index):
+    df = hgnc_index.lookup(["c1orf112", "gapd", "NOT-A-GENE"])
+
+    assert df["input"].tolist() == ["c1orf112", "gapd", "NOT-A-GENE"]
+    assert df["approvedSymbol"].tolist()[:2] == ["C1orf112", "GAPDH"]
+    assert df["matchType"].tolist() == [
+        "Approved symbol",
+        "Alias symbol",
+        "Unmatched",
+    ]
+
+
+def test_metadata_and_pickle(hgnc_index):
+    assert hgnc_index.metadata["release"] == "test"
+    assert hgnc_index.metadata["genes"] == 9
+
+    restored = pickle.loads(pickle.dumps(hgnc_index))
+    assert isinstance(restored, HGNCIndex)
+    assert restored.lookup(["TP53"])["approvedSymbol"].tolist() == ["TP53"]
+
+
+def test_get_changes_with_index(hgnc_index):
+    sample_symbols = {"sample1": ["COX1"], "sample2": ["MT-CO1", "COX1"]}
+
+    _, sample_changes = get_changes(sample_symbols, resolver=hgnc_index)
+
+    sample1_changes = sample_changes["sample1"]
+    assert len(sample1_changes) == 1
+    assert sample1_changes.iloc[0]["action"] == "copy"
+    assert sample1_changes.iloc[0]["symbol"] == "COX1"
+    assert sample1_changes.iloc[0]["new"] == "MT-CO1"
+
+    sample2_changes = sample_changes["sample2"]
+    assert len(sample2_changes) == 1
+    assert sample2_changes.iloc[0]["action"] == "conflict"
+
+
+def test_cli_compile_index(hgnc_tsv, tmp_path):
+    output = tmp_path / "hgnc.idx"
+    cmd = [
+        "hugo-unifier",
+        "compile-index",
+        "--hgnc",
+        str(hgnc_tsv),
+        "--output",
+        str(output),
+        "--release",
+        "2025-01-01",
+    ]
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 0, f"Command failed with error: {result.stderr}"
+    assert HGNCIndex(str(output)).metadata["release"] == "2025-01-01"
+
+
+def test_cli_get_with_index(test_h5ad_paths, hgnc_index_path, tmp_path):
+    output_dir = tmp_path / "output"
+
+    cmd = [
+        "hugo-unifier",
+        "get",
+        "--outdir",
+        str(output_dir),
+        "--hgnc-index",
+        str(hgnc_index_path),
+    ]
+    for input_file in test_h5ad_paths:
+        cmd.extend(["--input", str(input_file)])
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 0, f"Command failed with error: {result.stderr}"
+    for input_file in test_h5ad_paths:
+        assert (output_dir / f"{input_file.stem}.csv").exists()
@@ -0,0 +1,71 @@
+import pandas as pd
+
+from hugo_unifier import get_changes
+from hugo_unifier.id_resolution import detect_ids, load_xref_table, resolve_ids
+
+
+def test_detect_ids():
+    symbols = pd.Series(
+        ["ENSG00000141510.12", "ENSG00000111640", "HGNC:5", "7157", "TP53"]
+    )
+
+    df = detect_ids(symbols, ["ensembl", "hgnc"])
+    assert df["original"].tolist() == [
+        "ENSG00000141510.12",
+        "ENSG00000111640",
+        "HGNC:5",
+    ]
+    assert df["id"].tolist() == ["ENSG00000141510", "ENSG00000111640", "HGNC:5"]
+
+    # Numbers are only treated as Entrez IDs on request
+    df = detect_ids(symbols, ["ensembl", "hgnc", "entrez"])
+    assert df[df["idType"] == "entrez"]["original"].tolist() == ["7157"]
+
+
+def test_resolve_ids(hgnc_tsv):
+    xref = load_xref_table(str(hgnc_tsv))
+    df_ids = detect_ids(
+        pd.Series(["ENSG00000141510.12", "7157", "ENSG00000000001"]),
+        ["ensembl", "entrez"],
+    )
+
+    df = resolve_ids(df_ids, xref)
+    assert df["original"].tolist() == ["ENSG00000141510.12", "7157"]
+    assert df["input"].tolist() == ["ENSG00000141510.12", "7157"]
+    assert df["approvedSymbol"].tolist() == ["TP53", "TP53"]
+    assert df["matchType"].tolist() == ["Ensembl gene ID", "Entrez ID"]
+    assert df["resolution"].tolist() == ["ensembl_id", "entrez_id"]
+
+
+def test_index_xref_table(hgnc_tsv, hgnc_index):
+    pd.testing.assert_frame_equal(
+        hgnc_index.xref_table(), load_xref_table(str(hgnc_tsv))
+    )
+
+
+def test_get_changes_mixed_ids_and_symbols(hgnc_index):
+    sample_symbols = {
+        "sample1": ["ENSG00000141510.12", "GAPDH"],
+        "sample2": ["TP53", "ENSG00000111640"],
+    }
+
+    queried = []
+
+    def resolver(symbols):
+        queried.extend(symbols)
+        return hgnc_index(symbols)
+
+    _, sample_changes = get_changes(
+        sample_symbols, resolver=resolver, id_table=hgnc_index.xref_table()
+    )
+
+    # IDs are resolved by the xref join and never sent to the symbol resolver
+    assert not any(symbol.startswith("ENSG") for symbol in queried)
+    sample1_changes = sample_changes["sample1"]
+    assert sample1_changes[["action", "symbol", "new"]].values.tolist() == [
+        ["rename", "ENSG00000141510.12", "TP53"]
+    ]
+    sample2_changes = sample_changes["sample2"]
+    assert sample2_changes[["action", "symbol", "new"]].values.tolist() == [
+        ["rename", "ENSG00000111640", "GAPDH"]
+    ]
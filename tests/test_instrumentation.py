@@ -0,0 +1,61 @@
+import json
+import subprocess
+
+from hugo_unifier.instrumentation import RunReport, activate, count, span
+
+
+def test_spans_and_counters():
+    report = RunReport()
+
+    with activate(report):
+        with span("outer"):
+            with span("inner"):
+                count("symbols", 3)
+            count("symbols", 2)
+
+    # Outside of an active report, spans and counters are no-ops
+    with span("ignored"):
+        count("symbols", 100)
+
+    data = report.to_dict()
+    assert [s["name"] for s in data["spans"]] == ["outer", "outer/inner"]
+    assert data["counters"] == {"symbols": 5}
+    assert all(s["seconds"] >= 0 for s in data["spans"])
+
+
+def test_cprofile_dump(tmp_path):
+    report = RunReport(profile_dir=str(tmp_path))
+
+    with activate(report):
+        with span("hot", profile=True):
+            sum(range(1000))
+
+    assert (tmp_path / "hot.prof").exists()
+
+
+def test_cli_apply_profile(uzzan_h5ad, uzzan_csv, tmp_path):
+    """Test that the 'apply' command writes a run report."""
+    report_file = tmp_path / "report.json"
+
+    cmd = [
+        "hugo-unifier",
+        "apply",
+        "--input",
+        str(uzzan_h5ad),
+        "--changes",
+        str(uzzan_csv),
+        "--output",
+        str(tmp_path / "uzzan_updated.h5ad"),
+        "--profile",
+        str(report_file),
+    ]
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 0, f"Command failed with error: {result.stderr}"
+
+    report = json.loads(report_file.read_text())
+    assert report["command"] == "apply"
+    span_names = {s["name"] for s in report["spans"]}
+    assert {"read_input", "apply_changes", "write_output"} <= span_names
+    assert report["counters"]["changes"] > 0
+    assert report["peak_rss_bytes"] > 0
@@ -0,0 +1,85 @@
+import subprocess
+
+import pytest
+
+from hugo_unifier import get_changes
+from hugo_unifier.manifest import (
+    collect_manifest,
+    manifest_symbols,
+    merge_manifests,
+    read_manifest,
+    write_manifest,
+)
+
+
+def test_collect_and_merge(tmp_path):
+    node1 = collect_manifest({"a": ["COX1", "TP53"], "b": ["COX1", "TP53"]})
+    node2 = collect_manifest({"c": ["COX1", "TP53"], "d": ["GAPDH"]})
+
+    # Identical panels are stored once
+    assert len(node1["panels"]) == 1
+    assert node1["datasets"]["a"]["n_symbols"] == 2
+
+    write_manifest(node2, tmp_path / "node2.json.gz")
+    merged = merge_manifests([node1, read_manifest(tmp_path / "node2.json.gz")])
+    assert len(merged["panels"]) == 2
+    assert dict(manifest_symbols(merged)) == {
+        "a": ["COX1", "TP53"],
+        "b": ["COX1", "TP53"],
+        "c": ["COX1", "TP53"],
+        "d": ["GAPDH"],
+    }
+
+    with pytest.raises(AssertionError, match="duplicated"):
+        merge_manifests([node2, collect_manifest({"d": ["TP53"]})])
+
+
+def test_reduce_like_get_changes(hgnc_index):
+    sample_symbols = {"sample1": ["COX1"], "sample2": ["MT-CO1", "COX1"]}
+    manifest = merge_manifests(
+        [collect_manifest({name: symbols}) for name, symbols in sample_symbols.items()]
+    )
+
+    _, expected = get_changes(sample_symbols, resolver=hgnc_index)
+    _, reduced = get_changes(manifest_symbols(manifest), resolver=hgnc_index)
+
+    for sample in expected:
+        assert reduced[sample].to_dict("records") == expected[sample].to_dict("records")
+
+
+def test_cli_collect_reduce(test_h5ad_paths, hgnc_index_path, tmp_path):
+    manifests = []
+    for n, input_file in enumerate(test_h5ad_paths):
+        manifests.append(tmp_path / f"node{n}.json.gz")
+        cmd = [
+            "hugo-unifier",
+            "collect",
+            "-i",
+            str(input_file),
+            "-o",
+            str(manifests[-1]),
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        assert result.returncode == 0, f"Command failed: {result.stderr}"
+
+    merged = tmp_path / "merged.json.gz"
+    cmd = ["hugo-unifier", "merge-manifests", "-o", str(merged)]
+    cmd.extend(str(path) for path in manifests)
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 0, f"Command failed: {result.stderr}"
+
+    outputs = {}
+    for mode in ["reduce", "get"]:
+        outdir = tmp_path / mode
+        cmd = ["hugo-unifier", mode, "-o", str(outdir)]
+        cmd.extend(["--hgnc-index", str(hgnc_index_path)])
+        if mode == "reduce":
+            cmd.append(str(merged))
+        else:
+            for input_file in test_h5ad_paths:
+                cmd.extend(["-i", str(input_file)])
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        assert result.returncode == 0, f"Command failed: {result.stderr}"
+        outputs[mode] = {p.name: p.read_text() for p in sorted(outdir.iterdir())}
+
+    assert outputs["reduce"] == outputs["get"]
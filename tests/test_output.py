@@ -0,0 +1,96 @@
+import anndata as ad
+import h5py
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from hugo_unifier.instrumentation import RunReport, activate
+from hugo_unifier.output import chunk_shape, write_output
+
+
+def make_adata():
+    rng = np.random.default_rng(0)
+    X = rng.poisson(1.0, size=(301, 57)).astype(np.float32)
+    adata = ad.AnnData(
+        X=X,
+        obs=pd.DataFrame(index=[f"cell{i}" for i in range(301)]),
+        var=pd.DataFrame(index=[f"GENE{i}" for i in range(57)]),
+    )
+    adata.layers["counts"] = sparse.csr_matrix(X)
+    adata.raw = adata.copy()
+    return adata
+
+
+def assert_equal(adata, written):
+    np.testing.assert_array_equal(adata.X, written.X)
+    np.testing.assert_array_equal(
+        adata.layers["counts"].toarray(), written.layers["counts"].toarray()
+    )
+    assert list(adata.var_names) == list(written.var_names)
+    assert list(adata.obs_names) == list(written.obs_names)
+
+
+def test_chunk_shape():
+    assert chunk_shape((1000, 100), 4, (64, 30)) == (64, 30)
+    assert chunk_shape((10, 100), 4, (64, 300)) == (10, 100)
+    # Whole rows of about 1 MiB
+    assert chunk_shape((10**6, 1024), 4) == (256, 1024)
+    # 1-d arrays of sparse matrices
+    assert chunk_shape((10**6,), 4, (64, 30)) == (1920,)
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "lzf"])
+def test_write_h5ad(tmp_path, compression):
+    adata = make_adata()
+    path = str(tmp_path / "out.h5ad")
+
+    size = write_output(adata, path, compression=compression, chunks=(64, 20))
+
+    written = ad.read_h5ad(path)
+    assert_equal(adata, written)
+    np.testing.assert_array_equal(adata.raw.X, written.raw.X)
+    with h5py.File(path, "r") as f:
+        assert f["X"].chunks == (64, 20)
+        assert f["X"].compression == compression
+        assert f["layers/counts/data"].compression == compression
+    assert size > 0
+
+
+def test_write_h5ad_parallel_gzip_is_smaller(tmp_path):
+    adata = make_adata()
+    plain = write_output(adata, str(tmp_path / "plain.h5ad"))
+    compressed = write_output(
+        adata, str(tmp_path / "gzip.h5ad"), compression="gzip", level=6, threads=4
+    )
+
+    assert compressed < plain
+    assert_equal(adata, ad.read_h5ad(tmp_path / "gzip.h5ad"))
+
+
+def test_write_zarr(tmp_path):
+    pytest.importorskip("zarr")
+    adata = make_adata()
+    path = str(tmp_path / "out.zarr")
+
+    write_output(adata, path, compression="gzip", chunks=(64, 20), threads=2)
+
+    assert_equal(adata, ad.read_zarr(path))
+
+
+def test_write_output_report(tmp_path):
+    adata = make_adata()
+    report = RunReport()
+    with activate(report):
+        size = write_output(
+            adata, str(tmp_path / "out.h5ad"), compression="gzip", threads=2
+        )
+
+    assert report.counters["output_bytes"] == size
+    assert report.metadata["output"] == {
+        "format": "h5ad",
+        "compression": "gzip",
+        "level": None,
+        "chunks": None,
+        "threads": 2,
+    }
@@ -0,0 +1,68 @@
+import numpy as np
+
+from hugo_unifier import get_changes
+from hugo_unifier.panels import Panels, PanelSet, group_panels
+from hugo_unifier.symbol_table import intern_symbols
+
+
+def test_group_panels():
+    panel_symbols, panel_members = group_panels(
+        {
+            "a": ["COX1", "TP53"],
+            "b": ["TP53", "COX1"],
+            "c": ["COX1"],
+        }
+    )
+
+    assert {k: v.tolist() for k, v in panel_symbols.items()} == {
+        "a": ["COX1", "TP53"],
+        "c": ["COX1"],
+    }
+    assert panel_members == {"a": ["a", "b"], "c": ["c"]}
+
+
+def test_panel_set():
+    table = intern_symbols(
+        {"a": ["COX1", "TP53"], "b": ["TP53", "COX1"], "c": ["COX1"]}
+    )
+    panels = Panels(table)
+    assert panels.members == [["a", "b"], ["c"]]
+
+    cox1, tp53 = [
+        PanelSet(mask, panels) for mask in panels.symbol_masks(table, np.arange(2))
+    ]
+    assert cox1 == {"a", "b", "c"}
+    assert len(tp53) == 2
+    assert "b" in tp53 and "c" not in tp53
+    assert repr(cox1) == "{'a', 'b', 'c'}"
+
+    # Operations between PanelSets stay PanelSets
+    assert isinstance(cox1 - tp53, PanelSet)
+    assert cox1 - tp53 == {"c"}
+    assert cox1 & tp53 == tp53
+    assert not tp53 - cox1
+    assert tp53 & {"b", "x"} == {"b"}
+
+
+def test_get_changes_shared_panel(hgnc_index):
+    sample_symbols = {
+        "sample1": ["COX1"],
+        "sample2": ["MT-CO1", "COX1"],
+        "sample3": ["COX1"],
+    }
+
+    G, sample_changes = get_changes(sample_symbols, resolver=hgnc_index)
+
+    # Datasets sharing a panel get the same changes, as if computed separately
+    assert set(sample_changes) == {"sample1", "sample2", "sample3"}
+    for sample in ["sample1", "sample3"]:
+        changes = sample_changes[sample]
+        assert changes["action"].tolist() == ["copy"]
+        assert changes["new"].tolist() == ["MT-CO1"]
+        assert (
+            changes["reason"].tolist() == sample_changes["sample1"]["reason"].tolist()
+        )
+    assert sample_changes["sample2"]["action"].tolist() == ["conflict"]
+
+    assert "panels" not in G.graph
+    assert G.nodes["COX1"]["samples"] == {"sample1", "sample2", "sample3"}
@@ -0,0 +1,73 @@
+import networkx as nx
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from hugo_unifier.plot_subgraph import (  # noqa: E402
+    component_index,
+    export_conflict_subgraphs,
+)
+
+
+@pytest.fixture
+def conflict_graph():
+    G = nx.DiGraph()
+    G.add_node("COX1", type="original", samples={"sample1"})
+    G.add_node("MT-CO1", type="approvedSymbol", samples={"sample2"})
+    G.add_node("PTGS1", type="approvedSymbol", samples={"sample3"})
+    G.add_edge("COX1", "MT-CO1", type="Previous symbol")
+    G.add_edge("COX1", "PTGS1", type="Previous symbol")
+    G.add_node("GAPDH", type="approvedSymbol", samples={"sample1"})
+    return G
+
+
+def test_component_index(conflict_graph):
+    index = component_index(conflict_graph)
+
+    assert index["COX1"] == {"COX1", "MT-CO1", "PTGS1"}
+    assert index["COX1"] is index["PTGS1"]
+    assert index["GAPDH"] == {"GAPDH"}
+
+    conflict_graph.add_edge("GAPDH", "PTGS1", type="Alias symbol")
+    assert "GAPDH" in component_index(conflict_graph)["COX1"]
+
+
+def test_component_index_after_remove_and_add():
+    G = nx.DiGraph()
+    G.add_edge("A", "B")
+    G.add_node("C")
+    assert set(component_index(G)) == {"A", "B", "C"}
+
+    # Same number of nodes and edges as before
+    G.remove_node("C")
+    G.add_node("D")
+    index = component_index(G)
+    assert index.get("D") == {"D"}
+    assert "C" not in index
+
+
+def test_export_conflict_subgraphs(conflict_graph, tmp_path):
+    changes = {
+        "sample1": pd.DataFrame(
+            {
+                "action": ["conflict", "conflict", "rename"],
+                "symbol": ["COX1", "MT-CO1", "GAPDH"],
+                "new": [None, None, "X"],
+                "reason": ["", "", ""],
+            }
+        )
+    }
+
+    paths = export_conflict_subgraphs(
+        conflict_graph,
+        changes,
+        str(tmp_path),
+        format="svg",
+        processes=1,
+        index=component_index(conflict_graph),
+    )
+
+    # Both conflicts are in the same component, which is rendered once
+    assert len(paths) == 1
+    assert (tmp_path / "COX1.svg").exists()
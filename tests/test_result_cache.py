@@ -0,0 +1,103 @@
+import json
+import subprocess
+
+from hugo_unifier import get_changes
+from hugo_unifier.result_cache import ResultCache, result_key
+from hugo_unifier.symbol_manipulations import (
+    manipulation_mapping,
+    register_manipulation,
+)
+
+
+def test_get_changes_cached(hgnc_index, tmp_path):
+    cache = ResultCache(str(tmp_path))
+    sample_symbols = {"sample1": ["COX1"], "sample2": ["MT-CO1"]}
+
+    G, sample_changes = get_changes(sample_symbols, resolver=hgnc_index, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    G_cached, sample_changes_cached = get_changes(
+        sample_symbols, resolver=hgnc_index, cache=cache
+    )
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert set(G_cached.nodes) == set(G.nodes)
+    for sample, df in sample_changes.items():
+        assert df.equals(sample_changes_cached[sample])
+
+    # Changed inputs or options are a miss
+    get_changes({"sample1": ["COX1"]}, resolver=hgnc_index, cache=cache)
+    get_changes(
+        sample_symbols,
+        manipulations=["identity"],
+        resolver=hgnc_index,
+        cache=cache,
+    )
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_result_key(hgnc_index):
+    key = result_key({"a": ["X", "Y"]}, ["identity"], hgnc_index)
+
+    assert key == result_key({"a": ["X", "Y"]}, ["identity"], hgnc_index)
+    assert key != result_key({"b": ["X", "Y"]}, ["identity"], hgnc_index)
+    assert key != result_key({"a": ["Y", "X"]}, ["identity"], hgnc_index)
+    assert key != result_key({"a": ["X", "Y"]}, ["dot_to_dash"], hgnc_index)
+    assert key != result_key({"a": ["X", "Y"]}, ["identity"], len)
+
+
+def test_result_key_manipulation_code(hgnc_index):
+    original = dict(manipulation_mapping)
+    try:
+        register_manipulation("custom", lambda s: s.upper(), vectorized=False)
+        key = result_key({"a": ["x"]}, ["custom"], hgnc_index)
+        register_manipulation(
+            "custom", lambda s: s.lower(), vectorized=False, overwrite=True
+        )
+        assert key != result_key({"a": ["x"]}, ["custom"], hgnc_index)
+    finally:
+        manipulation_mapping.clear()
+        manipulation_mapping.update(original)
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path), max_entries=2)
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" is now more recently used than "b"
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_cli_get_cached(test_h5ad_paths, hgnc_index_path, tmp_path):
+    """Test that a rerun of 'get' with unchanged inputs is served from the cache."""
+    for run in range(2):
+        report_file = tmp_path / f"report{run}.json"
+        cmd = [
+            "hugo-unifier",
+            "get",
+            "--outdir",
+            str(tmp_path / f"output{run}"),
+            "--hgnc-index",
+            str(hgnc_index_path),
+            "--cache-dir",
+            str(tmp_path / "cache"),
+            "--profile",
+            str(report_file),
+        ]
+        for input_file in test_h5ad_paths:
+            cmd.extend(["--input", str(input_file)])
+
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        assert result.returncode == 0, f"Command failed with error: {result.stderr}"
+
+    counters = json.loads(report_file.read_text())["counters"]
+    assert counters["result_cache_hits"] == 1
+    assert "graph_nodes" not in counters
+    for input_file in test_h5ad_paths:
+        first = (tmp_path / "output0" / f"{input_file.stem}.csv").read_text()
+        second = (tmp_path / "output1" / f"{input_file.stem}.csv").read_text()
+        assert first == second
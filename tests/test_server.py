@@ -0,0 +1,134 @@
+import http.server
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from hugo_unifier import Unifier
+from hugo_unifier.server import make_server, parse_address, request
+
+
+@pytest.fixture
+def server(hgnc_index, tmp_path):
+    server = make_server(
+        Unifier(resolver=hgnc_index), f"unix:{tmp_path / 'server.sock'}", workers=4
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"unix:{tmp_path / 'server.sock'}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_parse_address():
+    assert parse_address("unix:/tmp/a.sock") == ("unix", "/tmp/a.sock")
+    assert parse_address("localhost:8765") == ("tcp", ("localhost", 8765))
+    assert parse_address("http://127.0.0.1:80/") == ("tcp", ("127.0.0.1", 80))
+
+
+def test_server_changes(server):
+    assert request(server, "GET", "/health")["hgnc_release"] == "test"
+
+    body = {"datasets": {"sample1": ["COX1"], "sample2": ["MT-CO1", "COX1"]}}
+    result = request(server, "POST", "/changes", body)
+
+    assert result["columns"] == ["action", "symbol", "new", "reason"]
+    assert [row[:3] for row in result["changes"]["sample1"]] == [
+        ["copy", "COX1", "MT-CO1"]
+    ]
+    assert [row[0] for row in result["changes"]["sample2"]] == ["conflict"]
+
+    # The second request is answered from the warm symbol cache
+    request(server, "POST", "/changes", body)
+    stats = request(server, "GET", "/stats")
+    assert stats["requests"] == 2
+    assert stats["symbol_cache"]["hits"] > 0
+
+
+def test_server_errors(server):
+    with pytest.raises(RuntimeError, match="either 'datasets' or 'paths'"):
+        request(server, "POST", "/changes", {})
+    with pytest.raises(RuntimeError, match="Unknown endpoint"):
+        request(server, "GET", "/nothing")
+
+
+@pytest.mark.parametrize("body", [b"<html>Bad gateway</html>", b"[1, 2]"])
+def test_request_not_json(test_h5ad_paths, tmp_path, body):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.send_response(502)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    other = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=other.serve_forever, daemon=True)
+    thread.start()
+    address = f"127.0.0.1:{other.server_address[1]}"
+    try:
+        with pytest.raises(RuntimeError, match="not a JSON object"):
+            request(address, "POST", "/changes", {})
+
+        cmd = ["hugo-unifier", "get", "--outdir", str(tmp_path / "out")]
+        cmd.extend(["--server", address, "--input", str(test_h5ad_paths[0])])
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    finally:
+        other.shutdown()
+        other.server_close()
+
+    assert result.returncode == 1
+    assert f"Request to {address} failed" in result.stderr
+    assert "Traceback" not in result.stderr
+
+
+def test_cli_get_with_server(test_h5ad_paths, hgnc_index_path, tmp_path):
+    socket_path = tmp_path / "server.sock"
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "hugo_unifier.main",
+            "serve",
+            "--socket",
+            str(socket_path),
+            "--hgnc-index",
+            str(hgnc_index_path),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while not socket_path.exists():
+            assert process.poll() is None, process.stderr.read()
+            assert time.monotonic() < deadline, "Server did not start."
+            time.sleep(0.1)
+
+        outputs = {}
+        for mode in ["server", "direct"]:
+            outdir = tmp_path / mode
+            cmd = ["hugo-unifier", "get", "--outdir", str(outdir)]
+            if mode == "server":
+                cmd.extend(["--server", f"unix:{socket_path}"])
+            else:
+                cmd.extend(["--hgnc-index", str(hgnc_index_path)])
+            for input_file in test_h5ad_paths:
+                cmd.extend(["--input", str(input_file)])
+
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            assert result.returncode == 0, f"Command failed: {result.stderr}"
+            outputs[mode] = {
+                path.name: path.read_text() for path in sorted(outdir.iterdir())
+            }
+
+        assert outputs["server"] == outputs["direct"]
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    assert not socket_path.exists()
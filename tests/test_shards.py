@@ -0,0 +1,131 @@
+import subprocess
+
+import anndata as ad
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from hugo_unifier import apply_changes
+from hugo_unifier.shards import apply_shard, merge_shards, shard_range
+
+
+@pytest.fixture
+def input_h5ad(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.poisson(1.0, size=(101, 5)).astype(np.float32)
+    adata = ad.AnnData(
+        X=X,
+        obs=pd.DataFrame(
+            {"batch": ["a", "b"] * 50 + ["a"]},
+            index=[f"cell{i}" for i in range(101)],
+        ),
+        var=pd.DataFrame(index=["COX1", "COX2", "TP53", "GAPD", "ACTB"]),
+    )
+    adata.layers["counts"] = sparse.csr_matrix(X)
+    adata.obsm["X_pca"] = rng.normal(size=(101, 2))
+    adata.uns["source"] = "test"
+    adata.raw = adata.copy()
+    path = tmp_path / "input.h5ad"
+    adata.write_h5ad(path)
+    return adata, str(path)
+
+
+@pytest.fixture
+def df_changes():
+    return pd.DataFrame(
+        {
+            "action": ["rename", "rename"],
+            "symbol": ["COX1", "GAPD"],
+            "new": ["MT-CO1", "GAPDH"],
+        }
+    )
+
+
+def write_shards(path, df_changes, n_shards, outdir):
+    paths = []
+    for shard in range(n_shards):
+        shard_path = str(outdir / f"shard{shard}.h5ad")
+        apply_shard(path, df_changes, shard, n_shards).write_h5ad(shard_path)
+        paths.append(shard_path)
+    return paths
+
+
+def test_shard_range():
+    ranges = [shard_range(10, shard, 3) for shard in range(3)]
+    assert ranges == [(0, 3), (3, 6), (6, 10)]
+    assert shard_range(2, 2, 4) == (1, 1)
+    with pytest.raises(AssertionError):
+        shard_range(10, 3, 3)
+
+
+@pytest.mark.parametrize("output", ["merged.h5ad", "merged.zarr"])
+def test_merge_shards(tmp_path, input_h5ad, df_changes, output):
+    if output.endswith(".zarr"):
+        pytest.importorskip("zarr")
+    adata, path = input_h5ad
+    expected = apply_changes(adata, df_changes)
+    shards = write_shards(path, df_changes, 3, tmp_path)
+
+    # The shards can be merged in any order
+    merge_shards(shards[::-1], str(tmp_path / output))
+
+    read = ad.read_zarr if output.endswith(".zarr") else ad.read_h5ad
+    merged = read(tmp_path / output)
+    assert merged.var_names.tolist() == expected.var_names.tolist()
+    assert merged.obs_names.tolist() == adata.obs_names.tolist()
+    assert merged.obs["batch"].tolist() == adata.obs["batch"].tolist()
+    np.testing.assert_array_equal(merged.X, expected.X)
+    np.testing.assert_array_equal(
+        merged.layers["counts"].toarray(), expected.layers["counts"].toarray()
+    )
+    np.testing.assert_allclose(merged.obsm["X_pca"], adata.obsm["X_pca"])
+    np.testing.assert_array_equal(merged.raw.X, adata.raw.X)
+    assert merged.raw.var_names.tolist() == expected.raw.var_names.tolist()
+    assert merged.uns == {"source": "test"}
+
+
+def test_merge_shards_requires_all_shards(tmp_path, input_h5ad, df_changes):
+    _, path = input_h5ad
+    shards = write_shards(path, df_changes, 3, tmp_path)
+
+    with pytest.raises(AssertionError, match="Expected shards 0 to 2"):
+        merge_shards(shards[:2], str(tmp_path / "merged.h5ad"))
+
+
+def test_cli_apply_shard_and_merge(tmp_path, input_h5ad, df_changes):
+    adata, path = input_h5ad
+    changes = tmp_path / "changes.csv"
+    df_changes.to_csv(changes, index=False)
+
+    shards = []
+    for shard in range(2):
+        shard_path = str(tmp_path / f"shard{shard}.h5ad")
+        subprocess.run(
+            [
+                "hugo-unifier",
+                "apply-shard",
+                "-i",
+                path,
+                "-c",
+                str(changes),
+                "--shard",
+                str(shard),
+                "--n-shards",
+                "2",
+                "-o",
+                shard_path,
+            ],
+            check=True,
+        )
+        shards.append(shard_path)
+
+    output = tmp_path / "merged.h5ad"
+    subprocess.run(
+        ["hugo-unifier", "merge-shards", *shards, "-o", str(output)], check=True
+    )
+
+    merged = ad.read_h5ad(output)
+    assert merged.n_obs == adata.n_obs
+    assert "MT-CO1" in merged.var_names
+    assert "COX1" not in merged.var_names
@@ -0,0 +1,104 @@
+import json
+
+import pandas as pd
+import pytest
+
+from hugo_unifier import symbol_manipulations
+from hugo_unifier.symbol_manipulations import (
+    apply_manipulation,
+    discard_after_dot,
+    dot_to_dash,
+    load_manipulations,
+    manipulation_mapping,
+    register_manipulation,
+)
+
+
+@pytest.fixture
+def restore_registry():
+    """Undo registrations made by a test."""
+    original = dict(manipulation_mapping)
+    yield
+    manipulation_mapping.clear()
+    manipulation_mapping.update(original)
+
+
+def test_builtin_manipulations_match_scalar_functions():
+    symbols = pd.Series(["MT.CO1", "AL132709.8", "A.B.C", "GAPDH", ".5"])
+
+    assert manipulation_mapping["dot_to_dash"](symbols).tolist() == [
+        dot_to_dash(s) for s in symbols
+    ]
+    assert manipulation_mapping["discard_after_dot"](symbols).tolist() == [
+        discard_after_dot(s) for s in symbols
+    ]
+
+
+def test_additional_manipulations():
+    symbols = pd.Series(["FOO-AS1", "BAR_1", "ENSG00000141510.12", "ENSG00000141510"])
+
+    assert manipulation_mapping["strip_as_suffix"](symbols)[0] == "FOO"
+    assert manipulation_mapping["strip_numeric_suffix"](symbols)[1] == "BAR"
+    assert manipulation_mapping["strip_ensembl_version"](symbols).tolist()[2:] == [
+        "ENSG00000141510",
+        "ENSG00000141510",
+    ]
+    assert manipulation_mapping["uppercase"](pd.Series(["c1orf112"]))[0] == "C1ORF112"
+
+
+def test_distinct_symbols_evaluated_once(restore_registry):
+    calls = []
+
+    def record(symbol):
+        calls.append(symbol)
+        return symbol.lower()
+
+    register_manipulation("record", record, vectorized=False)
+
+    df = apply_manipulation(
+        pd.Series(["A", "B", "A", "A"]), manipulation_mapping["record"]
+    )
+    assert sorted(calls) == ["A", "B"]
+    assert df["original"].tolist() == ["A", "B"]
+    assert df["input"].tolist() == ["a", "b"]
+
+
+def test_scalar_functions_in_registry(restore_registry):
+    # Per-symbol functions added directly, as in earlier versions, still work
+    manipulation_mapping["legacy_dot_to_dash"] = dot_to_dash
+    register_manipulation("lower", lambda symbols: symbols.str.lower())
+
+    symbols = pd.Series(["MT.CO1", "A.B"])
+    df = apply_manipulation(symbols, manipulation_mapping["legacy_dot_to_dash"])
+    assert df["input"].tolist() == ["MT-CO1", "A-B"]
+    df = apply_manipulation(symbols, manipulation_mapping["lower"])
+    assert df["input"].tolist() == ["mt.co1", "a.b"]
+
+
+def test_register_duplicate_name(restore_registry):
+    with pytest.raises(AssertionError):
+        register_manipulation("identity", lambda symbols: symbols)
+
+
+def test_load_manipulations(tmp_path, restore_registry):
+    config = tmp_path / "manipulations.json"
+    config.write_text(
+        json.dumps(
+            {
+                "strip_dash_number": {"pattern": r"-\d+$"},
+                "underscore_to_dash": {"pattern": "_", "replacement": "-"},
+            }
+        )
+    )
+
+    names = load_manipulations(str(config))
+    assert names == ["strip_dash_number", "underscore_to_dash"]
+
+    symbols = pd.Series(["GENE-1", "HLA_A"])
+    assert symbol_manipulations.manipulation_mapping["strip_dash_number"](
+        symbols
+    ).tolist() == ["GENE", "HLA_A"]
+    assert manipulation_mapping["underscore_to_dash"](symbols).tolist() == [
+        "GENE-1",
+        "HLA-A",
+    ]
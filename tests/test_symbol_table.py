@@ -0,0 +1,65 @@
+import anndata as ad
+import h5py
+import numpy as np
+import pandas as pd
+
+from hugo_unifier import get_changes
+from hugo_unifier.symbol_table import SymbolTable, intern_symbols, read_var_names
+
+
+def test_intern_symbols():
+    table = intern_symbols(
+        [
+            ("a", ["COX1", "TP53"]),
+            ("b", np.array(["TP53", "GAPDH"], dtype=object)),
+            ("c", pd.Index(["COX1", None])),
+        ]
+    )
+
+    assert isinstance(table, SymbolTable)
+    assert list(table) == ["a", "b", "c"]
+    assert table.vocabulary.tolist() == ["COX1", "TP53", "GAPDH"]
+    assert table.codes["b"].tolist() == [1, 2]
+    assert table.codes["b"].dtype == np.int32
+    assert table["b"].tolist() == ["TP53", "GAPDH"]
+    # Missing values are skipped
+    assert table["c"].tolist() == ["COX1"]
+
+    assert intern_symbols(table) is table
+
+
+def test_get_changes_streaming(hgnc_index):
+    sample_symbols = {"sample1": ["COX1"], "sample2": ["MT-CO1", "COX1"]}
+
+    def stream():
+        for name, symbols in sample_symbols.items():
+            yield name, np.array(symbols)
+
+    _, expected = get_changes(sample_symbols, resolver=hgnc_index)
+    _, streamed = get_changes(stream(), resolver=hgnc_index)
+
+    assert list(streamed) == list(expected)
+    for sample in expected:
+        pd.testing.assert_frame_equal(
+            streamed[sample].reset_index(drop=True),
+            expected[sample].reset_index(drop=True),
+        )
+
+
+def test_read_var_names_legacy(tmp_path):
+    path = tmp_path / "legacy.h5ad"
+    ad.AnnData(
+        np.ones((2, 3), dtype=np.float32),
+        obs=pd.DataFrame(index=["c1", "c2"]),
+        var=pd.DataFrame(index=["COX1", "TP53", "GAPDH"]),
+    ).write_h5ad(path)
+    # anndata < 0.7 stored obs and var as compound datasets without _index
+    with h5py.File(path, "a") as f:
+        for key, names in [("obs", ["c1", "c2"]), ("var", ["COX1", "TP53", "GAPDH"])]:
+            del f[key]
+            f.create_dataset(
+                key, data=np.array([(n,) for n in names], dtype=[("index", "S8")])
+            )
+
+    assert read_var_names(str(path)).tolist() == ["COX1", "TP53", "GAPDH"]
+    assert read_var_names(str(path)).equals(ad.read_h5ad(path).var_names)
@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from hugo_unifier import Unifier, get_changes
+from hugo_unifier.hugo_fetch import fetch_symbol_check_results
+from hugo_unifier.result_cache import describe_resolver
+from hugo_unifier.unifier import SymbolCache
+
+sample_symbols = {"sample1": ["COX1"], "sample2": ["MT-CO1", "COX1"]}
+
+
+def assert_same_changes(actual, expected):
+    assert list(actual) == list(expected)
+    for sample in expected:
+        pd.testing.assert_frame_equal(
+            actual[sample].reset_index(drop=True),
+            expected[sample].reset_index(drop=True),
+        )
+
+
+def test_unifier_warm_cache(hgnc_index):
+    unifier = Unifier(resolver=hgnc_index)
+    _, expected = get_changes(sample_symbols, resolver=hgnc_index)
+
+    _, first = unifier.get_changes(sample_symbols)
+    misses = unifier.stats()["misses"]
+    assert unifier.stats()["hits"] == 0
+
+    _, second = unifier.get_changes(sample_symbols)
+    assert unifier.stats()["hits"] == misses
+    assert unifier.stats()["misses"] == misses
+
+    assert_same_changes(first, expected)
+    assert_same_changes(second, expected)
+
+
+def test_unifier_threads(hgnc_index):
+    unifier = Unifier(resolver=hgnc_index)
+    _, expected = get_changes(sample_symbols, resolver=hgnc_index)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(
+            executor.map(lambda _: unifier.get_changes(sample_symbols), range(32))
+        )
+
+    for _, changes in results:
+        assert_same_changes(changes, expected)
+    stats = unifier.stats()
+    assert stats["hits"] + stats["misses"] > 0
+    assert stats["size"] <= stats["maxsize"]
+
+
+def test_symbol_cache_eviction(hgnc_index):
+    cache = SymbolCache(hgnc_index, maxsize=2)
+
+    cache(["COX1", "TP53", "GAPDH"])
+    assert cache.stats()["size"] == 2
+
+    # COX1 was the least recently used symbol
+    df = cache(["COX1", "GAPDH"])
+    assert cache.stats()["hits"] == 1
+    assert set(df["input"]) == {"COX1", "GAPDH"}
+    assert describe_resolver(cache) == describe_resolver(hgnc_index)
+
+
+def test_unifier_session():
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return [
+                {
+                    "input": "TP53",
+                    "matchType": "Approved symbol",
+                    "approvedSymbol": "TP53",
+                    "location": "17p13.1",
+                }
+            ]
+
+    class Session:
+        requests = 0
+
+        def post(self, url, data):
+            self.requests += 1
+            return Response()
+
+    session = Session()
+    df = fetch_symbol_check_results(["TP53"], session=session)
+    assert session.requests == 1
+    assert df["approvedSymbol"].tolist() == ["TP53"]
+
+    with Unifier() as unifier:
+        assert unifier.session is not None
+        assert describe_resolver(unifier.symbol_cache) == describe_resolver(
+            fetch_symbol_check_results
+        )
@@ -0,0 +1,143 @@
+import subprocess
+
+import pandas as pd
+
+from hugo_unifier.validate import validate_changes, validate_datasets
+
+
+def changes(*rows):
+    return pd.DataFrame(rows, columns=["action", "symbol", "new"])
+
+
+def test_validate_valid():
+    problems = validate_changes(
+        ["COX1", "MTCO2", "TP53"],
+        changes(
+            ("rename", "COX1", "MT-CO1"),
+            ("copy", "MTCO2", "MT-CO2"),
+            ("conflict", "TP53", None),
+        ),
+    )
+    assert len(problems) == 0
+
+
+def test_validate_reports_all_problems():
+    problems = validate_changes(
+        ["COX1", "COX2", "MT-CO2", "GAPD", "GAPD"],
+        changes(
+            ("rename", "NOT-THERE", "X"),
+            ("rename", "COX2", "MT-CO2"),
+            ("rename", "COX1", "MT-CO1"),
+            ("copy", "COX1", "PTGS1"),
+            ("rename", "MT-CO1", "MT-CO1-NEW"),
+            ("copy", "GAPD", "GAPDH"),
+            ("drop", "COX2", None),
+        ),
+        dataset="sample1",
+    )
+
+    assert problems["problem"].tolist() == [
+        "missing_symbol",
+        "existing_new",
+        "missing_symbol",
+        "chain",
+        "duplicate_var_name",
+        "unknown_action",
+    ]
+    assert problems["row"].tolist() == [0, 1, 3, 4, 5, 6]
+    assert problems["severity"].tolist() == [
+        "error",
+        "error",
+        "error",
+        "warning",
+        "error",
+        "error",
+    ]
+    assert set(problems["dataset"]) == {"sample1"}
+    assert "renamed by an earlier change" in problems.iloc[2]["message"]
+
+
+def test_validate_collision_between_changes():
+    problems = validate_changes(
+        ["COX1", "MTCO1"],
+        changes(("rename", "COX1", "MT-CO1"), ("rename", "MTCO1", "MT-CO1")),
+    )
+    assert problems["problem"].tolist() == ["existing_new"]
+    assert "an earlier change created it" in problems.iloc[0]["message"]
+
+
+def test_validate_merge():
+    problems = validate_changes(
+        ["COX1", "MT-CO1", "COX2"],
+        changes(
+            ("merge", "COX1", "MT-CO1"),
+            ("merge", "COX2", "MT-CO2"),
+            ("rename", "COX1", "PTGS1"),
+        ),
+    )
+    assert problems["problem"].tolist() == ["missing_new", "missing_symbol"]
+    assert "merged by an earlier change" in problems.iloc[1]["message"]
+
+
+def test_validate_merge_into_itself():
+    problems = validate_changes(
+        ["COX1", "MT-CO1"],
+        changes(("merge", "COX1", "COX1"), ("rename", "COX1", "PTGS1")),
+    )
+    # The invalid merge is skipped, so COX1 can still be renamed
+    assert problems["problem"].tolist() == ["merge_into_itself"]
+    assert problems.iloc[0]["severity"] == "error"
+
+
+def test_validate_datasets(uzzan_h5ad, uzzan_csv):
+    problems = validate_datasets(
+        {"uzzan": str(uzzan_h5ad), "other": ["COX1"]},
+        {
+            "uzzan": pd.read_csv(uzzan_csv),
+            "other": changes(("rename", "COX2", "MT-CO2")),
+        },
+    )
+    assert problems["dataset"].tolist() == ["other"]
+
+
+def test_cli_validate(uzzan_h5ad, uzzan_csv, tmp_path):
+    cmd = ["hugo-unifier", "validate", "-i", str(uzzan_h5ad), "-c", str(uzzan_csv)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 0, f"Command failed with error: {result.stderr}"
+    assert "0 errors" in result.stdout
+
+    bad_changes = tmp_path / "uzzan.csv"
+    changes(("rename", "NOT-THERE", "X"), ("rename", "NOT-THERE-EITHER", "Y")).to_csv(
+        bad_changes, index=False
+    )
+    report = tmp_path / "report.csv"
+    cmd = [
+        "hugo-unifier",
+        "validate",
+        "-i",
+        str(uzzan_h5ad),
+        "-c",
+        str(tmp_path),
+        "--report",
+        str(report),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 1
+    assert "2 errors" in result.stdout
+    assert len(pd.read_csv(report)) == 2
+
+    # apply refuses the changes before reading the whole file
+    cmd = [
+        "hugo-unifier",
+        "apply",
+        "-i",
+        str(uzzan_h5ad),
+        "-c",
+        str(bad_changes),
+        "-o",
+        str(tmp_path / "out.h5ad"),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode != 0
+    assert "NOT-THERE-EITHER" in result.stderr
+    assert not (tmp_path / "out.h5ad").exists()
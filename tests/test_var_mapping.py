@@ -0,0 +1,117 @@
+import anndata as ad
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from hugo_unifier import apply_changes, get_changes
+from hugo_unifier.var_mapping import compile_var_mapping
+
+
+def changes(*rows):
+    return pd.DataFrame(rows, columns=["action", "symbol", "new"])
+
+
+X = np.array(
+    [
+        [1, 0, 5, 2],
+        [0, 3, 1, 0],
+        [4, 2, 0, 7],
+    ],
+    dtype=np.float32,
+)
+
+
+def make_adata(X):
+    adata = ad.AnnData(
+        X=X,
+        var=pd.DataFrame(
+            {"feature": ["a", "b", "c", "d"]}, index=["COX1", "MT-CO1", "TP53", "GAPD"]
+        ),
+    )
+    adata.layers["counts"] = X.copy()
+    adata.raw = adata.copy()
+    return adata
+
+
+def test_compile_var_mapping():
+    mapping = compile_var_mapping(
+        ["COX1", "MT-CO1", "TP53", "GAPD"],
+        changes(
+            ("merge", "COX1", "MT-CO1"),
+            ("copy", "TP53", "P53"),
+            ("rename", "GAPD", "GAPDH"),
+            ("conflict", "TP53", None),
+        ),
+    )
+
+    assert mapping.var_names.tolist() == ["MT-CO1", "TP53", "GAPDH", "P53"]
+    assert mapping.sources == [[1, 0], [2], [3], [2]]
+    assert mapping.matrix.toarray().tolist() == [
+        [1, 0, 0, 0],
+        [1, 0, 0, 0],
+        [0, 1, 0, 1],
+        [0, 0, 1, 0],
+    ]
+
+
+def test_compile_var_mapping_problems():
+    var_names = ["COX1", "MT-CO1"]
+    with pytest.raises(ValueError, match="not found"):
+        compile_var_mapping(var_names, changes(("merge", "COX1", "MT-CO2")))
+    with pytest.raises(ValueError, match="already exists"):
+        compile_var_mapping(var_names, changes(("rename", "COX1", "MT-CO1")))
+
+    mapping = compile_var_mapping(
+        var_names,
+        changes(("rename", "COX2", "MT-CO2"), ("rename", "COX1", "PTGS1")),
+        strict=False,
+    )
+    assert mapping.var_names.tolist() == ["PTGS1", "MT-CO1"]
+
+
+@pytest.mark.parametrize("to_matrix", [np.asarray, sparse.csr_matrix])
+@pytest.mark.parametrize(
+    "merge, expected",
+    [("sum", [[1, 5], [3, 1], [6, 0]]), ("max", [[1, 5], [3, 1], [4, 0]])],
+)
+def test_apply_changes_merge(to_matrix, merge, expected):
+    adata = make_adata(to_matrix(X))
+
+    updated = apply_changes(
+        adata,
+        changes(("merge", "COX1", "MT-CO1"), ("rename", "GAPD", "GAPDH")),
+        merge=merge,
+    )
+
+    assert updated.var_names.tolist() == ["MT-CO1", "TP53", "GAPDH"]
+    assert updated.var["feature"].tolist() == ["b", "c", "d"]
+    for matrix in [updated.X, updated.layers["counts"], updated.raw.X]:
+        assert isinstance(matrix, type(adata.X))
+        dense = matrix.toarray() if sparse.issparse(matrix) else matrix
+        np.testing.assert_array_equal(dense[:, :2], expected)
+        np.testing.assert_array_equal(dense[:, 2], X[:, 3])
+    assert updated.raw.var_names.tolist() == ["MT-CO1", "TP53", "GAPDH"]
+
+
+def test_apply_changes_copy_keeps_sparsity():
+    adata = make_adata(sparse.csr_matrix(X))
+
+    updated = apply_changes(adata, changes(("copy", "TP53", "P53")))
+
+    assert updated.var_names.tolist() == ["COX1", "MT-CO1", "TP53", "GAPD", "P53"]
+    assert sparse.isspmatrix_csr(updated.X)
+    np.testing.assert_array_equal(updated.X[:, 4].toarray().ravel(), X[:, 2])
+
+
+def test_get_changes_merge(hgnc_index):
+    sample_symbols = {"sample1": ["COX1"], "sample2": ["MT-CO1", "COX1"]}
+
+    _, sample_changes = get_changes(sample_symbols, resolver=hgnc_index, merge=True)
+
+    # Without a sample keeping COX1, the other samples rename it
+    assert sample_changes["sample1"]["action"].tolist() == ["rename"]
+    sample2 = sample_changes["sample2"]
+    assert sample2[["action", "symbol", "new"]].values.tolist() == [
+        ["merge", "COX1", "MT-CO1"]
+    ]